@@ -229,4 +229,73 @@ CREATE TABLE public.system_config (
   updated_by bigint,
   CONSTRAINT system_config_pkey PRIMARY KEY (config_key),
   CONSTRAINT system_config_updated_by_fkey FOREIGN KEY (updated_by) REFERENCES public.staff(staff_id)
-);
\ No newline at end of file
+);
+-- Keyset pagination for the Book Management tab: (sort key, book_id) per sortable column
+CREATE INDEX books_title_keyset_idx ON public.books (title, book_id) WHERE is_active = true;
+CREATE INDEX books_author_keyset_idx ON public.books (author, book_id) WHERE is_active = true;
+CREATE INDEX books_year_keyset_idx ON public.books (COALESCE(publication_year, 0), book_id) WHERE is_active = true;
+
+-- Full-text search: books.search_vector is written by BookModel on insert/update; backfill and index it
+UPDATE public.books SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(author, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(genre, '')), 'C') ||
+    to_tsvector('simple', COALESCE(isbn, ''));
+CREATE INDEX books_search_vector_idx ON public.books USING gin (search_vector);
+
+-- Fuzzy (typo-tolerant) title/author search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX books_title_trgm_idx ON public.books USING gin (title gin_trgm_ops) WHERE is_active = true;
+CREATE INDEX books_author_trgm_idx ON public.books USING gin (author gin_trgm_ops) WHERE is_active = true;
+
+-- Maintained copy counters, updated by CopyModel in the same transaction as each copy write
+ALTER TABLE public.books
+    ADD COLUMN active_copy_count integer NOT NULL DEFAULT 0 CHECK (active_copy_count >= 0),
+    ADD COLUMN available_copy_count integer NOT NULL DEFAULT 0 CHECK (available_copy_count >= 0);
+UPDATE public.books b
+SET active_copy_count = c.active_copies,
+    available_copy_count = c.available_copies
+FROM (
+    SELECT book_id,
+           COUNT(*) AS active_copies,
+           COUNT(*) FILTER (WHERE status = 'available') AS available_copies
+    FROM public.book_copies
+    WHERE is_active = true
+    GROUP BY book_id
+) c
+WHERE b.book_id = c.book_id;
+CREATE INDEX books_copies_keyset_idx ON public.books (active_copy_count, book_id) WHERE is_active = true;
+
+-- Exact-match lookups for scanned ISBNs; isbn13 is written by BookModel and
+-- filled for older rows by `python src/maintenance.py backfill-isbn13`
+CREATE INDEX books_isbn13_idx ON public.books (isbn13) WHERE is_active = true;
+
+-- Member numbers: MemberNumberAllocator reserves blocks of 100 per nextval (hi/lo);
+-- INCREMENT BY must match member_numbers.BLOCK_SIZE. Starts after the highest number in use.
+CREATE SEQUENCE public.member_number_seq INCREMENT BY 100;
+SELECT setval('public.member_number_seq', COALESCE((
+    SELECT MAX(CAST(split_part(member_number, '-', 3) AS integer))
+    FROM public.members
+    WHERE member_number ~ '^MEM-[0-9]{4}-[0-9]+$'
+), 0) + 1, false);
+
+-- Member Management tab: per-member aggregates of active loans and pending fines
+-- come from index-only scans of these partial indexes
+CREATE INDEX loans_member_active_idx ON public.loans (member_id, loan_date) WHERE loan_status = 'active';
+CREATE INDEX fines_member_pending_idx ON public.fines (member_id, amount) WHERE fine_status = 'pending';
+
+-- Keyset pagination for the Member Management tab: (sort key, member_id) for the default and date sorts
+CREATE INDEX members_last_name_keyset_idx ON public.members (last_name, member_id) WHERE is_active = true;
+CREATE INDEX members_date_keyset_idx ON public.members (membership_date, member_id) WHERE is_active = true;
+CREATE INDEX members_expiry_keyset_idx ON public.members (membership_expiry, member_id) WHERE is_active = true;
+
+-- Member search keys, written by MemberModel on insert/update and filled for older rows by
+-- `python src/maintenance.py backfill-member-keys`. member_search.search_filter picks one index per query shape.
+ALTER TABLE public.members
+    ADD COLUMN phone_digits character varying,
+    ADD COLUMN email_lower character varying,
+    ADD COLUMN name_key text;
+CREATE INDEX members_email_lower_idx ON public.members (email_lower varchar_pattern_ops) WHERE is_active = true;
+CREATE INDEX members_number_prefix_idx ON public.members (upper(member_number) varchar_pattern_ops) WHERE is_active = true;
+CREATE INDEX members_phone_digits_trgm_idx ON public.members USING gin (phone_digits gin_trgm_ops) WHERE is_active = true;
+CREATE INDEX members_name_key_trgm_idx ON public.members USING gin (name_key gin_trgm_ops) WHERE is_active = true;
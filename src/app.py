@@ -2,7 +2,7 @@ from PyQt5.QtWidgets import QApplication
 import sys
 import logging
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+from db.session_pool import SessionPool
 from models.copy_model import CopyModel
 from models.book_model import BookModel
 from models.member_model import MemberModel
@@ -11,6 +11,7 @@ from views.member_management_view import MemberManagementView
 from controllers.book_controller import BookController
 from controllers.copy_controller import CopyController
 from controllers.member_controller import MemberController
+from controllers.query_executor import QueryExecutor
 from views.main_window import MainWindow
 from icon_manager import IconManager
 
@@ -22,21 +23,24 @@ def main():
         
         # Initialize session pool
         engine = create_engine('sqlite:///library.db', echo=False)
-        session_pool = scoped_session(sessionmaker(bind=engine))
+        session_pool = SessionPool(engine)
+        query_executor = QueryExecutor(session_pool)
         
         # Initialize models
         book_model = BookModel(session_pool)
         copy_model = CopyModel(session_pool)
         member_model = MemberModel(session_pool)
+        # Copy writes change copy counts in cached book results
+        copy_model.add_change_listener(book_model.invalidate_results)
         
         # Initialize views
         book_view = BookManagementView()
         member_view = MemberManagementView()
         
         # Initialize controllers
-        book_controller = BookController(book_model, book_view, None)
+        book_controller = BookController(book_model, book_view, None, query_executor)
         copy_controller = CopyController(copy_model, book_view, book_controller)
-        member_controller = MemberController(session_pool)
+        member_controller = MemberController(session_pool, query_executor)
         book_controller.copy_controller = copy_controller
         
         # Initialize and show main window
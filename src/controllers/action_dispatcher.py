@@ -0,0 +1,22 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ActionDispatcher:
+    """Routes (action, entity_id) pairs from a table to their handlers.
+
+    Handlers are registered once when a controller is created, so reloading,
+    sorting or searching a table never touches any signal wiring.
+    """
+    def __init__(self):
+        self.handlers = {}
+
+    def register(self, action, handler):
+        self.handlers[action] = handler
+
+    def dispatch(self, action, entity_id):
+        handler = self.handlers.get(action)
+        if handler is None:
+            logger.error(f"No handler registered for table action '{action}'")
+            return
+        handler(entity_id)
@@ -1,23 +1,41 @@
 from PyQt5.QtCore import QObject, pyqtSignal, Qt
-from PyQt5.QtWidgets import QMessageBox, QTableWidgetItem, QFileDialog
-import csv
+from PyQt5.QtWidgets import QMessageBox, QFileDialog
 import logging
 from datetime import datetime
+from controllers.action_dispatcher import ActionDispatcher
+from models.search_index import SearchIndex, matches
+from models.book_model import YEAR_BUCKET, SORT_KEYS
+from models.catalog_cache import CatalogRow
+from models.import_engine import BookImportEngine
+from models.copy_model import COPY_COLUMNS
+from controllers.export_controller import ExportController
 
 logging.basicConfig(filename='book_management.log', level=logging.ERROR)
 
 class BookController(QObject):
     search_triggered = pyqtSignal(str)
     
-    def __init__(self, model, view, copy_controller):
+    def __init__(self, model, view, copy_controller, executor):
         super().__init__()
         self.model = model
         self.view = view
         self.copy_controller = copy_controller
+        self.executor = executor
         self.current_sort_column = 'title'
         self.current_sort_order = 'ASC'
+        self.current_filters = {}
+        self.next_cursor = None
+        # Columnar copy of the catalog; None until loaded, then patched per write and reloaded after imports
+        self.catalog = None
+        # Token index for search-as-you-type; built once from the first catalog, then patched per write
+        self.search_index = None
+        self.actions = ActionDispatcher()
+        self.exporter = ExportController(view, executor, 'export')
         self.connect_signals()
+        self.model.add_change_listener(self.handle_catalog_change)
         self.load_books()
+        self.refresh_facets()
+        self.refresh_catalog_cache()
 
     def connect_signals(self):
         self.view.add_button.clicked.connect(self.show_add_book_dialog)
@@ -25,50 +43,203 @@ class BookController(QObject):
         self.view.delete_button.clicked.connect(self.delete_book)
         self.view.search_button.clicked.connect(self.search_books)
         self.view.search_input.returnPressed.connect(self.search_books)
+        self.view.search_input.textChanged.connect(self.search_as_you_type)
         self.view.clear_search_button.clicked.connect(self.clear_search)
+        self.view.fuzzy_toggle.toggled.connect(self.handle_fuzzy_toggled)
         self.view.import_button.clicked.connect(self.import_books)
+        self.view.export_button.clicked.connect(self.export_books)
         self.view.table.horizontalHeader().sectionClicked.connect(self.sort_table)
         self.view.table.doubleClicked.connect(self.show_edit_book_dialog)
+        self.view.table_model.fetch_more_requested.connect(self.load_more_books)
 
-    def disconnect_action_buttons(self, row):
-        """Disconnect signals for action buttons in the specified row"""
-        widget = self.view.table.cellWidget(row, 9)
-        if widget:
-            edit_btn = widget.layout().itemAt(0).widget()
-            add_copy_btn = widget.layout().itemAt(1).widget()
-            delete_btn = widget.layout().itemAt(2).widget()
-            for btn in [edit_btn, add_copy_btn, delete_btn]:
-                try:
-                    btn.clicked.disconnect()
-                except TypeError:
-                    pass  # Ignore if signal is not connected
-
-    def load_books(self, search_query=None, genre=None, year_min=None, year_max=None):
-        try:
-            # Disconnect all existing action button signals
-            for row in range(self.view.table.rowCount()):
-                self.disconnect_action_buttons(row)
-
-            books = self.model.get_books(search_query, genre, year_min, year_max, self.current_sort_column, self.current_sort_order)
-            self.view.show_books(books)
-            
-            # Connect action buttons with lambda functions
-            for row in range(self.view.table.rowCount()):
-                book_id = self.view.table.item(row, 0).text()
-                widget = self.view.table.cellWidget(row, 9)
-                if widget:
-                    edit_btn = widget.layout().itemAt(0).widget()  # Edit button
-                    add_copy_btn = widget.layout().itemAt(1).widget()  # Add copy button
-                    delete_btn = widget.layout().itemAt(2).widget()  # Delete button
-                    
-                    # Connect buttons using lambda with book_id and row
-                    edit_btn.clicked.connect(lambda checked, bid=book_id, r=row: self.edit_book_row(bid, r))
-                    delete_btn.clicked.connect(lambda checked, bid=book_id, r=row: self.delete_book_row(bid, r))
-                    add_copy_btn.clicked.connect(lambda checked, bid=book_id, r=row: self.copy_controller.show_book_copies_dialog(bid))
-            
-        except Exception as e:
-            logging.error(f"Error loading books: {str(e)}")
-            self.view.show_error(str(e))
+        # Row action buttons go through one dispatcher, wired once
+        self.actions.register('edit', self.edit_book_row)
+        self.actions.register('delete', self.delete_book_row)
+        self.actions.register('copies', lambda book_id: self.copy_controller.show_book_copies_dialog(book_id))
+        self.view.action_delegate.action_triggered.connect(self.actions.dispatch)
+
+    def load_books(self, search_query=None, genre=None, year_min=None, year_max=None, search_mode='fulltext'):
+        """Reset the page cursor and query the first page of books in the background"""
+        self.current_filters = {
+            'search_query': search_query,
+            'genre': genre,
+            'year_min': year_min,
+            'year_max': year_max,
+            'search_mode': search_mode
+        }
+        if not search_query and self.current_sort_column == 'relevance':
+            self.current_sort_column = 'title'
+            self.current_sort_order = 'ASC'
+        # Pages of the previous result must not be requested any more
+        self.next_cursor = None
+        self.view.table_model.has_more = False
+        if self.catalog is not None and not search_query:
+            # Without a text search the cached catalog answers sorts and filters on its own
+            self.show_cached_books(genre, year_min, year_max)
+            return
+        self.executor.submit(
+            'books', self.model.get_books_page,
+            sort_by=self.current_sort_column, sort_order=self.current_sort_order, **self.current_filters,
+            on_result=self.show_first_page, on_error=self.handle_load_error
+        )
+
+    def show_cached_books(self, genre, year_min, year_max, ids=None):
+        """Show books from the catalog cache, optionally limited to a set of ids"""
+        self.executor.cancel('books')
+        self.view.show_books(self.catalog.query(
+            genre, year_min, year_max, self.current_sort_column, self.current_sort_order, ids
+        ))
+
+    def show_first_page(self, page):
+        books, self.next_cursor = page
+        self.view.show_books(books, has_more=self.next_cursor is not None)
+
+    def load_more_books(self):
+        """Query the page after the current cursor in the background"""
+        if self.next_cursor is None:
+            return
+        cursor, self.next_cursor = self.next_cursor, None
+        self.executor.submit(
+            'books', self.model.get_books_page,
+            sort_by=self.current_sort_column, sort_order=self.current_sort_order,
+            after=cursor, **self.current_filters,
+            on_result=self.append_page, on_error=self.handle_load_error
+        )
+
+    def append_page(self, page):
+        books, self.next_cursor = page
+        self.view.append_books(books, has_more=self.next_cursor is not None)
+
+    def refresh_catalog_cache(self):
+        """Load the whole catalog into the columnar cache in the background"""
+        self.executor.submit(
+            'catalog', self.model.load_catalog_cache,
+            on_result=self.set_catalog_cache, on_error=self.handle_catalog_error
+        )
+
+    def set_catalog_cache(self, catalog):
+        self.catalog = catalog
+        if self.search_index is None:
+            self.build_search_index()
+
+    def build_search_index(self):
+        """Index the cached catalog's tokens in the background"""
+        self.executor.submit(
+            'search_index', SearchIndex.from_catalog, self.catalog,
+            on_result=self.set_search_index, on_error=self.handle_catalog_error
+        )
+
+    def set_search_index(self, index):
+        self.search_index = index
+
+    def refresh_facets(self, search_query=None, search_mode='fulltext'):
+        """Update the genre counts and year histogram for a search in the background"""
+        self.executor.submit(
+            'facets', self.model.get_facets, search_query, search_mode, YEAR_BUCKET,
+            on_result=lambda facets: self.view.show_facets(facets, YEAR_BUCKET),
+            on_error=lambda error: logging.error(f"Error loading facets: {str(error)}")
+        )
+
+    def handle_catalog_change(self, action, book_id, data=None):
+        """Patch the catalog cache and search index with a write; only imports reload the catalog"""
+        if action == 'copies':
+            # Only the two counters change; text columns, facets and the index are untouched
+            if data is not None:
+                if self.catalog is not None:
+                    self.catalog.set_copy_counts(book_id, **data)
+                else:
+                    self.executor.cancel('catalog')
+                    self.refresh_catalog_cache()
+                self.show_copy_counts(book_id, data)
+            return
+        # Served from the facet cache, which the write has already patched
+        self.refresh_facets(self.current_filters.get('search_query'), self.current_filters.get('search_mode', 'fulltext'))
+        if action == 'import':
+            # Too many rows to patch in; reload the catalog and rebuild the index from it
+            self.catalog = None
+            self.search_index = None
+            self.executor.cancel('search_index')
+            self.refresh_catalog_cache()
+            return
+        if self.catalog is None:
+            # A catalog still loading may have been read before this write; load it again
+            self.executor.cancel('catalog')
+            self.refresh_catalog_cache()
+        elif action == 'delete':
+            self.catalog.remove(book_id)
+        elif data is not None:
+            self.catalog.upsert(data)
+        if self.search_index is None:
+            # An index still being built may predate this write; build it again from the patched catalog
+            self.executor.cancel('search_index')
+            if self.catalog is not None:
+                self.build_search_index()
+        elif action == 'delete':
+            self.search_index.remove(book_id)
+        elif data is not None:
+            self.search_index.add(book_id, data.title, data.author, data.isbn, data.genre)
+
+    def show_copy_counts(self, book_id, counts):
+        """Patch a book's copy counts into its table row after a copy write"""
+        book = self.view.table_model.row_for_id(book_id)
+        if book is not None:
+            self.view.table_model.update_row(CatalogRow(*book[:len(CatalogRow._fields)])._replace(**counts))
+
+    def show_written_book(self, book):
+        """Patch an added or edited book into the table instead of reloading it.
+
+        Scroll position and selection are kept; a book that no longer matches
+        the current filters is taken out, and a new one is inserted where the
+        current sort puts it unless that is beyond the pages loaded so far.
+        """
+        model = self.view.table_model
+        if not self.matches_current_filters(book):
+            model.remove_row(book.book_id)
+        elif not model.update_row(book):
+            position = self.insert_position(book)
+            all_loaded = self.next_cursor is None and not model.has_more
+            if position < model.rowCount() or all_loaded:
+                model.insert_row(book, position)
+
+    def matches_current_filters(self, book):
+        filters = self.current_filters
+        if not self.passes_genre_and_year(book):
+            return False
+        if filters.get('search_query'):
+            return matches(filters['search_query'], book.title, book.author, book.isbn, book.genre)
+        return True
+
+    def passes_genre_and_year(self, book):
+        filters = self.current_filters
+        if filters.get('genre') and book.genre != filters['genre']:
+            return False
+        if filters.get('year_min') and not (book.publication_year and book.publication_year >= filters['year_min']):
+            return False
+        if filters.get('year_max') and not (book.publication_year and book.publication_year <= filters['year_max']):
+            return False
+        return True
+
+    def insert_position(self, book):
+        """Where a book belongs among the loaded rows under the current sort; relevance sorts append"""
+        column = self.current_sort_column
+        if column not in SORT_KEYS or column == 'relevance':
+            return self.view.table_model.rowCount()
+        default = SORT_KEYS[column][1]
+
+        def sort_key(row):
+            value = getattr(row, column)
+            value = default if value is None else value
+            return (value.casefold() if isinstance(value, str) else value, row.book_id)
+
+        return self.view.table_model.sorted_position(book, sort_key, self.current_sort_order == 'DESC')
+
+    def handle_catalog_error(self, error):
+        # Sorting and filtering keep going through the database
+        logging.error(f"Error loading catalog cache: {str(error)}")
+
+    def handle_load_error(self, error):
+        logging.error(f"Error loading books: {str(error)}")
+        self.view.show_error(str(error))
 
     def show_add_book_dialog(self):
         dialog, fields = self.view.show_book_dialog()
@@ -93,8 +264,7 @@ class BookController(QObject):
                 return
                 
             try:
-                self.model.add_book(book_data)
-                self.load_books()
+                self.show_written_book(self.model.add_book(book_data))
                 dialog.accept()
             except ValueError as e:
                 logging.error(f"Error adding book: {str(e)}")
@@ -114,18 +284,21 @@ class BookController(QObject):
         if not selected_rows:
             self.view.show_error("Please select a book to edit")
             return
-        book_id = self.view.table.item(selected_rows[0].row(), 0).text()
-        self.edit_book_row(book_id, selected_rows[0].row())
+        book_id = self.view.table_model.row_at(selected_rows[0].row())[0]
+        self.edit_book_row(book_id)
 
-    def edit_book_row(self, book_id, row):
+    def edit_book_row(self, book_id):
+        book = self.view.table_model.row_for_id(book_id)
+        if book is None:
+            return
         book_data = {
-            'title': self.view.table.item(row, 1).text() or '',
-            'author': self.view.table.item(row, 2).text() or '',
-            'isbn': self.view.table.item(row, 3).text() or '',
-            'publication_year': int(self.view.table.item(row, 4).text()) if self.view.table.item(row, 4) and self.view.table.item(row, 4).text() else 0,
-            'publisher': self.view.table.item(row, 5).text() or '',
-            'pages': int(self.view.table.item(row, 6).text()) if self.view.table.item(row, 6) and self.view.table.item(row, 6).text() else 0,
-            'genre': self.view.table.item(row, 7).text() or '',
+            'title': book.title or '',
+            'author': book.author or '',
+            'isbn': book.isbn or '',
+            'publication_year': book.publication_year or 0,
+            'publisher': book.publisher or '',
+            'pages': book.pages or 0,
+            'genre': book.genre or '',
             'subtitle': '',
             'language': 'English',
             'description': ''
@@ -153,8 +326,9 @@ class BookController(QObject):
                 return
                 
             try:
-                self.model.update_book(int(book_id), updated_data)
-                self.load_books()
+                book = self.model.update_book(int(book_id), updated_data)
+                if book is not None:
+                    self.show_written_book(book)
                 dialog.accept()
             except ValueError as e:
                 logging.error(f"Error updating book: {str(e)}")
@@ -174,10 +348,10 @@ class BookController(QObject):
         if not selected_rows:
             self.view.show_error("Please select a book to delete")
             return
-        book_id = self.view.table.item(selected_rows[0].row(), 0).text()
-        self.delete_book_row(book_id, selected_rows[0].row())
+        book_id = self.view.table_model.row_at(selected_rows[0].row())[0]
+        self.delete_book_row(book_id)
 
-    def delete_book_row(self, book_id, row):
+    def delete_book_row(self, book_id):
         reply = QMessageBox.question(
             self.view, 
             'Confirm Delete', 
@@ -189,62 +363,193 @@ class BookController(QObject):
         if reply == QMessageBox.Yes:
             try:
                 self.model.delete_book(int(book_id))
-                self.load_books()
+                self.view.table_model.remove_row(book_id)
             except ValueError as e:
                 logging.error(f"Error deleting book: {str(e)}")
                 self.view.show_error(str(e))
 
     def search_books(self):
         search_query = self.view.search_input.text().strip()
-        genre = self.view.genre_filter.currentText()
-        genre = None if genre == 'All' else genre
+        genre = self.view.selected_genre()
+        year_min = self.view.year_min.value()
+        year_max = self.view.year_max.value()
+        if search_query:
+            # New searches are ranked by relevance until a header is clicked
+            self.current_sort_column = 'relevance'
+            self.current_sort_order = 'DESC'
+            self.update_sort_headers(None)
+        if search_query and self.model.looks_like_code(search_query):
+            # Scanned ISBNs and barcodes try an indexed equality lookup before the text search
+            self.lookup_code(search_query, genre, year_min, year_max)
+        else:
+            self.load_books(search_query, genre, year_min, year_max, self.search_mode())
+        self.refresh_facets(search_query, self.search_mode())
+
+    def lookup_code(self, code, genre, year_min, year_max):
+        """Show the books an ISBN or barcode identifies, falling back to a text search on no match"""
+        self.current_filters = {
+            'search_query': code,
+            'genre': genre,
+            'year_min': year_min,
+            'year_max': year_max,
+            'search_mode': self.search_mode()
+        }
+        self.next_cursor = None
+        self.view.table_model.has_more = False
+
+        def show_matches(books):
+            if books:
+                # The code identifies the books; the genre and year filters still narrow them
+                self.view.show_books([book for book in books if self.passes_genre_and_year(book)])
+            else:
+                self.load_books(code, genre, year_min, year_max, self.search_mode())
+
+        self.executor.submit(
+            'books', self.model.lookup_exact, code,
+            on_result=show_matches, on_error=self.handle_load_error
+        )
+
+    def search_as_you_type(self, text):
+        """Filter the table from the local index on every keystroke.
+
+        Matches are found the way Enter's full-text search finds them. Fuzzy
+        searches have no local equivalent, so in fuzzy mode, and until the
+        catalog and index are loaded, nothing happens here and Enter runs the
+        server search.
+        """
+        if self.catalog is None or self.search_index is None or self.search_mode() == 'fuzzy':
+            return
+        search_query = text.strip()
+        genre = self.view.selected_genre()
         year_min = self.view.year_min.value()
         year_max = self.view.year_max.value()
-        self.load_books(search_query, genre, year_min, year_max)
+        if not search_query:
+            self.load_books(None, genre, year_min, year_max, self.search_mode())
+            return
+        if self.current_sort_column == 'relevance':
+            # The local index has no ranking
+            self.current_sort_column = 'title'
+            self.current_sort_order = 'ASC'
+            self.update_sort_headers(None)
+        self.current_filters = {
+            'search_query': search_query,
+            'genre': genre,
+            'year_min': year_min,
+            'year_max': year_max,
+            'search_mode': self.search_mode()
+        }
+        self.next_cursor = None
+        self.view.table_model.has_more = False
+        self.show_cached_books(genre, year_min, year_max, self.search_index.search(search_query))
+
+    def search_mode(self):
+        return 'fuzzy' if self.view.fuzzy_toggle.isChecked() else 'fulltext'
+
+    def handle_fuzzy_toggled(self, checked):
+        if self.view.search_input.text().strip():
+            self.search_books()
 
     def clear_search(self):
         self.view.search_input.clear()
-        self.view.genre_filter.setCurrentText('All')
+        self.view.genre_filter.setCurrentIndex(0)
         self.view.year_min.setValue(1000)
         self.view.year_max.setValue(datetime.now().year + 1)
         self.load_books()
+        self.refresh_facets()
 
     def import_books(self):
+        """Import a CSV file of books in the background behind a progress dialog"""
         file_name, _ = QFileDialog.getOpenFileName(self.view, "Import Books", "", "CSV Files (*.csv)")
-        if file_name:
-            try:
-                with open(file_name, 'r', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    expected_fields = ['title', 'subtitle', 'author', 'isbn', 'publication_year', 'publisher', 'pages', 'language', 'genre', 'description']
-                    if not all(field in expected_fields for field in reader.fieldnames):
-                        self.view.show_error("CSV must contain valid book fields")
-                        return
-                    for row in reader:
-                        book_data = {key: row.get(key, '') for key in expected_fields}
-                        book_data['publication_year'] = int(book_data['publication_year']) if book_data['publication_year'] else 0
-                        book_data['pages'] = int(book_data['pages']) if book_data['pages'] else 0
-                        errors = self.model.validate_book_data(book_data)
-                        if not errors:
-                            self.model.add_book(book_data)
-                        else:
-                            logging.error(f"Error importing book {row.get('title', '')}: {', '.join(errors)}")
-                            self.view.show_error(f"Error importing book {row.get('title', '')}: {', '.join(errors)}")
-                self.load_books()
-            except Exception as e:
-                logging.error(f"Error importing books: {str(e)}")
-                self.view.show_error(f"Error importing books: {str(e)}")
+        if not file_name:
+            return
+        duplicates = self.view.ask_duplicate_policy()
+        if duplicates is None:
+            return
+        progress = self.view.show_import_progress()
+        last = []
+        def show_progress(update):
+            last[:] = [update]
+            progress.setMaximum(update.total)
+            progress.setValue(update.processed)
+            progress.setLabelText(f"{update.imported} imported, {update.updated} updated, {update.skipped} skipped, "
+                                  f"{update.rejected} rejected ({update.rows_per_second:.0f} rows/s)")
+        def cancel():
+            # Batches committed so far stay imported
+            self.executor.cancel('import')
+            self.finish_import(progress, last[0] if last else None, cancelled=True)
+        progress.canceled.connect(cancel)
+        self.executor.submit_stream(
+            'import', BookImportEngine(self.model, duplicates=duplicates).iter_import, file_name,
+            on_chunk=show_progress,
+            on_result=lambda _: self.finish_import(progress, last[0] if last else None),
+            on_error=lambda error: self.handle_import_error(progress, error)
+        )
+
+    def finish_import(self, progress, summary, cancelled=False):
+        progress.canceled.disconnect()
+        progress.close()
+        if summary is not None and (summary.imported or summary.updated):
+            # Listeners run here, on the GUI thread, not on the import worker
+            self.model.invalidate_all()
+            self.load_books(**self.current_filters)
+        if summary is None:
+            return
+        message = (f"{'Import cancelled' if cancelled else 'Import finished'}: "
+                   f"{summary.imported} books imported, {summary.updated} updated, {summary.skipped} duplicates skipped, "
+                   f"{summary.rejected} rejected in {summary.seconds:.1f}s ({summary.rows_per_second:.0f} rows/s).")
+        if summary.errors_path:
+            message += f"\n\nRejected and skipped rows, with reasons, were written to {summary.errors_path}"
+        self.view.show_success(message)
+
+    def handle_import_error(self, progress, error):
+        progress.canceled.disconnect()
+        progress.close()
+        logging.error(f"Error importing books: {str(error)}")
+        self.view.show_error(f"Error importing books: {str(error)}")
+        # Batches committed before the error are in the database
+        self.model.invalidate_all()
+        self.load_books(**self.current_filters)
+
+    def export_books(self):
+        """Export the books matching the current filters, or their copies, in the background"""
+        target = self.view.ask_export_target()
+        if target is None:
+            return
+        path, fmt = self.exporter.choose_file("Export Books", target)
+        if not path:
+            return
+        if target == 'copies':
+            self.exporter.export("📤 Exporting Copies", self.model.iter_copies(**self.current_filters),
+                                 [column.strip() for column in COPY_COLUMNS.split(',')], path, fmt)
+        else:
+            columns = CatalogRow._fields
+            # Searches add a relevance column after the catalog columns
+            self.exporter.export("📤 Exporting Books", self.model.iter_books(
+                sort_by=self.current_sort_column, sort_order=self.current_sort_order, **self.current_filters
+            ), columns, path, fmt, convert=lambda row: tuple(row[:len(columns)]))
 
     def sort_table(self, column):
-        columns = ['book_id', 'title', 'author', 'isbn', 'publication_year', 'publisher', 'pages', 'genre']
-        # Prevent sorting on Copies (8) or Actions (9) columns
+        columns = ['book_id', 'title', 'author', 'isbn', 'publication_year', 'publisher', 'pages', 'genre', 'copy_count']
+        # Prevent sorting on Actions (9) column
         if column < 0 or column >= len(columns):
             return
         
         selected_column = columns[column]
         self.current_sort_order = 'DESC' if self.current_sort_column == selected_column and self.current_sort_order == 'ASC' else 'ASC'
         self.current_sort_column = selected_column
+        self.update_sort_headers(column)
         
-        # Update header labels to show sort direction
+        # Reload books with new sorting
+        self.load_books(
+            search_query=self.view.search_input.text().strip(),
+            genre=self.view.selected_genre(),
+            year_min=self.view.year_min.value(),
+            year_max=self.view.year_max.value(),
+            search_mode=self.search_mode()
+        )
+
+    def update_sort_headers(self, column):
+        """Update header labels to show sort direction on the sorted column, if any"""
         header_labels = ["ID", "Title", "Author", "ISBN", "Year", "Publisher", "Pages", "Genre", "Copies", "Actions"]
         for i, label in enumerate(header_labels):
             if i == column:
@@ -252,12 +557,4 @@ class BookController(QObject):
                 header_labels[i] = f"{label}{arrow}"
             else:
                 header_labels[i] = label  # Reset other headers
-        self.view.table.setHorizontalHeaderLabels(header_labels)
-        
-        # Reload books with new sorting
-        self.load_books(
-            search_query=self.view.search_input.text().strip(),
-            genre=None if self.view.genre_filter.currentText() == 'All' else self.view.genre_filter.currentText(),
-            year_min=self.view.year_min.value(),
-            year_max=self.view.year_max.value()
-        )
\ No newline at end of file
+        self.view.table_model.set_header_labels(header_labels)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from PyQt5.QtCore import QObject, QDate, Qt
-from PyQt5.QtWidgets import QMessageBox, QTableWidgetItem
-from sqlalchemy import text
+from PyQt5.QtWidgets import QMessageBox
+from db.unit_of_work import UnitOfWork
 
 class CopyController(QObject):
     def __init__(self, copy_model, view, book_controller):
@@ -8,20 +8,19 @@ class CopyController(QObject):
         self.copy_model = copy_model
         self.view = view
         self.book_controller = book_controller
-        self.book_model = book_controller.model  # Access BookModel for title lookup
+        # Copy writes change the cached copy counts
+        self.copy_model.add_change_listener(book_controller.handle_catalog_change)
 
     def show_book_copies_dialog(self, book_id, row=None):
-        # Retrieve book title from database to ensure accuracy
+        # Retrieve book title from database to ensure accuracy; the title and
+        # the copies are read on one connection
+        book_title, copies = "Unknown Title", []
         try:
-            session = self.book_model.session_pool.get_session()
-            query = text("SELECT title FROM books WHERE book_id = :book_id AND is_active = true")
-            result = session.execute(query, {'book_id': book_id}).scalar()
-            book_title = result if result else "Unknown Title"
+            with UnitOfWork(self.copy_model.session_pool) as uow:
+                book_title = self.copy_model.get_book_title(book_id, uow) or book_title
+                copies = self.copy_model.get_book_copies(book_id, uow)
         except Exception as e:
-            self.view.show_error(f"Error retrieving book title: {str(e)}")
-            book_title = "Unknown Title"
-        finally:
-            self.book_model.session_pool.close_session(session)
+            self.view.show_error(f"Error loading book copies: {str(e)}")
 
         dialog, fields = self.view.show_book_copies_dialog(book_id, book_title)
         
@@ -37,12 +36,8 @@ class CopyController(QObject):
                 pass
 
         def load_copies():
-            try:
-                copies = self.copy_model.get_book_copies(book_id)
-                self.view.show_copies(copies)  # Use show_copies from view
-                self.view.copies_table.resizeColumnsToContents()
-            except Exception as e:
-                self.view.show_error(f"Error loading book copies: {str(e)}")
+            self.view.show_copies(copies)  # Use show_copies from view
+            self.view.copies_table.resizeColumnsToContents()
         
         def add_copy():
             copy_dialog, copy_fields = self.view.show_book_copy_dialog(book_id)
@@ -61,9 +56,10 @@ class CopyController(QObject):
                     return
                 
                 try:
-                    self.copy_model.add_book_copy(book_id, copy_data)
-                    load_copies()
-                    self.book_controller.load_books()  # Refresh main table for copy count
+                    # The book's copy count is patched through the copy model's change listener
+                    copy = self.copy_model.add_book_copy(book_id, copy_data)
+                    copies_model = self.view.copies_model
+                    copies_model.insert_row(copy, copies_model.sorted_position(copy, lambda row: row.copy_number or ''))
                     copy_dialog.accept()
                 except ValueError as e:
                     self.view.show_error(str(e))
@@ -78,17 +74,17 @@ class CopyController(QObject):
                 self.view.show_error("Please select a copy to edit")
                 return
                 
-            row_idx = selected_rows[0].row()
-            copy_id = self.view.copies_table.item(row_idx, 0).text()
+            copy = self.view.copies_model.row_at(selected_rows[0].row())
+            copy_id = copy.copy_id
             try:
                 copy_data = {
-                    'copy_number': self.view.copies_table.item(row_idx, 1).text() or '',
+                    'copy_number': copy.copy_number or '',
                     'acquisition_date': QDate.fromString(
-                        self.view.copies_table.item(row_idx, 2).text() or QDate.currentDate().toString('yyyy-MM-dd'), 
+                        str(copy.acquisition_date or QDate.currentDate().toString('yyyy-MM-dd')), 
                         'yyyy-MM-dd'
                     ),
-                    'current_condition': self.view.copies_table.item(row_idx, 3).text() or 'excellent',
-                    'status': self.view.copies_table.item(row_idx, 4).text() or 'available'
+                    'current_condition': copy.current_condition or 'excellent',
+                    'status': copy.status or 'available'
                 }
             except ValueError:
                 self.view.show_error("Invalid data in selected copy")
@@ -110,9 +106,9 @@ class CopyController(QObject):
                     return
                 
                 try:
-                    self.copy_model.update_book_copy(int(copy_id), updated_data)
-                    load_copies()
-                    self.book_controller.load_books()
+                    copy = self.copy_model.update_book_copy(int(copy_id), updated_data)
+                    if copy is not None:
+                        self.view.copies_model.update_row(copy)
                     copy_dialog.accept()
                 except ValueError as e:
                     self.view.show_error(str(e))
@@ -137,11 +133,9 @@ class CopyController(QObject):
             
             if reply == QMessageBox.Yes:
                 try:
-                    row_idx = selected_rows[0].row()
-                    copy_id = int(self.view.copies_table.item(row_idx, 0).text())
+                    copy_id = self.view.copies_model.row_at(selected_rows[0].row()).copy_id
                     self.copy_model.delete_book_copy(copy_id)
-                    load_copies()
-                    self.book_controller.load_books()
+                    self.view.copies_model.remove_row(copy_id)
                 except ValueError as e:
                     self.view.show_error(str(e))
         
@@ -0,0 +1,69 @@
+import logging
+import os
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QFileDialog, QProgressDialog
+from models.export_engine import ExportEngine
+
+FILE_FILTERS = {
+    "CSV Files (*.csv)": 'csv',
+    "JSON Lines (*.jsonl)": 'jsonl',
+    "Parquet Files (*.parquet)": 'parquet',
+}
+
+class ExportController:
+    """Runs exports for a tab in the background behind a progress dialog.
+
+    The view must provide show_error and show_success. One export runs at a
+    time per tab; its channel is cancelled by the dialog's Cancel button.
+    """
+    def __init__(self, view, executor, channel):
+        self.view = view
+        self.executor = executor
+        self.channel = channel
+
+    def choose_file(self, title, default_name):
+        """Ask for a target file; returns (path, format) or (None, None)"""
+        path, selected = QFileDialog.getSaveFileName(self.view, title, default_name, ";;".join(FILE_FILTERS))
+        if not path:
+            return None, None
+        fmt = FILE_FILTERS.get(selected, 'csv')
+        if not os.path.splitext(path)[1]:
+            path += f".{fmt}"
+        return path, fmt
+
+    def export(self, title, chunks, columns, path, fmt, convert=None):
+        """Write the chunks of a streaming query (not yet started) to path"""
+        progress = QProgressDialog("Starting export...", "Cancel", 0, 0, self.view)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setObjectName("exportProgressDialog")
+        progress.show()
+
+        def show_progress(update):
+            progress.setLabelText(f"{update.rows} rows, {update.bytes / 1e6:.1f} MB "
+                                  f"({update.megabytes_per_second:.1f} MB/s)")
+            if update.done:
+                self.finish(progress)
+                self.view.show_success(f"Exported {update.rows} rows ({update.bytes / 1e6:.1f} MB) to {update.path} "
+                                       f"in {update.seconds:.1f}s ({update.megabytes_per_second:.1f} MB/s).")
+
+        def cancel():
+            # The worker stops after its current chunk and removes the partial file
+            self.executor.cancel(self.channel)
+            self.finish(progress)
+
+        def fail(error):
+            self.finish(progress)
+            logging.error(f"Error exporting to {path}: {str(error)}")
+            self.view.show_error(f"Error exporting: {str(error)}")
+
+        progress.canceled.connect(cancel)
+        self.executor.submit_stream(
+            self.channel, ExportEngine(columns, fmt, convert).iter_export, chunks, path,
+            on_chunk=show_progress, on_error=fail
+        )
+
+    def finish(self, progress):
+        progress.canceled.disconnect()
+        progress.close()
@@ -1,16 +1,32 @@
 import logging
-from PyQt5.QtWidgets import QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QMessageBox, QFileDialog
 from datetime import datetime
-from models.member_model import MemberModel
-from views.member_management_view import MemberManagementView, StyledToolButton
+from db.unit_of_work import UnitOfWork
+from models.member_model import MemberModel, MEMBER_SORT_KEYS, MEMBER_EXPORT_COLUMNS, member_export_row
+from models.import_engine import MemberImportEngine
+from models.member_search import matches_search
+from views.member_management_view import MemberManagementView
+from controllers.action_dispatcher import ActionDispatcher
+from controllers.export_controller import ExportController
 
 logger = logging.getLogger(__name__)
 
+# Table column -> get_members_page sort key; Name sorts by last name
+MEMBER_SORT_COLUMNS = ['member_id', 'member_number', 'last_name', 'email', 'phone', 'membership_status',
+                       'membership_date', 'membership_expiry', 'active_loans', 'total_outstanding_fines',
+                       'last_activity']
+
 class MemberController:
-    def __init__(self, session_pool):
+    def __init__(self, session_pool, executor):
+        self.session_pool = session_pool
         self.model = MemberModel(session_pool)
+        self.executor = executor
         self.view = MemberManagementView()
+        self.actions = ActionDispatcher()
+        self.exporter = ExportController(self.view, executor, 'member_export')
+        self.current_sort_column = 'last_name'
+        self.current_sort_order = 'ASC'
+        self.next_cursor = None
         self.connect_signals()
         
     def connect_signals(self):
@@ -18,6 +34,7 @@ class MemberController:
         # Search and filter signals
         self.view.search_button.clicked.connect(self.handle_search)
         self.view.clear_search_button.clicked.connect(self.clear_search)
+        self.view.cancel_load_button.clicked.connect(self.cancel_loading)
         self.view.search_input.returnPressed.connect(self.handle_search)
         self.view.membership_status_filter.currentTextChanged.connect(self.handle_search)
         self.view.membership_type_filter.currentTextChanged.connect(self.handle_search)
@@ -28,67 +45,103 @@ class MemberController:
         self.view.delete_button.clicked.connect(self.handle_delete_member)
         self.view.renew_button.clicked.connect(self.show_renewal_dialog)
         self.view.import_button.clicked.connect(self.handle_import_members)
+        self.view.export_button.clicked.connect(self.handle_export_members)
         
         # Table selection signal
         self.view.table.selectionModel().selectionChanged.connect(self.update_button_states)
         
+        # Sorting and paging run in the database
+        self.view.table.horizontalHeader().sectionClicked.connect(self.sort_table)
+        self.view.table_model.fetch_more_requested.connect(self.load_more_members)
+        self.update_sort_headers(MEMBER_SORT_COLUMNS.index(self.current_sort_column))
+        
+        # Row action buttons go through one dispatcher, wired once
+        self.actions.register('edit', self.show_edit_member_dialog)
+        self.actions.register('delete', self.handle_delete_member)
+        self.actions.register('renew', self.show_renewal_dialog)
+        self.actions.register('view', self.show_member_loans_dialog)
+        self.view.action_delegate.action_triggered.connect(self.actions.dispatch)
+        
         # Initial load
         self.refresh_members()
         
-    def connect_action_buttons(self, row_idx):
-        """Connect signals for action buttons in a table row"""
-        widget = self.view.table.cellWidget(row_idx, 11)
-        if widget:
-            edit_btn = widget.findChild(StyledToolButton, property_filter={'button_type': 'edit'})
-            delete_btn = widget.findChild(StyledToolButton, property_filter={'button_type': 'delete'})
-            renew_btn = widget.findChild(StyledToolButton, property_filter={'button_type': 'renew'})
-            view_loans_btn = widget.findChild(StyledToolButton, property_filter={'button_type': 'view'})
-            
-            if edit_btn:
-                edit_btn.clicked.connect(lambda: self.show_edit_member_dialog(edit_btn.property('member_id')))
-            if delete_btn:
-                delete_btn.clicked.connect(lambda: self.handle_delete_member(delete_btn.property('member_id')))
-            if renew_btn:
-                renew_btn.clicked.connect(lambda: self.show_renewal_dialog(renew_btn.property('member_id')))
-            if view_loans_btn:
-                view_loans_btn.clicked.connect(lambda: self.show_member_loans_dialog(view_loans_btn.property('member_id')))
-    
-    def disconnect_action_buttons(self, row_idx):
-        """Disconnect signals for action buttons in a table row"""
-        widget = self.view.table.cellWidget(row_idx, 11)
-        if widget:
-            for btn in widget.findChildren(StyledToolButton):
-                try:
-                    btn.clicked.disconnect()
-                except:
-                    pass
-    
     def refresh_members(self):
-        """Refresh member table with current filters"""
-        try:
-            search_query = self.view.search_input.text().strip()
-            status = self.view.membership_status_filter.currentText()
-            membership_type = self.view.membership_type_filter.currentText()
-            
-            status = None if status == 'All' else status.lower()
-            membership_type = None if membership_type == 'All' else membership_type.lower()
-            
-            members = self.model.get_members(
-                search_query=search_query or None,
-                status=status,
-                membership_type=membership_type
-            )
-            
-            self.view.show_members(members)
-            
-            # Reconnect action buttons for all rows
-            for row in range(self.view.table.rowCount()):
-                self.disconnect_action_buttons(row)
-                self.connect_action_buttons(row)
-                
-        except Exception as e:
-            logger.error(f"Error refreshing members: {str(e)}")
-            self.view.show_error(f"Failed to load members: {str(e)}")
+        """Reset the page cursor and query the first page of members in the background.
+
+        Later pages are fetched as the table scrolls; a newer refresh (e.g.
+        several filter changes in a row) or Cancel drops the pending page.
+        """
+        # Pages of the previous result must not be requested any more
+        self.next_cursor = None
+        self.view.table_model.has_more = False
+        self.view.begin_members_load()
+        self.executor.submit(
+            'members', self.model.get_members_page,
+            sort_by=self.current_sort_column, sort_order=self.current_sort_order,
+            **self.current_filters(),
+            on_result=self.show_first_page, on_error=self.handle_load_error
+        )
+
+    def show_first_page(self, page):
+        members, self.next_cursor = page
+        self.view.show_members(members, has_more=self.next_cursor is not None)
+
+    def load_more_members(self):
+        """Query the page after the current cursor in the background"""
+        if self.next_cursor is None:
+            return
+        cursor, self.next_cursor = self.next_cursor, None
+        self.view.begin_members_load()
+        self.executor.submit(
+            'members', self.model.get_members_page,
+            sort_by=self.current_sort_column, sort_order=self.current_sort_order,
+            after=cursor, **self.current_filters(),
+            on_result=self.append_page, on_error=self.handle_load_error
+        )
+
+    def append_page(self, page):
+        members, self.next_cursor = page
+        self.view.append_members(members, has_more=self.next_cursor is not None)
+
+    def sort_table(self, column):
+        # Prevent sorting on Actions (11) column
+        if column < 0 or column >= len(MEMBER_SORT_COLUMNS):
+            return
+        selected_column = MEMBER_SORT_COLUMNS[column]
+        self.current_sort_order = 'DESC' if self.current_sort_column == selected_column and self.current_sort_order == 'ASC' else 'ASC'
+        self.current_sort_column = selected_column
+        self.update_sort_headers(column)
+        self.refresh_members()
+
+    def update_sort_headers(self, column):
+        """Show the sort direction on the sorted column's header"""
+        header_labels = list(self.view.table_model.headers)
+        arrow = " ↑" if self.current_sort_order == 'ASC' else " ↓"
+        header_labels[column] += arrow
+        self.view.table_model.set_header_labels(header_labels)
+
+    def current_filters(self):
+        """Search and filter values as get_members_page and iter_members take them"""
+        search_query = self.view.search_input.text().strip()
+        status = self.view.membership_status_filter.currentText()
+        membership_type = self.view.membership_type_filter.currentText()
+        return {
+            'search_query': search_query or None,
+            'status': None if status == 'All' else status.lower(),
+            'membership_type': None if membership_type == 'All' else membership_type.lower(),
+        }
+
+    def cancel_loading(self):
+        """Drop the page being loaded; the rows already shown stay and scrolling fetches no more"""
+        self.executor.cancel('members')
+        self.next_cursor = None
+        self.view.table_model.has_more = False
+        self.view.finish_members_load()
+
+    def handle_load_error(self, error):
+        self.view.finish_members_load()
+        logger.error(f"Error refreshing members: {str(error)}")
+        self.view.show_error(f"Failed to load members: {str(error)}")
     
     def handle_search(self):
         """Handle search button click"""
@@ -101,18 +154,59 @@ class MemberController:
         self.view.membership_type_filter.setCurrentText('All')
         self.refresh_members()
     
+    def show_written_member(self, member):
+        """Patch an added or edited member row into the table instead of reloading it.
+
+        Scroll position and selection are kept; a new member is inserted where
+        the current sort puts it unless that is beyond the pages loaded so far.
+        """
+        model = self.view.table_model
+        if not self.matches_current_filters(member):
+            model.remove_row(member[0])
+        elif not model.update_row(member):
+            position = self.insert_position(member)
+            all_loaded = self.next_cursor is None and not model.has_more
+            if position < model.rowCount() or all_loaded:
+                model.insert_row(member, position)
+
+    def insert_position(self, member):
+        """Where a member row belongs among the loaded rows under the current sort"""
+        column = self.current_sort_column
+        default = MEMBER_SORT_KEYS[column][1]
+        index = MEMBER_SORT_COLUMNS.index(column)
+
+        def sort_key(row):
+            # Name cells are (first, last) and sort by last name
+            value = row[index][1] if index == 2 else row[index]
+            value = default if value is None else value
+            return (value.casefold() if isinstance(value, str) else value, row[0])
+
+        return self.view.table_model.sorted_position(member, sort_key, self.current_sort_order == 'DESC')
+
+    def matches_current_filters(self, member):
+        """Whether a member row passes the search and status filters, as get_members applies them"""
+        status = self.view.membership_status_filter.currentText()
+        if status != 'All' and (member[5] or '').lower() != status.lower():
+            return False
+        search_query = self.view.search_input.text().strip()
+        if search_query:
+            first_name, last_name = member[2]
+            return matches_search(search_query, first_name, last_name, member[3], member[1], member[4])
+        return True
+
     def show_add_member_dialog(self):
         """Show dialog for adding new member"""
         dialog, fields = self.view.show_member_dialog()
         
         def handle_save():
             try:
-                member_data = self.validate_member_form(fields)
-                if member_data:
-                    new_member_id = self.model.add_member(member_data)
-                    self.view.show_success("Member added successfully!")
-                    self.refresh_members()
-                    dialog.accept()
+                # The uniqueness checks and the insert run in one transaction
+                with UnitOfWork(self.session_pool) as uow:
+                    member_data = self.validate_member_form(fields, uow=uow)
+                    new_member = self.model.add_member(member_data, uow=uow)
+                self.view.show_success("Member added successfully!")
+                self.show_written_member(new_member)
+                dialog.accept()
             except ValueError as e:
                 self.view.show_error(str(e))
             except Exception as e:
@@ -130,7 +224,7 @@ class MemberController:
             if not selected_rows:
                 self.view.show_error("Please select a member to edit")
                 return
-            member_id = self.view.table.item(selected_rows[0].row(), 0).text()
+            member_id = self.view.table_model.row_at(selected_rows[0].row())[0]
         
         try:
             member_data = self.model.get_member_by_id(member_id)
@@ -142,12 +236,13 @@ class MemberController:
             
             def handle_save():
                 try:
-                    updated_data = self.validate_member_form(fields)
-                    if updated_data:
-                        self.model.update_member(member_id, updated_data)
-                        self.view.show_success("Member updated successfully!")
-                        self.refresh_members()
-                        dialog.accept()
+                    with UnitOfWork(self.session_pool) as uow:
+                        updated_data = self.validate_member_form(fields, member_id, uow)
+                        member = self.model.update_member(member_id, updated_data, uow=uow)
+                    self.view.show_success("Member updated successfully!")
+                    if member is not None:
+                        self.show_written_member(member)
+                    dialog.accept()
                 except ValueError as e:
                     self.view.show_error(str(e))
                 except Exception as e:
@@ -169,7 +264,7 @@ class MemberController:
             if not selected_rows:
                 self.view.show_error("Please select a member to delete")
                 return
-            member_id = self.view.table.item(selected_rows[0].row(), 0).text()
+            member_id = self.view.table_model.row_at(selected_rows[0].row())[0]
         
         try:
             member_data = self.model.get_member_by_id(member_id)
@@ -188,7 +283,7 @@ class MemberController:
             if reply == QMessageBox.Yes:
                 self.model.delete_member(member_id)
                 self.view.show_success("Member deleted successfully!")
-                self.refresh_members()
+                self.view.table_model.remove_row(member_id)
                 
         except ValueError as e:
             self.view.show_error(str(e))
@@ -203,7 +298,7 @@ class MemberController:
             if not selected_rows:
                 self.view.show_error("Please select a member to renew")
                 return
-            member_id = self.view.table.item(selected_rows[0].row(), 0).text()
+            member_id = self.view.table_model.row_at(selected_rows[0].row())[0]
         
         try:
             member_data = self.model.get_member_by_id(member_id)
@@ -220,9 +315,10 @@ class MemberController:
             def handle_renew():
                 try:
                     new_expiry = fields['new_expiry'].date().toString('yyyy-MM-dd')
-                    self.model.renew_membership(member_id, new_expiry)
+                    member = self.model.renew_membership(member_id, new_expiry)
                     self.view.show_success("Membership renewed successfully!")
-                    self.refresh_members()
+                    if member is not None:
+                        self.show_written_member(member)
                     dialog.accept()
                 except Exception as e:
                     logger.error(f"Error renewing membership: {str(e)}")
@@ -243,7 +339,7 @@ class MemberController:
             if not selected_rows:
                 self.view.show_error("Please select a member to view loans")
                 return
-            member_id = self.view.table.item(selected_rows[0].row(), 0).text()
+            member_id = self.view.table_model.row_at(selected_rows[0].row())[0]
         
         try:
             member_data = self.model.get_member_by_id(member_id)
@@ -251,25 +347,85 @@ class MemberController:
                 self.view.show_error("Member not found")
                 return
                 
-            loans = self.model.get_member_loans(member_id)
             dialog = self.view.show_member_loans_dialog(
                 member_id,
-                f"{member_data['first_name']} {member_data['last_name']}",
-                loans
+                f"{member_data['first_name']} {member_data['last_name']}"
+            )
+            self.executor.submit_stream(
+                'loans', self.model.iter_member_loans, member_id,
+                on_chunk=dialog.append_loans,
+                on_error=lambda error: self.view.show_error(f"Failed to load member loans: {str(error)}")
             )
             dialog.exec_()
+            # Closing the dialog stops a history that is still streaming
+            self.executor.cancel('loans')
             
         except Exception as e:
             logger.error(f"Error loading member loans: {str(e)}")
             self.view.show_error(f"Failed to load member loans: {str(e)}")
     
     def handle_import_members(self):
-        """Placeholder for import members functionality"""
-        self.view.show_error("Import functionality not implemented yet")
+        """Import a CSV file of members in the background behind a progress dialog"""
+        file_name, _ = QFileDialog.getOpenFileName(self.view, "Import Members", "", "CSV Files (*.csv)")
+        if not file_name:
+            return
+        progress = self.view.show_import_progress()
+        last = []
+        def show_progress(update):
+            last[:] = [update]
+            progress.setMaximum(update.total)
+            progress.setValue(update.processed)
+            progress.setLabelText(f"{update.imported} imported, {update.rejected} rejected "
+                                  f"({update.rows_per_second:.0f} rows/s)")
+        def cancel():
+            # Batches committed so far stay imported
+            self.executor.cancel('member_import')
+            self.finish_import(progress, last[0] if last else None, cancelled=True)
+        progress.canceled.connect(cancel)
+        self.executor.submit_stream(
+            'member_import', MemberImportEngine(self.model).iter_import, file_name,
+            on_chunk=show_progress,
+            on_result=lambda _: self.finish_import(progress, last[0] if last else None),
+            on_error=lambda error: self.handle_import_error(progress, error)
+        )
+
+    def finish_import(self, progress, summary, cancelled=False):
+        progress.canceled.disconnect()
+        progress.close()
+        if summary is None:
+            return
+        if summary.imported:
+            self.refresh_members()
+        message = (f"{'Import cancelled' if cancelled else 'Import finished'}: "
+                   f"{summary.imported} members imported, {summary.rejected} rejected "
+                   f"in {summary.seconds:.1f}s ({summary.rows_per_second:.0f} rows/s).")
+        if summary.errors_path:
+            message += f"\n\nRejected rows and reasons were written to {summary.errors_path}"
+        self.view.show_success(message)
+
+    def handle_import_error(self, progress, error):
+        progress.canceled.disconnect()
+        progress.close()
+        logger.error(f"Error importing members: {str(error)}")
+        self.view.show_error(f"Error importing members: {str(error)}")
+        # Batches committed before the error are in the database
+        self.refresh_members()
     
-    def validate_member_form(self, fields):
-        """Validate member form data"""
+    def handle_export_members(self):
+        """Export the members matching the current filters in the background"""
+        path, fmt = self.exporter.choose_file("Export Members", "members")
+        if path:
+            self.exporter.export(
+                "📤 Exporting Members", self.model.iter_members(
+                    sort_by=self.current_sort_column, sort_order=self.current_sort_order, **self.current_filters()
+                ),
+                MEMBER_EXPORT_COLUMNS, path, fmt, convert=member_export_row
+            )
+
+    def validate_member_form(self, fields, member_id=None, uow=None):
+        """Validate member form data; member_id is the member being edited"""
         member_data = {
+            'member_id': member_id,
             'member_number': fields['member_number'].text().strip(),
             'first_name': fields['first_name'].text().strip(),
             'last_name': fields['last_name'].text().strip(),
@@ -287,12 +443,12 @@ class MemberController:
             'member_notes': fields['member_notes'].toPlainText().strip()
         }
         
-        errors = self.model.validate_member_data(member_data)
+        errors = self.model.validate_member_data(member_data, uow=uow)
         if errors:
             raise ValueError("\n".join(errors))
             
         if not member_data['member_number']:
-            member_data['member_number'] = self.model.generate_unique_member_number()
+            member_data['member_number'] = self.model.generate_unique_member_number(uow=uow)
             
         return member_data
     
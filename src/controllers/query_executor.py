@@ -0,0 +1,121 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, object)
+    chunk = pyqtSignal(str, int, object)
+
+class _QueryTask(QRunnable):
+    """Runs one model call on a pool thread.
+
+    In streaming mode the call returns a generator of row chunks; each chunk is
+    sent as it arrives and the generator is closed as soon as the channel moves
+    on, which closes its cursor.
+    """
+    def __init__(self, executor, channel, generation, fn, args, kwargs, stream=False):
+        super().__init__()
+        self.executor = executor
+        self.channel = channel
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.stream = stream
+
+    def run(self):
+        # A newer request on the same channel was submitted while this one was queued
+        if not self.executor.is_current(self.channel, self.generation):
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+            if self.stream:
+                chunks, result = result, None
+                try:
+                    for chunk in chunks:
+                        if not self.executor.is_current(self.channel, self.generation):
+                            break
+                        self.executor.signals.chunk.emit(self.channel, self.generation, chunk)
+                finally:
+                    chunks.close()
+        except Exception as e:
+            self.executor.signals.failed.emit(self.channel, self.generation, e)
+        else:
+            self.executor.signals.finished.emit(self.channel, self.generation, result)
+        finally:
+            # Release this worker thread's scoped session and its connection
+            self.executor.session_pool.remove()
+
+class QueryExecutor(QObject):
+    """Runs model queries on a thread pool and hands results back to the GUI thread.
+
+    Requests are grouped in channels (e.g. 'books', 'members'). Each submit
+    bumps the channel's generation number; results from an older generation
+    are dropped before they reach the view, and queued ones never run.
+    """
+    def __init__(self, session_pool, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.session_pool = session_pool
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.generations = {}
+        self.callbacks = {}
+        # Created on the GUI thread, so emits from workers are queued back to it
+        self.signals = _TaskSignals()
+        self.signals.finished.connect(self._deliver_result)
+        self.signals.failed.connect(self._deliver_error)
+        self.signals.chunk.connect(self._deliver_chunk)
+
+    def submit(self, channel, fn, *args, on_result=None, on_error=None, **kwargs):
+        """Run fn(*args, **kwargs) in the background, superseding the channel's previous request"""
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        self.callbacks[channel] = (on_result, on_error, None)
+        self.pool.start(_QueryTask(self, channel, generation, fn, args, kwargs))
+        return generation
+
+    def submit_stream(self, channel, fn, *args, on_chunk=None, on_result=None, on_error=None, **kwargs):
+        """Like submit(), for a fn that yields chunks of rows.
+
+        on_chunk receives each chunk on the GUI thread and on_result(None) runs
+        once the stream is exhausted. cancel() stops the stream after the chunk
+        being read.
+        """
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        self.callbacks[channel] = (on_result, on_error, on_chunk)
+        self.pool.start(_QueryTask(self, channel, generation, fn, args, kwargs, stream=True))
+        return generation
+
+    def cancel(self, channel):
+        """Drop whatever result the channel is still waiting for"""
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+        self.callbacks.pop(channel, None)
+
+    def is_current(self, channel, generation):
+        return self.generations.get(channel) == generation
+
+    def _deliver_chunk(self, channel, generation, chunk):
+        if not self.is_current(channel, generation):
+            return
+        _, _, on_chunk = self.callbacks.get(channel, (None, None, None))
+        if on_chunk:
+            on_chunk(chunk)
+
+    def _deliver_result(self, channel, generation, result):
+        if not self.is_current(channel, generation):
+            return
+        on_result, _, _ = self.callbacks.pop(channel, (None, None, None))
+        if on_result:
+            on_result(result)
+
+    def _deliver_error(self, channel, generation, error):
+        if not self.is_current(channel, generation):
+            return
+        _, on_error, _ = self.callbacks.pop(channel, (None, None, None))
+        if on_error:
+            on_error(error)
+        else:
+            logger.error(f"Background query on '{channel}' failed: {str(error)}")
@@ -1,19 +1,40 @@
 import os
 import dotenv
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 
 class SessionPool:
-    def __init__(self):
-        dotenv.load_dotenv()
-        self.url = os.getenv("DATABASE_URL")
-        if not self.url:
-            raise ValueError("DATABASE_URL not found in environment variables")
-        self.engine = create_engine(self.url, pool_size=5, max_overflow=10)
-        self.Session = sessionmaker(bind=self.engine)
+    """Hands out sessions on one engine.
+
+    get_session() and calling the pool give a fresh session that belongs to
+    the caller, who closes it (close_session() or a with block). A model
+    method closing its own session therefore never touches a session its
+    caller on the same thread is still using. Only code that uses Session()
+    directly shares the thread's scoped session; the query executor releases
+    that with remove() after each task.
+    """
+    def __init__(self, engine=None):
+        if engine is None:
+            dotenv.load_dotenv()
+            self.url = os.getenv("DATABASE_URL")
+            if not self.url:
+                raise ValueError("DATABASE_URL not found in environment variables")
+            engine = create_engine(self.url, pool_size=5, max_overflow=10)
+        else:
+            self.url = str(engine.url)
+        self.engine = engine
+        # One scoped session per thread, so background queries never share a connection with the GUI thread
+        self.Session = scoped_session(sessionmaker(bind=self.engine))
+
+    def __call__(self):
+        return self.Session.session_factory()
 
     def get_session(self):
-        return self.Session()
+        return self.Session.session_factory()
 
     def close_session(self, session):
-        session.close()
\ No newline at end of file
+        session.close()
+
+    def remove(self):
+        """Discard the calling thread's session and return its connection to the pool"""
+        self.Session.remove()
@@ -0,0 +1,20 @@
+FIRST_CHUNK = 100  # About one screenful, so the table can paint before the rest arrives
+CHUNK_SIZE = 2000
+
+def stream_rows(session, query, params=None, convert=None, first_chunk=FIRST_CHUNK, chunk_size=CHUNK_SIZE):
+    """Yield lists of rows from a server-side cursor instead of one fetchall().
+
+    The first chunk is small so it arrives quickly; later chunks are larger.
+    Closing the generator early (e.g. on cancel) closes the cursor.
+    """
+    result = session.execute(query, params or {}, execution_options={'stream_results': True})
+    try:
+        size = first_chunk
+        while True:
+            rows = result.fetchmany(size)
+            if not rows:
+                break
+            yield [convert(row) for row in rows] if convert else rows
+            size = chunk_size
+    finally:
+        result.close()
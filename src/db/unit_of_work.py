@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+
+class UnitOfWork:
+    """One session and one transaction for everything a controller action does.
+
+    Open it once per action and pass it to the model methods that take uow=:
+    their validation reads and the write then share one connection and are
+    committed together when the block ends, or rolled back if it raises.
+
+        with UnitOfWork(session_pool) as uow:
+            errors = model.validate_member_data(member_data, uow=uow)
+            ...
+            model.add_member(member_data, uow=uow)
+
+    The session is a fresh one, like every session SessionPool hands out, so
+    a model method called without uow= inside the block cannot close it.
+    """
+    def __init__(self, session_pool):
+        self.session_pool = session_pool
+        self.session = None
+
+    def __enter__(self):
+        self.session = self.session_pool.get_session()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.session.commit()
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+            self.session = None
+        return False
+
+@contextmanager
+def session_scope(session_pool, uow=None):
+    """The unit of work's session if one is open, else a session of its own.
+
+    An own session is committed when the block ends and rolled back if it
+    raises; a unit of work's session is left for the unit of work to finish.
+    """
+    if uow is not None:
+        yield uow.session
+        return
+    with session_pool() as session:
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
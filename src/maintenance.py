@@ -0,0 +1,441 @@
+import argparse
+import csv
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+import tracemalloc
+from sqlalchemy import create_engine, event, text
+from db.session_pool import SessionPool
+from db.unit_of_work import UnitOfWork, session_scope
+from models.book_model import BookModel
+from models.copy_model import CopyModel, COPY_COLUMNS
+from models.member_model import MemberModel, MEMBER_EXPORT_COLUMNS, member_export_row
+from models.catalog_cache import CatalogCache, CatalogRow
+from models.search_index import SearchIndex
+from models.export_engine import ExportEngine, EXPORT_FORMATS
+from models.bulk_ingest import BulkIngest
+from models.import_engine import BookImportEngine, MemberImportEngine
+from models.validation import validation_pool
+
+logging.basicConfig(filename='library_management.log', level=logging.ERROR)
+
+def backfill_isbn13(session_pool, args):
+    updated = BookModel(session_pool).backfill_isbn13(batch_size=args.batch_size)
+    print(f"Normalized {updated} ISBNs")
+
+def backfill_member_keys(session_pool, args):
+    updated = MemberModel(session_pool).backfill_search_keys(batch_size=args.batch_size)
+    print(f"Filled search keys for {updated} members")
+
+def ingest(session_pool, args):
+    book_model = BookModel(session_pool)
+    ingest = BulkIngest(session_pool, book_model, CopyModel(session_pool), batch_size=args.batch_size)
+    if args.books:
+        report = ingest.ingest_books(args.books)
+        print(f"Books: {report.inserted} inserted, {report.updated} updated, {report.rejected} rejected "
+              f"of {report.rows} rows in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)")
+        if report.errors_path:
+            print(f"  rejected rows: {report.errors_path}")
+    if args.copies:
+        report = ingest.ingest_copies(args.copies)
+        print(f"Copies: {report.inserted} inserted, {report.rejected} rejected "
+              f"of {report.rows} rows in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)")
+        if report.errors_path:
+            print(f"  rejected rows: {report.errors_path}")
+
+def validate_file(engine, path):
+    """Validate every row of a CSV with engine (and its pool, if open); returns (records, invalid, seconds)"""
+    started = time.monotonic()
+    valid = invalid = 0
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        reader = engine.open_reader(file)
+        for batch in iter(lambda: engine.read_batch(reader), []):
+            records, failures = engine.validate_batch(batch)
+            valid += len(records)
+            invalid += len(failures)
+    return valid + invalid, invalid, time.monotonic() - started
+
+def validate_csv(session_pool, args):
+    """Validate a book or member CSV without writing anything; reports records per second"""
+    engine = (BookImportEngine if args.kind == 'book' else MemberImportEngine)(None, batch_size=args.batch_size)
+    runs = [('inline', False), ('process pool', True)] if args.compare else [(None, args.parallel)]
+    for label, parallel in runs:
+        try:
+            if parallel and args.compare:
+                # Timed even where open_pool would judge the pool not worthwhile
+                engine.pool = validation_pool()
+            elif parallel:
+                engine.open_pool(engine.count_rows(args.file))
+            total, invalid, seconds = validate_file(engine, args.file)
+        finally:
+            engine.close_pool()
+        print(f"{label + ': ' if label else ''}{total} records, {invalid} invalid, in {seconds:.2f}s "
+              f"({total / seconds if seconds else 0:.0f} records/s)")
+
+def export(session_pool, args):
+    """Export a table the way the Export buttons do, without the GUI; reports MB/s"""
+    if args.seed_rows:
+        seed_books(session_pool, args.seed_rows)
+    if args.table == 'members':
+        chunks = MemberModel(session_pool).iter_members(search_query=args.search)
+        columns, convert = MEMBER_EXPORT_COLUMNS, member_export_row
+    elif args.table == 'copies':
+        chunks = BookModel(session_pool).iter_copies(search_query=args.search)
+        columns, convert = [column.strip() for column in COPY_COLUMNS.split(',')], None
+    else:
+        chunks = BookModel(session_pool).iter_books(search_query=args.search)
+        # Searches add a relevance column after the catalog columns
+        columns, convert = CatalogRow._fields, lambda row: tuple(row[:len(CatalogRow._fields)])
+    for progress in ExportEngine(columns, args.format, convert).iter_export(chunks, args.output):
+        pass
+    print(f"Exported {progress.rows} rows ({progress.bytes / 1e6:.1f} MB) to {progress.path} "
+          f"in {progress.seconds:.1f}s ({progress.megabytes_per_second:.1f} MB/s)")
+
+FIRST_NAMES = ['Margaret', 'Haruki', 'Chimamanda', 'Gabriel', 'Toni', 'Fyodor', 'Virginia', 'Jorge',
+               'Octavia', 'Salman', 'Ursula', 'Kazuo', 'Isabel', 'Leo', 'Agatha', 'Orhan']
+LAST_NAMES = ['Atwood', 'Murakami', 'Adichie', 'Marquez', 'Morrison', 'Dostoevsky', 'Woolf', 'Borges',
+              'Butler', 'Rushdie', 'Le Guin', 'Ishiguro', 'Allende', 'Tolstoy', 'Christie', 'Pamuk']
+TITLE_WORDS = ['Shadow', 'River', 'Garden', 'Night', 'Empire', 'Silence', 'Winter', 'Harbor', 'Memory',
+               'Glass', 'Orchard', 'Station', 'Lantern', 'Desert', 'Archive', 'Tide']
+
+def synthetic_isbn(n):
+    """A valid, unique ISBN-13 (979 prefix) for n"""
+    digits = f"979{n % 10**9:09d}"
+    total = sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+def write_synthetic_books(path, count, start=0):
+    """Write count made-up books to a CSV with Import Books' columns"""
+    pick = random.Random(start)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['title', 'author', 'isbn', 'publication_year', 'pages', 'genre'])
+        for n in range(start, start + count):
+            writer.writerow([
+                f"The {pick.choice(TITLE_WORDS)} of {pick.choice(TITLE_WORDS)} {n}",
+                f"{pick.choice(FIRST_NAMES)} {pick.choice(LAST_NAMES)}",
+                synthetic_isbn(n), pick.randint(1900, 2024), pick.randint(80, 900), f"Genre {n % 12}"
+            ])
+
+def seed_books(session_pool, rows):
+    """Ingest made-up books until the catalog has at least rows active books"""
+    with session_pool() as session:
+        have, last_id = session.execute(text(
+            "SELECT COUNT(*) FILTER (WHERE is_active), COALESCE(MAX(book_id), 0) FROM books"
+        )).fetchone()
+    if have >= rows:
+        return 0
+    book_model = BookModel(session_pool)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'books.csv')
+        write_synthetic_books(path, rows - have, start=last_id + 1)
+        report = BulkIngest(session_pool, book_model, CopyModel(session_pool)).ingest_books(path)
+    print(f"Seeded {report.inserted} books in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)")
+    return report.inserted
+
+def write_synthetic_copies(path, count, start=0):
+    """Write one made-up copy for each of the books write_synthetic_books(count, start) wrote"""
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['isbn', 'copy_number', 'barcode', 'acquisition_date', 'current_condition', 'status'])
+        for n in range(start, start + count):
+            writer.writerow([synthetic_isbn(n), 'c1', f"3{n % 10**13:013d}", '2020-01-01', 'good', 'available'])
+
+def bench_ingest(session_pool, args):
+    """Time COPY ingestion of args.rows new made-up books and as many copies"""
+    with session_pool() as session:
+        last_id = session.execute(text("SELECT COALESCE(MAX(book_id), 0) FROM books")).scalar()
+    book_model = BookModel(session_pool)
+    ingest = BulkIngest(session_pool, book_model, CopyModel(session_pool))
+    with tempfile.TemporaryDirectory() as directory:
+        books_path = os.path.join(directory, 'books.csv')
+        copies_path = os.path.join(directory, 'copies.csv')
+        write_synthetic_books(books_path, args.rows, start=last_id + 1)
+        write_synthetic_copies(copies_path, args.rows, start=last_id + 1)
+        for noun, report in (('Books', ingest.ingest_books(books_path)), ('Copies', ingest.ingest_copies(copies_path))):
+            print(f"{noun}: {report.inserted} inserted, {report.rejected} rejected of {report.rows} rows "
+                  f"in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s, "
+                  f"{'within' if report.rows_per_second >= 100000 else 'under'} the 100k rows/s target)")
+
+def misspelled(name, pick):
+    """name with two neighbouring letters swapped, as a hurried desk search would type it"""
+    i = pick.randrange(1, len(name) - 2)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def bench_fuzzy(session_pool, args):
+    """Time fuzzy (trigram) title/author searches against a catalog of at least args.rows books"""
+    seed_books(session_pool, args.rows)
+    book_model = BookModel(session_pool)
+    pick = random.Random(1)
+    times = []
+    for _ in range(args.queries):
+        query = misspelled(pick.choice(LAST_NAMES) if pick.random() < 0.5 else pick.choice(TITLE_WORDS), pick)
+        # Every query goes to the database
+        book_model.result_cache.invalidate()
+        started = time.perf_counter()
+        rows, _ = book_model.get_books_page(search_query=query, sort_by='relevance', sort_order='DESC',
+                                            search_mode='fuzzy')
+        times.append(time.perf_counter() - started)
+    times.sort()
+    p95 = times[int(len(times) * 0.95) - 1] if len(times) >= 20 else times[-1]
+    print(f"Fuzzy search, {args.queries} misspelled queries: median {statistics.median(times) * 1000:.1f} ms, "
+          f"p95 {p95 * 1000:.1f} ms, max {times[-1] * 1000:.1f} ms "
+          f"({'within' if p95 < 0.05 else 'over'} the 50 ms target)")
+
+def synthetic_catalog_rows(count):
+    return [CatalogRow(i, f"Title {i}", f"Author {i % 997}", None, 1950 + i % 70, f"Publisher {i % 50}",
+                       100 + i % 400, f"Genre {i % 12}", None, i % 5, i % 3) for i in range(1, count + 1)]
+
+def synthetic_books(count):
+    """count made-up CatalogRows with the same names write_synthetic_books uses"""
+    pick = random.Random(0)
+    for n in range(1, count + 1):
+        yield CatalogRow(n, f"The {pick.choice(TITLE_WORDS)} of {pick.choice(TITLE_WORDS)} {n}",
+                         f"{pick.choice(FIRST_NAMES)} {pick.choice(LAST_NAMES)}", synthetic_isbn(n),
+                         pick.randint(1900, 2024), None, pick.randint(80, 900), f"Genre {n % 12}", None, 1, 1)
+
+def bench_index(session_pool, args):
+    """Time building the catalog cache and search index for args.rows books, and measure their memory"""
+    started = time.perf_counter()
+    catalog = CatalogCache(synthetic_books(args.rows))
+    cache_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    index = SearchIndex.from_catalog(catalog)
+    index_seconds = time.perf_counter() - started
+    print(f"{args.rows} books: catalog cache built in {cache_seconds:.2f}s, "
+          f"search index ({len(index.tokens)} tokens) in {index_seconds:.2f}s")
+    pick = random.Random(2)
+    times = []
+    for _ in range(100):
+        query = f"{pick.choice(TITLE_WORDS)} {pick.choice(LAST_NAMES)[:3]}"
+        started = time.perf_counter()
+        index.search(query)
+        times.append(time.perf_counter() - started)
+    print(f"Typed search, 100 queries: median {statistics.median(times) * 1000:.1f} ms, "
+          f"max {max(times) * 1000:.1f} ms")
+    del catalog, index
+
+    # Traced separately, since tracing slows the builds down
+    tracemalloc.start()
+    catalog = CatalogCache(synthetic_books(args.rows))
+    cache_bytes = tracemalloc.get_traced_memory()[0]
+    index = SearchIndex.from_catalog(catalog)
+    total_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Memory: catalog cache {cache_bytes / 1e6:.0f} MB, search index {(total_bytes - cache_bytes) / 1e6:.0f} MB, "
+          f"peak while building {peak_bytes / 1e6:.0f} MB")
+
+class StatementCounter:
+    """Counts what the engine sends while the block runs: pool checkouts, BEGINs, statements, COMMITs, ROLLBACKs"""
+    EVENTS = ('checkout', 'begin', 'before_cursor_execute', 'commit', 'rollback')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+        self.listeners = {name: (lambda *args, name=name, **kwargs: self.bump(name)) for name in self.EVENTS}
+
+    def bump(self, name):
+        self.counts[name] += 1
+
+    def target(self, name):
+        return self.engine.pool if name == 'checkout' else self.engine
+
+    def __enter__(self):
+        for name, listener in self.listeners.items():
+            event.listen(self.target(name), name, listener)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for name, listener in self.listeners.items():
+            event.remove(self.target(name), name, listener)
+        return False
+
+    @property
+    def round_trips(self):
+        return sum(count for name, count in self.counts.items() if name != 'checkout')
+
+    def __str__(self):
+        counts = self.counts
+        return (f"{self.round_trips} round trips: {counts['begin']} BEGIN, {counts['before_cursor_execute']} statements, "
+                f"{counts['commit']} COMMIT, {counts['rollback']} ROLLBACK; {counts['checkout']} pool checkouts")
+
+def synthetic_member(tag):
+    today = date.today()
+    return {
+        'member_number': f"BENCH-{tag}", 'first_name': 'Bench', 'last_name': f"Member {tag}",
+        'email': f"bench.{tag}@example.com", 'phone': '5550100000', 'date_of_birth': '1990-01-01',
+        'address': '', 'membership_date': today.isoformat(), 'membership_expiry': (today + timedelta(days=365)).isoformat(),
+        'membership_status': 'active', 'max_books_allowed': 5, 'max_renewal_allowed': 2,
+        'emergency_contact_name': '', 'emergency_contact_phone': '', 'member_notes': ''
+    }
+
+def save_member(model, member_data, member_id=None, uow=None):
+    """What the member dialog's Save does: validate, then add or update"""
+    errors = model.validate_member_data(dict(member_data, member_id=member_id), uow=uow)
+    if errors:
+        raise ValueError("\n".join(errors))
+    if member_id is None:
+        return model.add_member(member_data, uow=uow)
+    return model.update_member(member_id, member_data, uow=uow)
+
+def bench_member_save(session_pool, args):
+    """Count database round trips for a member add and edit, with per-method sessions and with one UnitOfWork"""
+    model = MemberModel(session_pool)
+    stamp = int(time.time())
+    created = []
+    try:
+        for label, shared in (('Per-method sessions', False), ('One UnitOfWork', True)):
+            member_data = synthetic_member(f"{stamp}{int(shared)}")
+            for action in ('add', 'edit'):
+                member_id = created[-1] if action == 'edit' else None
+                data = dict(member_data, last_name='Edited') if member_id else member_data
+                with StatementCounter(session_pool.engine) as counter:
+                    if shared:
+                        with UnitOfWork(session_pool) as uow:
+                            row = save_member(model, data, member_id, uow)
+                    else:
+                        row = save_member(model, data, member_id)
+                if member_id is None:
+                    created.append(row[0])
+                print(f"{label}, {action}: {counter}")
+    finally:
+        # The made-up members were only needed for counting
+        with session_scope(session_pool) as session:
+            for member_id in created:
+                session.execute(text("DELETE FROM members WHERE member_id = :member_id"), {'member_id': member_id})
+
+def bench_table(session_pool, args):
+    """Time one book-table reload of args.rows rows: per-row button widgets (the old way) vs model and delegate"""
+    # No display is needed; the tables are still laid out and painted
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import (QApplication, QTableView, QTableWidget, QTableWidgetItem, QWidget,
+                                 QHBoxLayout, QToolButton)
+    from views.table_models import BookTableModel
+    from views.action_delegate import ActionButtonDelegate
+    app = QApplication.instance() or QApplication([])
+    rows = synthetic_catalog_rows(args.rows)
+
+    # Before: what load_books did up to the action dispatcher, minus icons and styling
+    widgets = QTableWidget(0, 10)
+    widgets.resize(1200, 800)
+    widgets.show()
+
+    def reload_widgets():
+        for row in range(widgets.rowCount()):
+            for i in range(3):
+                try:
+                    widgets.cellWidget(row, 9).layout().itemAt(i).widget().clicked.disconnect()
+                except TypeError:
+                    pass
+        widgets.clearContents()
+        widgets.setRowCount(len(rows))
+        for row, book in enumerate(rows):
+            for column, value in enumerate(book[:9]):
+                widgets.setItem(row, column, QTableWidgetItem(str(value)))
+            cell = QWidget()
+            layout = QHBoxLayout(cell)
+            for _ in range(3):
+                layout.addWidget(QToolButton())
+            widgets.setCellWidget(row, 9, cell)
+        for row in range(widgets.rowCount()):
+            book_id = widgets.item(row, 0).text()
+            for i in range(3):
+                widgets.cellWidget(row, 9).layout().itemAt(i).widget().clicked.connect(
+                    lambda checked, bid=book_id: None)
+
+    # After: the table model and one ActionButtonDelegate
+    view = QTableView()
+    model = BookTableModel(view)
+    view.setModel(model)
+    view.setItemDelegateForColumn(BookTableModel.ACTIONS_COLUMN, ActionButtonDelegate([
+        ('edit', "edit", "Edit Book"), ('copies', "add", "Manage Copies"), ('delete', "delete", "Delete Book")
+    ], view))
+    view.resize(1200, 800)
+    view.show()
+
+    for label, reload in (("per-row widgets", reload_widgets), ("model + delegate", lambda: model.set_rows(rows))):
+        times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            reload()
+            app.processEvents()
+            times.append(time.perf_counter() - started)
+        print(f"{label}: {statistics.median(times) * 1000:.1f} ms per reload of {args.rows} rows "
+              f"(median of {args.repeat})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Library database maintenance jobs")
+    parser.add_argument('--database-url', help="Database to work on (default: DATABASE_URL from .env)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backfill = commands.add_parser('backfill-isbn13', help="Fill books.isbn13 from books.isbn")
+    backfill.add_argument('--batch-size', type=int, default=1000)
+    backfill.set_defaults(run=backfill_isbn13)
+
+    member_keys = commands.add_parser('backfill-member-keys',
+                                      help="Fill members.phone_digits, email_lower and name_key for member search")
+    member_keys.add_argument('--batch-size', type=int, default=1000)
+    member_keys.set_defaults(run=backfill_member_keys)
+
+    bulk = commands.add_parser('ingest', help="Load book and copy CSVs with PostgreSQL COPY (GUI closed)")
+    bulk.add_argument('--books', help="Books CSV, same columns as Import Books; upserted on isbn13")
+    bulk.add_argument('--copies', help="Copies CSV (isbn, copy_number, barcode, acquisition_date, current_condition, status)")
+    bulk.add_argument('--batch-size', type=int, default=10000, help="Rows validated at a time")
+    bulk.set_defaults(run=ingest)
+
+    validate = commands.add_parser('validate-csv', help="Validate an import file and report records/s (no database)")
+    validate.add_argument('kind', choices=['book', 'member'])
+    validate.add_argument('file')
+    validate.add_argument('--batch-size', type=int, default=10000)
+    validate.add_argument('--parallel', action='store_true', help="Use a process pool for large files")
+    validate.add_argument('--compare', action='store_true', help="Time validation inline and with a process pool")
+    validate.set_defaults(run=validate_csv, offline=True)
+
+    fuzzy = commands.add_parser('bench-fuzzy', help="Time fuzzy searches; seeds made-up books up to --rows first")
+    fuzzy.add_argument('--rows', type=int, default=1000000, help="Catalog size to search (PostgreSQL only)")
+    fuzzy.add_argument('--queries', type=int, default=100)
+    fuzzy.set_defaults(run=bench_fuzzy)
+
+    export_job = commands.add_parser('export', help="Export books, copies or members to a file and report MB/s")
+    export_job.add_argument('table', choices=['books', 'copies', 'members'])
+    export_job.add_argument('output')
+    export_job.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    export_job.add_argument('--search', help="Only rows matching this search, as in the tab's search box")
+    export_job.add_argument('--seed-rows', type=int, help="First add made-up books up to this many (e.g. 5000000)")
+    export_job.set_defaults(run=export)
+
+    bench = commands.add_parser('bench-ingest', help="Time COPY ingestion of made-up books and copies (adds them)")
+    bench.add_argument('--rows', type=int, default=1000000)
+    bench.set_defaults(run=bench_ingest)
+
+    index = commands.add_parser('bench-index', help="Time and measure the catalog cache and search index build")
+    index.add_argument('--rows', type=int, default=500000)
+    index.set_defaults(run=bench_index, offline=True)
+
+    member_save = commands.add_parser('bench-member-save',
+                                      help="Count round trips for a member add and edit, with and without a UnitOfWork")
+    member_save.set_defaults(run=bench_member_save)
+
+    table = commands.add_parser('bench-table', help="Time a book-table reload before and after the action dispatcher")
+    table.add_argument('--rows', type=int, default=10000)
+    table.add_argument('--repeat', type=int, default=3)
+    table.set_defaults(run=bench_table, offline=True)
+
+    args = parser.parse_args(argv)
+    try:
+        session_pool = None if getattr(args, 'offline', False) else \
+            SessionPool(create_engine(args.database_url) if args.database_url else None)
+        args.run(session_pool, args)
+    except Exception as e:
+        logging.error(f"Maintenance job {args.command} failed: {str(e)}")
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,473 @@
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from datetime import datetime
 import logging
+import re
+from collections import namedtuple
+from models.catalog_cache import CatalogCache, CatalogRow
+from models.change_events import ChangeNotifier
+from models.copy_model import COPY_COLUMNS
+from models.result_cache import ResultCache
+from models.search_index import tokenize, is_prefix_word, matches
+from models.validation import book_errors, isbn_checksum_ok
+from db.streaming import stream_rows, CHUNK_SIZE
 
 logging.basicConfig(filename='book_management.log', level=logging.ERROR)
 
-class BookModel:
+PAGE_SIZE = 200
+
+# Minimum pg_trgm word similarity for a fuzzy title/author match
+FUZZY_THRESHOLD = 0.4
+
+BOOK_COLUMNS = """
+    book_id, title, author, isbn, publication_year, publisher, pages, genre,
+    created_at,
+    active_copy_count AS copy_count, available_copy_count
+"""
+
+# Keyset sort expressions and the value NULLs collapse to, so (key, book_id) is totally ordered
+SORT_KEYS = {
+    'book_id': ("book_id", 0),
+    'title': ("title", ''),
+    'author': ("author", ''),
+    'isbn': ("COALESCE(isbn, '')", ''),
+    'publication_year': ("COALESCE(publication_year, 0)", 0),
+    'publisher': ("COALESCE(publisher, '')", ''),
+    'pages': ("COALESCE(pages, 0)", 0),
+    'genre': ("COALESCE(genre, '')", ''),
+    'copy_count': ("active_copy_count", 0),
+    'relevance': (None, 0.0),  # Search rank; the expression depends on the dialect
+}
+
+# Weighted document for books.search_vector, built from the bound book fields
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('simple', COALESCE(:title, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(:author, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(:genre, '')), 'C') ||
+    to_tsvector('simple', COALESCE(:isbn, ''))
+"""
+
+RELEVANCE_SQL = {
+    'postgresql': "ts_rank(search_vector, to_tsquery('simple', :search))",
+    'fuzzy': "GREATEST(word_similarity(:search, title), word_similarity(:search, author))",
+    # bm25 rank is negative, lower is better
+    'sqlite': "(SELECT -rank FROM books_fts WHERE books_fts MATCH :search AND rowid = books.book_id)",
+}
+
+# SQLite has no tsvector; an external-content FTS5 table kept in sync by triggers stands in for it
+SQLITE_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts
+    USING fts5(title, author, isbn, genre, content='books', content_rowid='book_id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, isbn, genre)
+        VALUES (new.book_id, new.title, new.author, new.isbn, new.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, isbn, genre)
+        VALUES ('delete', old.book_id, old.title, old.author, old.isbn, old.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, isbn, genre)
+        VALUES ('delete', old.book_id, old.title, old.author, old.isbn, old.genre);
+        INSERT INTO books_fts(rowid, title, author, isbn, genre)
+        VALUES (new.book_id, new.title, new.author, new.isbn, new.genre);
+    END
+    """,
+]
+
+ISBN_SHAPE = re.compile(r'^(\d{9}[\dX]|97[89]\d{10})$')
+
+# Width in years of the publication-year facet buckets
+YEAR_BUCKET = 10
+
+# GROUPING(genre, bucket) values telling the facet rows apart
+FACET_GENRE, FACET_YEAR, FACET_TOTAL = 1, 2, 3
+
+FacetQuery = namedtuple('FacetQuery', ['search_query', 'search_mode', 'year_bucket'])
+
+# Normalized arguments of a catalog query, used as the result cache key
+BookQuery = namedtuple('BookQuery', [
+    'search_query', 'genre', 'year_min', 'year_max', 'sort_by', 'sort_order', 'search_mode', 'after', 'limit'
+])
+
+class BookModel(ChangeNotifier):
     def __init__(self, session_pool):
         self.session_pool = session_pool
+        self._fulltext_ready = False
+        self.result_cache = ResultCache()
+        self.facet_cache = ResultCache(max_entries=32)
+
+    def _prepare_session(self, session, search_query=None):
+        """Return the session's dialect name, creating the SQLite search index on first use"""
+        dialect = session.get_bind().dialect.name
+        if dialect == 'sqlite' and search_query and not self._fulltext_ready:
+            exists = session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+            )).scalar()
+            if not exists:
+                for statement in SQLITE_FTS_SCHEMA:
+                    session.execute(text(statement))
+                session.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+                session.commit()
+            self._fulltext_ready = True
+        return dialect
+
+    def _fts5_query(self, search_query):
+        """Turn free text into an FTS5 query of quoted prefix terms, all of which must match"""
+        return " ".join(f'"{word}"*' if is_prefix_word(word) else f'"{word}"' for word in tokenize(search_query))
+
+    def _tsquery(self, search_query):
+        """Turn free text into a tsquery of prefix terms, all of which must match, as the local index does"""
+        return " & ".join(f"{word}:*" if is_prefix_word(word) else word for word in tokenize(search_query))
+
+    def _search_kind(self, dialect, search_mode):
+        """Which search implementation applies; SQLite has no pg_trgm, so fuzzy falls back to FTS5"""
+        if dialect == 'sqlite':
+            return 'sqlite'
+        return 'fuzzy' if search_mode == 'fuzzy' else 'postgresql'
+
+    def _build_filters(self, search_query=None, genre=None, year_min=None, year_max=None,
+                       dialect='postgresql', search_mode='fulltext'):
+        """Build the WHERE clause and parameters shared by the catalog queries"""
+        clauses = ["is_active = true"]
+        params = {}
+        search_kind = self._search_kind(dialect, search_mode)
 
-    def get_books(self, search_query=None, genre=None, year_min=None, year_max=None, sort_by='title', sort_order='ASC'):
+        if search_query and search_kind == 'sqlite':
+            match = self._fts5_query(search_query)
+            if match:
+                clauses.append("book_id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH :search)")
+                params['search'] = match
+        elif search_query and search_kind == 'fuzzy':
+            # <% uses the trigram GIN indexes on title and author
+            clauses.append("(:search <% title OR :search <% author)")
+            params['search'] = search_query
+        elif search_query:
+            match = self._tsquery(search_query)
+            if match:
+                clauses.append("search_vector @@ to_tsquery('simple', :search)")
+                params['search'] = match
+        if genre and genre != 'All':  # Add the != 'All' check
+            clauses.append("genre = :genre")
+            params['genre'] = genre
+        if year_min:
+            clauses.append("publication_year >= :year_min")
+            params['year_min'] = year_min
+        if year_max:
+            clauses.append("publication_year <= :year_max")
+            params['year_max'] = year_max
+
+        return " AND ".join(clauses), params
+
+    def _resolve_sort(self, sort_by, sort_order, params):
+        """Validate the sort; relevance only applies while a search is active"""
+        sort_by = sort_by if sort_by in SORT_KEYS else 'title'
+        if sort_by == 'relevance' and 'search' not in params:
+            sort_by = 'title'
+        sort_order = sort_order if sort_order in ['ASC', 'DESC'] else 'ASC'
+        return sort_by, sort_order
+
+    def _sort_key(self, sort_by, dialect, search_mode='fulltext'):
+        if sort_by == 'relevance':
+            return RELEVANCE_SQL[self._search_kind(dialect, search_mode)]
+        return SORT_KEYS[sort_by][0]
+
+    def _select_columns(self, sort_by, dialect, search_mode='fulltext'):
+        """Catalog columns, plus the search rank when results are ordered by relevance"""
+        if sort_by == 'relevance':
+            return f"{BOOK_COLUMNS}, {self._sort_key(sort_by, dialect, search_mode)} AS relevance"
+        return BOOK_COLUMNS
+
+    def _set_fuzzy_threshold(self, session, dialect, search_query, search_mode):
+        """Apply FUZZY_THRESHOLD to the <% operator for the current transaction"""
+        if search_query and self._search_kind(dialect, search_mode) == 'fuzzy':
+            session.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                {'threshold': str(FUZZY_THRESHOLD)}
+            )
+
+    def get_books(self, search_query=None, genre=None, year_min=None, year_max=None, sort_by='title', sort_order='ASC',
+                  search_mode='fulltext'):
+        key = self._result_key(search_query, genre, year_min, year_max, sort_by, sort_order, search_mode)
+        hit, rows = self.result_cache.get(key)
+        if hit:
+            return rows
+        version = self.result_cache.version
         session = self.session_pool.get_session()
         try:
-            query = """
-                SELECT book_id, title, author, isbn, publication_year, publisher, pages, genre,
-                       created_at,
-                       (SELECT COUNT(*) FROM book_copies bc WHERE bc.book_id = books.book_id AND bc.is_active = true) as copy_count
-                FROM books 
-                WHERE is_active = true
-            """
-            params = {}
-            
-            if search_query:
-                query += " AND (title ILIKE :search OR author ILIKE :search OR isbn ILIKE :search OR genre ILIKE :search)"
-                params['search'] = f'%{search_query}%'
-            if genre and genre != 'All':  # Add the != 'All' check
-                query += " AND genre = :genre"
-                params['genre'] = genre
-            if year_min:
-                query += " AND publication_year >= :year_min"
-                params['year_min'] = year_min
-            if year_max:
-                query += " AND publication_year <= :year_max"
-                params['year_max'] = year_max
-                
-            valid_columns = ['book_id', 'title', 'author', 'isbn', 'publication_year', 'publisher', 'pages', 'genre']
-            sort_by = sort_by if sort_by in valid_columns else 'title'
-            sort_order = sort_order if sort_order in ['ASC', 'DESC'] else 'ASC'
-            query += f" ORDER BY {sort_by} {sort_order}"
-            
-            result = session.execute(text(query), params)
-            return result.fetchall()
+            query, params = self._books_query(session, search_query, genre, year_min, year_max,
+                                              sort_by, sort_order, search_mode)
+            rows = session.execute(query, params).fetchall()
+            self.result_cache.put(key, rows, version)
+            return rows
         except Exception as e:
             logging.error(f"Error in get_books: {str(e)}")
             raise
         finally:
             self.session_pool.close_session(session)
 
-    def add_book(self, book_data):
+    def iter_books(self, search_query=None, genre=None, year_min=None, year_max=None, sort_by='title', sort_order='ASC',
+                   search_mode='fulltext', chunk_size=CHUNK_SIZE):
+        """Stream the same rows as get_books in chunks from a server-side cursor"""
         session = self.session_pool.get_session()
         try:
-            insert_sql = text("""
-                INSERT INTO books (
-                    title, subtitle, author, isbn, publication_year, publisher,
-                    pages, language, genre, description, created_at
-                )
-                VALUES (
-                    :title, :subtitle, :author, :isbn, :publication_year, :publisher,
-                    :pages, :language, :genre, :description, CURRENT_TIMESTAMP
-                )
-                RETURNING book_id
+            query, params = self._books_query(session, search_query, genre, year_min, year_max,
+                                              sort_by, sort_order, search_mode)
+            yield from stream_rows(session, query, params, chunk_size=chunk_size)
+        except Exception as e:
+            logging.error(f"Error in iter_books: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def iter_copies(self, search_query=None, genre=None, year_min=None, year_max=None, search_mode='fulltext',
+                    chunk_size=CHUNK_SIZE):
+        """Stream the active copies of the books get_books would return, in chunks, ordered by book"""
+        session = self.session_pool.get_session()
+        try:
+            dialect = self._prepare_session(session, search_query)
+            where, params = self._build_filters(search_query, genre, year_min, year_max, dialect, search_mode)
+            self._set_fuzzy_threshold(session, dialect, search_query, search_mode)
+            query = text(f"""
+                SELECT {COPY_COLUMNS}
+                FROM book_copies
+                WHERE book_id IN (SELECT book_id FROM books WHERE {where}) AND is_active = true
+                ORDER BY book_id, copy_number
             """)
-            result = session.execute(insert_sql, book_data)
+            yield from stream_rows(session, query, params, chunk_size=chunk_size)
+        except Exception as e:
+            logging.error(f"Error in iter_copies: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def _books_query(self, session, search_query, genre, year_min, year_max, sort_by, sort_order, search_mode):
+        """Full catalog query (unpaged) shared by get_books and iter_books"""
+        dialect = self._prepare_session(session, search_query)
+        where, params = self._build_filters(search_query, genre, year_min, year_max, dialect, search_mode)
+        sort_by, sort_order = self._resolve_sort(sort_by, sort_order, params)
+        self._set_fuzzy_threshold(session, dialect, search_query, search_mode)
+        query = f"""
+            SELECT {self._select_columns(sort_by, dialect, search_mode)}
+            FROM books 
+            WHERE {where}
+            ORDER BY {self._sort_key(sort_by, dialect, search_mode)} {sort_order}
+        """
+        return text(query), params
+
+    def get_books_page(self, search_query=None, genre=None, year_min=None, year_max=None,
+                       sort_by='title', sort_order='ASC', after=None, limit=PAGE_SIZE, search_mode='fulltext'):
+        """Fetch one page of books using keyset pagination.
+
+        `after` is the cursor returned with the previous page, or None for the first page.
+        search_mode is 'fulltext' or 'fuzzy' (typo-tolerant trigram match on title and author).
+        Returns (rows, next_cursor); next_cursor is None once the last page has been read.
+        """
+        key = self._result_key(search_query, genre, year_min, year_max, sort_by, sort_order, search_mode, after, limit)
+        hit, page = self.result_cache.get(key)
+        if hit:
+            return page
+        version = self.result_cache.version
+        session = self.session_pool.get_session()
+        try:
+            dialect = self._prepare_session(session, search_query)
+            where, params = self._build_filters(search_query, genre, year_min, year_max, dialect, search_mode)
+            sort_by, sort_order = self._resolve_sort(sort_by, sort_order, params)
+            sort_key = self._sort_key(sort_by, dialect, search_mode)
+            self._set_fuzzy_threshold(session, dialect, search_query, search_mode)
+
+            if after is not None:
+                comparison = '>' if sort_order == 'ASC' else '<'
+                where += f" AND ({sort_key}, book_id) {comparison} (:after_key, :after_id)"
+                params['after_key'], params['after_id'] = after
+
+            query = f"""
+                SELECT {self._select_columns(sort_by, dialect, search_mode)}
+                FROM books
+                WHERE {where}
+                ORDER BY {sort_key} {sort_order}, book_id {sort_order}
+                LIMIT :limit
+            """
+            # Fetch one extra row to find out whether another page exists
+            params['limit'] = limit + 1
+
+            rows = session.execute(text(query), params).fetchall()
+            if len(rows) <= limit:
+                page = rows, None
+            else:
+                rows = rows[:limit]
+                page = rows, self._page_cursor(rows[-1], sort_by)
+            self.result_cache.put(key, page, version)
+            return page
+        except Exception as e:
+            logging.error(f"Error in get_books_page: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def load_catalog_cache(self):
+        """Read the whole active catalog into a CatalogCache for client-side sort and filtering"""
+        # Streamed, so the Row objects of the whole catalog are never held at once
+        return CatalogCache(row for chunk in self.iter_books(sort_by='book_id') for row in chunk)
+
+    def _result_key(self, search_query, genre, year_min, year_max, sort_by, sort_order, search_mode,
+                    after=None, limit=None):
+        """Normalize query arguments so equivalent calls share a cache entry"""
+        search_query = ' '.join(search_query.split()).casefold() if search_query else None
+        sort_by, sort_order = self._resolve_sort(sort_by, sort_order, {'search': search_query} if search_query else {})
+        return BookQuery(
+            search_query,
+            genre if genre and genre != 'All' else None,
+            year_min or None,
+            year_max or None,
+            sort_by,
+            sort_order,
+            ('fuzzy' if search_mode == 'fuzzy' else 'fulltext') if search_query else None,
+            after,
+            limit
+        )
+
+    def invalidate_results(self, action, book_id, data=None):
+        """Drop cached results a write could have changed.
+
+        Has the change-listener signature, so CopyModel writes can be routed here too.
+        """
+        return self.result_cache.invalidate(lambda key, result: self._result_affected(key, result, action, book_id, data))
+
+    def _result_affected(self, key, result, action, book_id, data):
+        rows = result[0] if key.limit is not None else result
+        if any(row.book_id == book_id for row in rows):
+            return True
+        if action == 'copies':
+            # Copy counts only move the book between pages when they are the sort key
+            return key.sort_by == 'copy_count'
+        if data is None:
+            # A deleted book only leaves the results it was in
+            return False
+        # Added or updated book: affected if its new values pass the entry's filters
+        if key.genre and data.get('genre') != key.genre:
+            return False
+        year = data.get('publication_year')
+        if key.year_min and not (year and year >= key.year_min):
+            return False
+        if key.year_max and not (year and year <= key.year_max):
+            return False
+        if key.search_query and key.search_mode != 'fuzzy':
+            # Matched word by word the way the search itself finds books, so 'har' catches 'Harrison'
+            return matches(key.search_query, data.get('title'), data.get('author'), data.get('isbn'), data.get('genre'))
+        return True
+
+    def get_facets(self, search_query=None, search_mode='fulltext', year_bucket=YEAR_BUCKET):
+        """Count books per genre and per publication-year bucket for a search, in one grouped query.
+
+        Returns {'total': n, 'genres': {genre: n}, 'years': {bucket_start: n}};
+        books without a genre or year are only in the total. Results are cached
+        and patched by book writes.
+        """
+        search_query = ' '.join(search_query.split()) if search_query else None
+        key = FacetQuery(search_query.casefold() if search_query else None,
+                         ('fuzzy' if search_mode == 'fuzzy' else 'fulltext') if search_query else None,
+                         int(year_bucket))
+        hit, facets = self.facet_cache.get(key)
+        if hit:
+            return self._copy_facets(facets)
+        version = self.facet_cache.version
+        session = self.session_pool.get_session()
+        try:
+            dialect = self._prepare_session(session, search_query)
+            where, params = self._build_filters(search_query, dialect=dialect, search_mode=search_mode)
+            self._set_fuzzy_threshold(session, dialect, search_query, search_mode)
+            bucket = f"(publication_year / {key.year_bucket}) * {key.year_bucket}"
+            if dialect == 'sqlite':
+                # SQLite has no GROUPING SETS
+                query = f"""
+                    SELECT {FACET_GENRE} AS facet, genre, NULL AS bucket, COUNT(*) AS count
+                    FROM books WHERE {where} GROUP BY genre
+                    UNION ALL
+                    SELECT {FACET_YEAR}, NULL, {bucket}, COUNT(*)
+                    FROM books WHERE {where} GROUP BY {bucket}
+                    UNION ALL
+                    SELECT {FACET_TOTAL}, NULL, NULL, COUNT(*)
+                    FROM books WHERE {where}
+                """
+            else:
+                query = f"""
+                    SELECT GROUPING(genre, {bucket}) AS facet, genre, {bucket} AS bucket, COUNT(*) AS count
+                    FROM books
+                    WHERE {where}
+                    GROUP BY GROUPING SETS ((genre), ({bucket}), ())
+                """
+
+            facets = {'total': 0, 'genres': {}, 'years': {}}
+            for row in session.execute(text(query), params):
+                if row.facet == FACET_TOTAL:
+                    facets['total'] = row.count
+                elif row.facet == FACET_GENRE and row.genre:
+                    facets['genres'][row.genre] = row.count
+                elif row.facet == FACET_YEAR and row.bucket:
+                    facets['years'][row.bucket] = row.count
+            self.facet_cache.put(key, facets, version)
+            return self._copy_facets(facets)
+        except Exception as e:
+            logging.error(f"Error in get_facets: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def _copy_facets(self, facets):
+        # Cached counts are patched in place by writes, so callers get their own copy
+        return {'total': facets['total'], 'genres': dict(facets['genres']), 'years': dict(facets['years'])}
+
+    def _patch_facets(self, removed=None, added=None):
+        """Apply one book's (genre, year) change to the cached facets.
+
+        Unfiltered counts are adjusted in place; counts for a search are
+        dropped, since whether the book matches is only known to the database.
+        """
+        def patch(key, facets):
+            for values, delta in ((removed, -1), (added, 1)):
+                if values is None:
+                    continue
+                genre, year = values
+                facets['total'] += delta
+                if genre:
+                    self._bump(facets['genres'], genre, delta)
+                if year:
+                    self._bump(facets['years'], (year // key.year_bucket) * key.year_bucket, delta)
+
+        self.facet_cache.invalidate(lambda key, facets: key.search_query is not None)
+        self.facet_cache.patch(lambda key, facets: key.search_query is None, patch)
+
+    def _bump(self, counts, value, delta):
+        counts[value] = counts.get(value, 0) + delta
+        if counts[value] <= 0:
+            del counts[value]
+
+    def _page_cursor(self, row, sort_by):
+        """Keyset cursor (sort value, book_id) for the last row of a page"""
+        _, default = SORT_KEYS[sort_by]
+        value = getattr(row, sort_by)
+        return (value if value is not None else default, row.book_id)
+
+    def add_book(self, book_data):
+        """Insert a book and return the written row as a CatalogRow"""
+        session = self.session_pool.get_session()
+        try:
+            insert_sql = self._insert_sql(session, f"RETURNING {BOOK_COLUMNS}")
+            book_data['isbn13'] = self.normalize_isbn(book_data.get('isbn'))
+            book = CatalogRow(*session.execute(insert_sql, book_data).fetchone())
+            book_id = book.book_id
             session.commit()
-            return result.scalar()
+            self._patch_facets(added=(book_data.get('genre'), book_data.get('publication_year')))
+            self.invalidate_results('add', book_id, book_data)
+            self._notify_change('add', book_id, book)
+            return book
         except IntegrityError as e:
             session.rollback()
             logging.error(f"Error in add_book: {str(e)}")
@@ -71,29 +475,170 @@ class BookModel:
         finally:
             self.session_pool.close_session(session)
 
+    def _insert_sql(self, session, returning=''):
+        # On SQLite the FTS5 triggers index the row instead
+        search_column, search_value = ('', '') if self._prepare_session(session) == 'sqlite' \
+            else (', search_vector', f', {SEARCH_VECTOR_SQL}')
+        return text(f"""
+            INSERT INTO books (
+                title, subtitle, author, isbn, publication_year, publisher,
+                pages, language, genre, description, isbn13, created_at{search_column}
+            )
+            VALUES (
+                :title, :subtitle, :author, :isbn, :publication_year, :publisher,
+                :pages, :language, :genre, :description, :isbn13, CURRENT_TIMESTAMP{search_value}
+            )
+            {returning}
+        """)
+
+    def insert_books(self, books):
+        """Insert a batch of validated books with one executemany in one transaction.
+
+        If the batch hits a constraint (e.g. a duplicate ISBN) it is retried row
+        by row under savepoints, so only the offending rows are lost. Returns
+        [(index in books, reason)] for the rejected rows. Caches and listeners
+        are left alone; call invalidate_all() once the whole import is done.
+        """
+        session = self.session_pool.get_session()
+        try:
+            insert_sql = self._insert_sql(session)
+            values = [dict(book, isbn13=self.normalize_isbn(book.get('isbn'))) for book in books]
+            try:
+                session.execute(insert_sql, values)
+                session.commit()
+                return []
+            except IntegrityError:
+                session.rollback()
+            rejected = []
+            for i, book in enumerate(values):
+                try:
+                    with session.begin_nested():
+                        session.execute(insert_sql, book)
+                except IntegrityError as e:
+                    rejected.append((i, str(e.orig)))
+            session.commit()
+            return rejected
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error(f"Error in insert_books: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def update_books(self, books, merge=False):
+        """Write a batch of imported books over existing ones with one executemany.
+
+        Each dict carries the book_id to write to. With merge only the
+        existing book's empty fields are filled in; otherwise every field but
+        the ISBN is overwritten. Deleted books are brought back. Like
+        insert_books, leaves caches to invalidate_all().
+        """
+        def value(field):
+            if field == 'isbn':
+                return 'isbn'
+            if not merge:
+                return f':{field}'
+            if field in ('publication_year', 'pages'):
+                return f'COALESCE({field}, :{field})'
+            return f"COALESCE(NULLIF({field}, ''), :{field})"
+
+        session = self.session_pool.get_session()
+        try:
+            fields = ['title', 'subtitle', 'author', 'publication_year', 'publisher', 'pages', 'language', 'genre', 'description']
+            assignments = [f"{field} = {value(field)}" for field in fields]
+            if self._prepare_session(session) != 'sqlite':
+                # Built from the same expressions, since SET sees the old column values
+                search_vector = re.sub(r':(\w+)', lambda match: value(match.group(1)), SEARCH_VECTOR_SQL)
+                assignments.append(f"search_vector = {search_vector}")
+            update_sql = text(f"""
+                UPDATE books
+                SET {', '.join(assignments)},
+                    is_active = true,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE book_id = :book_id
+            """)
+            session.execute(update_sql, books)
+            session.commit()
+            return len(books)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error(f"Error in update_books: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def existing_isbns(self):
+        """Map every stored ISBN, normalized to an int ISBN-13, to its book_id.
+
+        Read once before an import so duplicates are found without a failed
+        insert each; ints keep a million-book map far smaller than strings.
+        Deleted books are included, as their ISBNs still hold the unique constraint.
+        """
+        session = self.session_pool.get_session()
+        try:
+            known = {}
+            query = text("SELECT book_id, isbn, isbn13 FROM books WHERE isbn IS NOT NULL")
+            for chunk in stream_rows(session, query, first_chunk=CHUNK_SIZE):
+                for row in chunk:
+                    isbn13 = row.isbn13 or self.normalize_isbn(row.isbn)
+                    if isbn13:
+                        known[int(isbn13)] = row.book_id
+            return known
+        except Exception as e:
+            logging.error(f"Error in existing_isbns: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def invalidate_all(self):
+        """Drop every cached result and tell listeners the catalog changed wholesale.
+
+        For bulk writes; call it on the thread that owns the listeners.
+        """
+        self.result_cache.invalidate()
+        self.facet_cache.invalidate()
+        self._notify_change('import', None)
+
     def update_book(self, book_id, book_data):
+        """Update a book and return the written row as a CatalogRow, or None if it doesn't exist"""
         session = self.session_pool.get_session()
         try:
-            update_sql = text("""
+            search_update = '' if self._prepare_session(session) == 'sqlite' \
+                else f'search_vector = {SEARCH_VECTOR_SQL},'
+            # The CTE reads the row as it was before the update, for the facet counts
+            update_sql = text(f"""
+                WITH old AS (SELECT genre, publication_year, is_active FROM books WHERE book_id = :book_id)
                 UPDATE books 
                 SET title = :title, 
                     subtitle = :subtitle, 
                     author = :author, 
                     isbn = :isbn,
+                    isbn13 = :isbn13,
                     publication_year = :publication_year,
                     publisher = :publisher,
                     pages = :pages,
                     language = :language,
                     genre = :genre,
                     description = :description,
+                    {search_update}
                     updated_at = CURRENT_TIMESTAMP
                 WHERE book_id = :book_id
-                RETURNING book_id
+                RETURNING {BOOK_COLUMNS},
+                          (SELECT genre FROM old) AS old_genre,
+                          (SELECT publication_year FROM old) AS old_year,
+                          (SELECT is_active FROM old) AS was_active
             """)
             book_data['book_id'] = book_id
-            result = session.execute(update_sql, book_data)
+            book_data['isbn13'] = self.normalize_isbn(book_data.get('isbn'))
+            updated = session.execute(update_sql, book_data).fetchone()
             session.commit()
-            return result.scalar()
+            if updated and updated.was_active:
+                self._patch_facets(removed=(updated.old_genre, updated.old_year),
+                                   added=(book_data.get('genre'), book_data.get('publication_year')))
+            result = CatalogRow(*updated[:len(CatalogRow._fields)]) if updated else None
+            self.invalidate_results('update', book_id, book_data)
+            self._notify_change('update', book_id, result)
+            return result
         except IntegrityError as e:
             session.rollback()
             logging.error(f"Error in update_book: {str(e)}")
@@ -108,12 +653,17 @@ class BookModel:
                 UPDATE books 
                 SET is_active = false,
                     updated_at = CURRENT_TIMESTAMP
-                WHERE book_id = :book_id
-                RETURNING book_id
+                WHERE book_id = :book_id AND is_active = true
+                RETURNING book_id, genre, publication_year
             """)
-            result = session.execute(delete_sql, {'book_id': book_id})
+            deleted = session.execute(delete_sql, {'book_id': book_id}).fetchone()
             session.commit()
-            return result.scalar()
+            if deleted:
+                self._patch_facets(removed=(deleted.genre, deleted.publication_year))
+            result = deleted.book_id if deleted else None
+            self.invalidate_results('delete', book_id)
+            self._notify_change('delete', book_id)
+            return result
         except SQLAlchemyError as e:
             session.rollback()
             logging.error(f"Error in delete_book: {str(e)}")
@@ -121,40 +671,95 @@ class BookModel:
         finally:
             self.session_pool.close_session(session)
 
-    def validate_isbn(self, isbn):
+    def normalize_isbn(self, isbn):
+        """Canonical ISBN-13 (digits only) for a valid ISBN-10 or ISBN-13, otherwise None"""
         if not isbn:
-            return True
-        isbn = isbn.replace('-', '').replace(' ', '')
+            return None
+        isbn = isbn.replace('-', '').replace(' ', '').upper()
+        if not ISBN_SHAPE.match(isbn) or not self.validate_isbn(isbn):
+            return None
         if len(isbn) == 10:
-            total = sum((10 - i) * (10 if c == 'X' else int(c)) for i, c in enumerate(isbn[:9]))
-            check_digit = (11 - (total % 11)) % 11 == (10 if isbn[-1] == 'X' else int(isbn[-1]))
-            return check_digit
-        elif len(isbn) == 13:
-            total = sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(isbn[:12]))
-            check_digit = (10 - (total % 10)) % 10 == int(isbn[-1])
-            return check_digit
-        return False
+            isbn = '978' + isbn[:9]
+            total = sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(isbn))
+            isbn += str((10 - (total % 10)) % 10)
+        return isbn
+
+    def looks_like_code(self, text):
+        """Whether search input could be a scanned ISBN (checksum included) or copy barcode rather than words.
+
+        Barcode schemes differ between libraries, so any single word may be
+        one; lookup_exact is one indexed equality query, and a word that is no
+        barcode just falls through to the text search.
+        """
+        text = text.strip()
+        return self.normalize_isbn(text) is not None or (bool(text) and len(text.split()) == 1)
+
+    def lookup_exact(self, code):
+        """Books whose normalized ISBN, or failing that a copy's barcode, equals code.
+
+        Both branches are single index lookups (books.isbn13, book_copies.barcode).
+        """
+        code = code.strip()
+        session = self.session_pool.get_session()
+        try:
+            isbn13 = self.normalize_isbn(code)
+            if isbn13:
+                rows = session.execute(text(f"""
+                    SELECT {BOOK_COLUMNS}
+                    FROM books
+                    WHERE isbn13 = :isbn13 AND is_active = true
+                    ORDER BY book_id
+                """), {'isbn13': isbn13}).fetchall()
+                if rows:
+                    return rows
+            return session.execute(text(f"""
+                SELECT {BOOK_COLUMNS}
+                FROM books
+                WHERE book_id = (
+                    SELECT book_id FROM book_copies WHERE barcode = :barcode AND is_active = true
+                ) AND is_active = true
+            """), {'barcode': code}).fetchall()
+        except Exception as e:
+            logging.error(f"Error in lookup_exact: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def backfill_isbn13(self, batch_size=1000):
+        """Fill books.isbn13 for rows written before it was maintained.
+
+        Walks the table in book_id order, one transaction per batch, so it can
+        be stopped and rerun. Invalid ISBNs stay NULL. Returns the rows updated.
+        """
+        session = self.session_pool.get_session()
+        try:
+            updated = 0
+            last_id = 0
+            while True:
+                rows = session.execute(text("""
+                    SELECT book_id, isbn FROM books
+                    WHERE book_id > :last_id AND isbn IS NOT NULL AND isbn13 IS NULL
+                    ORDER BY book_id
+                    LIMIT :limit
+                """), {'last_id': last_id, 'limit': batch_size}).fetchall()
+                if not rows:
+                    return updated
+                last_id = rows[-1].book_id
+                values = [{'book_id': row.book_id, 'isbn13': self.normalize_isbn(row.isbn)} for row in rows]
+                values = [value for value in values if value['isbn13']]
+                if values:
+                    session.execute(text("UPDATE books SET isbn13 = :isbn13 WHERE book_id = :book_id"), values)
+                session.commit()
+                updated += len(values)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error(f"Error in backfill_isbn13: {str(e)}")
+            raise
+        finally:
+            self.session_pool.close_session(session)
+
+    def validate_isbn(self, isbn):
+        return isbn_checksum_ok(isbn)
 
     def validate_book_data(self, book_data):
-        errors = []
-        if not book_data.get('title') or len(book_data['title'].strip()) < 1:
-            errors.append("Title is required")
-        if book_data.get('title') and len(book_data['title']) > 255:
-            errors.append("Title must be 255 characters or less")
-        if not book_data.get('author') or len(book_data['author'].strip()) < 1:
-            errors.append("Author is required")
-        if book_data.get('author') and len(book_data['author']) > 255:
-            errors.append("Author must be 255 characters or less")
-        if book_data.get('isbn') and not self.validate_isbn(book_data['isbn']):
-            errors.append("Invalid ISBN checksum")
-        if book_data.get('publication_year') and not (1000 < book_data['publication_year'] <= datetime.now().year + 1):
-            errors.append(f"Publication year must be between 1000 and {datetime.now().year + 1}")
-        if book_data.get('pages') and book_data['pages'] <= 0:
-            errors.append("Pages must be greater than 0")
-        if book_data.get('publisher') and len(book_data['publisher']) > 255:
-            errors.append("Publisher must be 255 characters or less")
-        if book_data.get('subtitle') and len(book_data['subtitle']) > 255:
-            errors.append("Subtitle must be 255 characters or less")
-        if book_data.get('description') and len(book_data['description']) > 1000:
-            errors.append("Description must be 1000 characters or less")
-        return errors
\ No newline at end of file
+        return book_errors(book_data)
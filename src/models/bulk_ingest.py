@@ -0,0 +1,315 @@
+import csv
+import logging
+import re
+import time
+from collections import namedtuple
+from models.book_model import SEARCH_VECTOR_SQL
+from models.import_engine import BookImportEngine, RejectedRows
+
+COPY_FIELDS = ['isbn', 'copy_number', 'barcode', 'acquisition_date', 'current_condition', 'status']
+
+# Backslash, tab and newlines are the only characters COPY's text format needs escaped
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+BOOK_STAGING_SQL = """
+    CREATE TEMP TABLE book_staging (
+        line bigint, title text, subtitle text, author text, isbn text, isbn13 text,
+        publication_year integer, publisher text, pages integer, language text,
+        genre text, description text
+    ) ON COMMIT DROP
+"""
+BOOK_STAGING_COLUMNS = ['line', 'title', 'subtitle', 'author', 'isbn', 'isbn13', 'publication_year',
+                        'publisher', 'pages', 'language', 'genre', 'description']
+
+# SEARCH_VECTOR_SQL over the staging row instead of bound parameters
+STAGED_SEARCH_VECTOR_SQL = re.sub(r':(\w+)', r's.\1', SEARCH_VECTOR_SQL)
+
+# Later lines repeating an ISBN (by isbn13, so hyphenation doesn't matter) are removed from staging
+# and rejected, as the Import Books dialog skips them; the first line is the one merged
+DUPLICATE_BOOKS_SQL = f"""
+    WITH ranked AS (
+        SELECT line, min(line) OVER (PARTITION BY isbn13) AS first_line
+        FROM book_staging
+        WHERE isbn13 IS NOT NULL
+    )
+    DELETE FROM book_staging s
+    USING ranked r
+    WHERE s.line = r.line AND r.line <> r.first_line
+    RETURNING {', '.join('s.' + column for column in BOOK_STAGING_COLUMNS)}, r.first_line
+"""
+
+BOOK_UPDATE_COLUMNS = ['title', 'subtitle', 'author', 'publication_year', 'publisher',
+                       'pages', 'language', 'genre', 'description']
+
+# Books are matched on isbn13; isbn is only the ISBN as it was typed and is kept as stored.
+# Both CTEs read the same snapshot, so the insert skips exactly the books the update matched.
+MERGE_BOOKS_SQL = f"""
+    WITH updated AS (
+        UPDATE books b SET
+            {', '.join(f'{column} = s.{column}' for column in BOOK_UPDATE_COLUMNS)},
+            search_vector = {STAGED_SEARCH_VECTOR_SQL},
+            is_active = true,
+            updated_at = CURRENT_TIMESTAMP
+        FROM book_staging s
+        WHERE b.isbn13 = s.isbn13
+        RETURNING s.line
+    ),
+    inserted AS (
+        INSERT INTO books (
+            title, subtitle, author, isbn, isbn13, publication_year, publisher,
+            pages, language, genre, description, search_vector, created_at
+        )
+        SELECT s.title, s.subtitle, s.author, s.isbn, s.isbn13, s.publication_year, s.publisher,
+               s.pages, s.language, s.genre, s.description, {STAGED_SEARCH_VECTOR_SQL}, CURRENT_TIMESTAMP
+        FROM book_staging s
+        WHERE s.isbn13 IS NULL OR NOT EXISTS (SELECT 1 FROM books b WHERE b.isbn13 = s.isbn13)
+        -- Only books whose isbn13 was never filled (see backfill-isbn13) can still meet here
+        ON CONFLICT (isbn) DO UPDATE SET
+            {', '.join(f'{column} = EXCLUDED.{column}' for column in BOOK_UPDATE_COLUMNS)},
+            isbn13 = EXCLUDED.isbn13,
+            search_vector = EXCLUDED.search_vector,
+            is_active = true,
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT (SELECT COUNT(*) FILTER (WHERE inserted) FROM inserted),
+           (SELECT COUNT(DISTINCT line) FROM updated) + (SELECT COUNT(*) FILTER (WHERE NOT inserted) FROM inserted)
+"""
+
+COPY_STAGING_SQL = """
+    CREATE TEMP TABLE copy_staging (
+        line bigint, isbn text, isbn13 text, copy_number text, barcode text,
+        acquisition_date date, current_condition text, status text
+    ) ON COMMIT DROP
+"""
+COPY_STAGING_COLUMNS = ['line', 'isbn', 'isbn13', 'copy_number', 'barcode', 'acquisition_date', 'current_condition', 'status']
+
+UNMATCHED_COPIES_SQL = f"""
+    SELECT {', '.join(COPY_STAGING_COLUMNS)}
+    FROM copy_staging s
+    WHERE NOT EXISTS (SELECT 1 FROM books b WHERE b.isbn13 = s.isbn13 AND b.is_active = true)
+    ORDER BY line
+"""
+
+# Staged copies the merge could not insert, removed from staging with the reason. A copy number
+# or barcode repeated in the file keeps its last line, as the merge would.
+CONFLICTING_COPIES_SQL = f"""
+    WITH ranked AS (
+        SELECT s.line, b.book_id,
+               row_number() OVER (PARTITION BY b.book_id, s.copy_number ORDER BY s.line DESC) AS copy_rank,
+               row_number() OVER (PARTITION BY s.barcode ORDER BY s.line DESC) AS barcode_rank
+        FROM copy_staging s
+        JOIN books b ON b.isbn13 = s.isbn13 AND b.is_active = true
+    ),
+    conflicts AS (
+        SELECT r.line,
+               CASE
+                   WHEN r.copy_rank > 1 THEN 'Copy number repeated later in the file'
+                   WHEN EXISTS (
+                       SELECT 1 FROM book_copies c
+                       WHERE c.book_id = r.book_id AND c.copy_number = s.copy_number AND c.is_active = true
+                   ) THEN 'Copy number already used for this book'
+                   WHEN s.barcode IS NOT NULL AND r.barcode_rank > 1 THEN 'Barcode repeated later in the file'
+                   WHEN EXISTS (SELECT 1 FROM book_copies c WHERE c.barcode = s.barcode) THEN 'Barcode already in use'
+               END AS reason
+        FROM ranked r
+        JOIN copy_staging s ON s.line = r.line
+    )
+    DELETE FROM copy_staging s
+    USING conflicts c
+    WHERE s.line = c.line AND c.reason IS NOT NULL
+    RETURNING {', '.join('s.' + column for column in COPY_STAGING_COLUMNS)}, c.reason
+"""
+
+MERGE_COPIES_SQL = """
+    WITH inserted AS (
+        INSERT INTO book_copies (
+            book_id, copy_number, barcode, acquisition_date, current_condition, status, is_active, created_at
+        )
+        SELECT DISTINCT ON (b.book_id, s.copy_number)
+               b.book_id, s.copy_number, s.barcode, s.acquisition_date,
+               COALESCE(s.current_condition, 'excellent')::copy_condition,
+               COALESCE(s.status, 'available')::copy_status, true, CURRENT_TIMESTAMP
+        FROM copy_staging s
+        JOIN books b ON b.isbn13 = s.isbn13 AND b.is_active = true
+        WHERE NOT EXISTS (
+            SELECT 1 FROM book_copies c
+            WHERE c.book_id = b.book_id AND c.copy_number = s.copy_number AND c.is_active = true
+        )
+        ORDER BY b.book_id, s.copy_number, s.line DESC
+        ON CONFLICT (barcode) DO NOTHING
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM inserted
+"""
+
+# Same recount as schema.sql, limited to the books that got copies
+RECOUNT_COPIES_SQL = """
+    UPDATE books b
+    SET active_copy_count = c.active_copies,
+        available_copy_count = c.available_copies
+    FROM (
+        SELECT book_id,
+               COUNT(*) AS active_copies,
+               COUNT(*) FILTER (WHERE status = 'available') AS available_copies
+        FROM book_copies
+        WHERE is_active = true
+          AND book_id IN (SELECT b.book_id FROM copy_staging s JOIN books b ON b.isbn13 = s.isbn13)
+        GROUP BY book_id
+    ) c
+    WHERE b.book_id = c.book_id
+"""
+
+class IngestReport(namedtuple('IngestReport', ['rows', 'inserted', 'updated', 'rejected', 'seconds', 'errors_path'])):
+    """Rows read, rows inserted and updated in the target table, rows rejected, and where rejects were written"""
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+class CopyStream:
+    """Read-only file over rows in COPY text format, encoded as COPY asks for more.
+
+    Lets cursor.copy_expert() pull a row generator without the input ever
+    being held in memory.
+    """
+    def __init__(self, rows):
+        self.lines = (self.encode(row) for row in rows)
+        self.buffer = ''
+
+    def encode(self, values):
+        return '\t'.join('\\N' if value is None else str(value).translate(COPY_ESCAPES) for value in values) + '\n'
+
+    def read(self, size=-1):
+        parts = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+        data = ''.join(parts)
+        if size < 0:
+            self.buffer = ''
+            return data
+        self.buffer = data[size:]
+        return data[:size]
+
+class BulkIngest:
+    """PostgreSQL fast path for initial migrations of books and copies.
+
+    Validated rows are streamed with COPY FROM STDIN into a temporary staging
+    table on the psycopg2 connection behind SessionPool, then merged into the
+    real table with one set-based statement, all in one transaction. Books are
+    upserted on isbn13, the first line of a repeated ISBN winning; copies are
+    matched to books on isbn13 and recounted. Rows left out of the merge are
+    written to the errors file, so read = inserted + updated + rejected.
+    Running caches are not told; use it when the GUI is not running.
+    """
+    def __init__(self, session_pool, book_model, copy_model, batch_size=10000):
+        if session_pool.engine.dialect.name != 'postgresql':
+            raise ValueError("COPY ingestion needs PostgreSQL; use Import Books instead")
+        self.session_pool = session_pool
+        self.book_model = book_model
+        self.copy_model = copy_model
+        self.engine = BookImportEngine(book_model, batch_size)
+
+    def ingest_books(self, path):
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            reader = self.engine.open_reader(file)
+            errors = RejectedRows(self.engine.errors_path(path), reader.fieldnames)
+            read = [0]
+            try:
+                self.engine.open_pool(self.engine.count_rows(path))
+                rows = self.staged_books(reader, errors, read)
+                inserted, updated = self.merge(BOOK_STAGING_SQL, 'book_staging', BOOK_STAGING_COLUMNS, rows,
+                                               MERGE_BOOKS_SQL, self.reject_duplicate_books(errors))
+            finally:
+                self.engine.close_pool()
+                errors.close()
+        return IngestReport(read[0], inserted, updated, errors.count, time.monotonic() - started, errors.written_path)
+
+    def staged_books(self, reader, errors, read):
+        for batch in iter(lambda: self.engine.read_batch(reader), []):
+            read[0] += len(batch)
+            books, failures = self.engine.validate_batch(batch)
+            for line, row, reason in failures:
+                errors.write(line, row, reason)
+            for line, _, book in books:
+                book['isbn13'] = self.book_model.normalize_isbn(book['isbn'])
+                yield [line] + [book[column] for column in BOOK_STAGING_COLUMNS[1:]]
+
+    def ingest_copies(self, path):
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            if not reader.fieldnames or not all(field in COPY_FIELDS for field in reader.fieldnames):
+                raise ValueError("CSV must contain valid copy fields")
+            errors = RejectedRows(self.engine.errors_path(path), reader.fieldnames)
+            read = [0]
+            try:
+                rows = self.staged_copies(reader, errors, read)
+                inserted, _ = self.merge(COPY_STAGING_SQL, 'copy_staging', COPY_STAGING_COLUMNS, rows,
+                                         MERGE_COPIES_SQL, self.reject_copies(errors), RECOUNT_COPIES_SQL)
+            finally:
+                errors.close()
+        return IngestReport(read[0], inserted, 0, errors.count, time.monotonic() - started, errors.written_path)
+
+    def staged_copies(self, reader, errors, read):
+        for row in reader:
+            read[0] += 1
+            copy_data = {key: (row.get(key) or '').strip() or None for key in COPY_FIELDS}
+            copy_data['isbn13'] = self.book_model.normalize_isbn(copy_data['isbn'])
+            reasons = self.copy_model.validate_book_copy_data(copy_data, None)
+            if not copy_data['isbn13']:
+                reasons.append("A valid ISBN is required to find the copy's book")
+            if reasons:
+                errors.write(reader.line_num, row, '; '.join(reasons))
+                continue
+            yield [reader.line_num] + [copy_data[column] for column in COPY_STAGING_COLUMNS[1:]]
+
+    def reject_duplicate_books(self, errors):
+        def reject(cursor):
+            cursor.execute(DUPLICATE_BOOKS_SQL)
+            for *row, first_line in cursor:
+                values = dict(zip(BOOK_STAGING_COLUMNS, row))
+                errors.write(values.pop('line'), values, f"Same ISBN as line {first_line}, skipped")
+        return reject
+
+    def reject_copies(self, errors):
+        """Write staged copies the merge would skip to the errors file, so every row is counted"""
+        def reject(cursor):
+            cursor.execute(UNMATCHED_COPIES_SQL)
+            for row in cursor:
+                values = dict(zip(COPY_STAGING_COLUMNS, row))
+                errors.write(values.pop('line'), values, "No book with this ISBN")
+            cursor.execute(CONFLICTING_COPIES_SQL)
+            for *row, reason in cursor:
+                values = dict(zip(COPY_STAGING_COLUMNS, row))
+                errors.write(values.pop('line'), values, reason)
+        return reject
+
+    def merge(self, staging_sql, staging_table, columns, rows, merge_sql, before_merge=None, after_merge_sql=None):
+        """COPY rows into a fresh staging table and merge it; returns the merge statement's counts"""
+        connection = self.session_pool.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(staging_sql)
+            cursor.copy_expert(f"COPY {staging_table} ({', '.join(columns)}) FROM STDIN", CopyStream(rows))
+            # Fresh statistics, so the merge joins a large staging table sensibly
+            cursor.execute(f"ANALYZE {staging_table}")
+            if before_merge:
+                before_merge(cursor)
+            cursor.execute(merge_sql)
+            counts = cursor.fetchone()
+            if after_merge_sql:
+                cursor.execute(after_merge_sql)
+            connection.commit()
+            return tuple(counts) + (0,) * (2 - len(counts))
+        except Exception as e:
+            connection.rollback()
+            logging.error(f"Error in bulk ingest into {staging_table}: {str(e)}")
+            raise
+        finally:
+            connection.close()
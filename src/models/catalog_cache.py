@@ -0,0 +1,255 @@
+import sys
+from collections import namedtuple
+import numpy as np
+
+# Same fields, in the same order, as BookModel's catalog rows
+CatalogRow = namedtuple('CatalogRow', [
+    'book_id', 'title', 'author', 'isbn', 'publication_year', 'publisher', 'pages', 'genre',
+    'created_at', 'copy_count', 'available_copy_count'
+])
+
+TEXT_COLUMNS = ['title', 'author', 'isbn', 'publisher', 'genre']
+NUMERIC_COLUMNS = ['book_id', 'publication_year', 'pages', 'copy_count']
+
+def _intern(value):
+    return sys.intern(value) if value else ''
+
+class CatalogCache:
+    """Compact columnar copy of the active catalog.
+
+    Numeric columns are NumPy arrays (NULL stored as 0), text columns are lists
+    of interned strings and genre is kept as category codes. Rows are held in
+    book_id order, so a stable sort gives the same book_id tie-break as the
+    keyset queries and header sorts or year/genre filters never touch the
+    database.
+
+    Book writes are patched in with upsert() and remove(). Row positions never
+    move, so CatalogViews taken earlier stay valid: updates overwrite in place,
+    new books are appended and removed ones are only flagged.
+    """
+    def __init__(self, rows):
+        """Build the columns in one pass over rows, which may be a stream"""
+        ids, years, pages, copies, available = [], [], [], [], []
+        self.title, self.author, self.isbn, self.publisher, self.created_at = [], [], [], [], []
+        self.genre_codes = {}
+        codes = []
+        for row in rows:
+            ids.append(row.book_id)
+            years.append(row.publication_year or 0)
+            pages.append(row.pages or 0)
+            copies.append(row.copy_count or 0)
+            available.append(row.available_copy_count or 0)
+            self.title.append(_intern(row.title))
+            self.author.append(_intern(row.author))
+            self.isbn.append(_intern(row.isbn))
+            self.publisher.append(_intern(row.publisher))
+            self.created_at.append(row.created_at)
+            codes.append(self.genre_codes.setdefault(row.genre or '', len(self.genre_codes)))
+        self.genres = list(self.genre_codes)
+
+        self.book_id = np.array(ids, dtype=np.int64)
+        self.publication_year = np.array(years, dtype=np.int32)
+        self.pages = np.array(pages, dtype=np.int32)
+        self.copy_count = np.array(copies, dtype=np.int32)
+        self.available_copy_count = np.array(available, dtype=np.int32)
+        self.genre_code = np.array(codes, dtype=np.int16)
+
+        if len(ids) > 1 and np.any(self.book_id[1:] < self.book_id[:-1]):
+            self._reorder(np.argsort(self.book_id, kind='stable'))
+        self.removed = np.zeros(len(ids), dtype=bool)
+        # Positions in book_id order; None while the rows themselves are in that order
+        self._id_order = None
+        self._in_id_order = True
+
+        # Sort ranks of text columns, computed on first use
+        self._ranks = {}
+
+    def _reorder(self, order):
+        for name in NUMERIC_COLUMNS + ['available_copy_count', 'genre_code']:
+            setattr(self, name, getattr(self, name)[order])
+        for name in ['title', 'author', 'isbn', 'publisher', 'created_at']:
+            values = getattr(self, name)
+            setattr(self, name, [values[i] for i in order])
+
+    def __len__(self):
+        """Number of row positions, removed books included"""
+        return len(self.book_id)
+
+    def live(self):
+        """Positions of the books still in the catalog"""
+        return np.flatnonzero(~self.removed)
+
+    def upsert(self, row):
+        """Patch in a book's written row (a CatalogRow): overwrite it in place, or append a new book"""
+        found = self.positions([row.book_id])
+        if len(found):
+            i = int(found[0])
+        else:
+            i = len(self)
+            if i and row.book_id < self.book_id[-1]:
+                self._in_id_order = False
+            for name in NUMERIC_COLUMNS + ['available_copy_count', 'genre_code']:
+                setattr(self, name, np.append(getattr(self, name), 0))
+            self.removed = np.append(self.removed, False)
+            for name in ['title', 'author', 'isbn', 'publisher', 'created_at']:
+                getattr(self, name).append(None)
+            self._id_order = None
+            self._ranks = {}
+        self.book_id[i] = row.book_id
+        self.publication_year[i] = row.publication_year or 0
+        self.pages[i] = row.pages or 0
+        self.copy_count[i] = row.copy_count or 0
+        self.available_copy_count[i] = row.available_copy_count or 0
+        code = self.genre_codes.setdefault(row.genre or '', len(self.genre_codes))
+        if len(self.genres) < len(self.genre_codes):
+            self.genres.append(row.genre or '')
+        if self.genre_code[i] != code:
+            self.genre_code[i] = code
+            self._ranks.pop('genre', None)
+        for name in ['title', 'author', 'isbn', 'publisher']:
+            value = _intern(getattr(row, name))
+            if getattr(self, name)[i] != value:
+                getattr(self, name)[i] = value
+                self._ranks.pop(name, None)
+        self.created_at[i] = row.created_at
+        self.removed[i] = False
+
+    def remove(self, book_id):
+        """Drop a deleted book from queries; returns False if it wasn't cached"""
+        found = self.positions([book_id])
+        if not len(found):
+            return False
+        self.removed[found] = True
+        return True
+
+    def set_copy_counts(self, book_id, copy_count, available_copy_count):
+        """Patch a book's copy counters after a copy write; returns False if it isn't cached"""
+        found = self.positions([book_id])
+        if not len(found):
+            return False
+        self.copy_count[found] = copy_count
+        self.available_copy_count[found] = available_copy_count
+        return True
+
+    def genre(self, i):
+        return self.genres[self.genre_code[i]]
+
+    def row(self, i):
+        """Materialize one row in the same shape as the database rows"""
+        return CatalogRow(
+            int(self.book_id[i]), self.title[i], self.author[i], self.isbn[i] or None,
+            int(self.publication_year[i]) or None, self.publisher[i] or None, int(self.pages[i]) or None,
+            self.genre(i) or None, self.created_at[i], int(self.copy_count[i]), int(self.available_copy_count[i])
+        )
+
+    def positions(self, ids):
+        """Row positions of the given book ids; ids not in the cache are skipped"""
+        ids = np.fromiter(ids, dtype=np.int64)
+        order = self.id_order()
+        sorted_ids = self.book_id if order is None else self.book_id[order]
+        positions = np.searchsorted(sorted_ids, ids)
+        found = positions < len(self)
+        positions, ids = positions[found], ids[found]
+        positions = positions[sorted_ids[positions] == ids]
+        return positions if order is None else order[positions]
+
+    def id_order(self):
+        """Positions in book_id order, or None when positions already are in that order"""
+        if self._in_id_order:
+            return None
+        if self._id_order is None:
+            self._id_order = np.argsort(self.book_id, kind='stable')
+        return self._id_order
+
+    def mask(self, genre=None, year_min=None, year_max=None, ids=None):
+        """Boolean mask of rows matching the genre and year range filters and, if given, the id set"""
+        if ids is not None:
+            mask = np.zeros(len(self), dtype=bool)
+            mask[self.positions(ids)] = True
+            mask &= ~self.removed
+        else:
+            mask = ~self.removed
+        if genre and genre != 'All':
+            if genre not in self.genre_codes:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.genre_code == self.genre_codes[genre]
+        if year_min:
+            mask &= self.publication_year >= year_min
+        if year_max:
+            # NULL years are stored as 0 and never match a range, as in SQL
+            mask &= (self.publication_year <= year_max) & (self.publication_year > 0)
+        return mask
+
+    def sort_key(self, column):
+        """Array whose ascending order is the column's sort order"""
+        if column in NUMERIC_COLUMNS:
+            return getattr(self, column)
+        if column not in TEXT_COLUMNS:
+            column = 'title'
+        if column not in self._ranks:
+            values = [self.genre(i) for i in range(len(self))] if column == 'genre' else getattr(self, column)
+            order = sorted(range(len(values)), key=lambda i: values[i].casefold())
+            ranks = np.empty(len(values), dtype=np.int32)
+            ranks[np.asarray(order, dtype=np.int64)] = np.arange(len(values), dtype=np.int32)
+            self._ranks[column] = ranks
+        return self._ranks[column]
+
+    def query(self, genre=None, year_min=None, year_max=None, sort_by='title', sort_order='ASC', ids=None):
+        """Filter and sort with vectorized mask/argsort; returns a lazy CatalogView"""
+        indices = np.flatnonzero(self.mask(genre, year_min, year_max, ids))
+        if self._in_id_order:
+            order = np.argsort(self.sort_key(sort_by)[indices], kind='stable')
+        else:
+            # A book appended out of id order; keep the book_id tie-break explicitly
+            order = np.lexsort((self.book_id[indices], self.sort_key(sort_by)[indices]))
+        if sort_order == 'DESC':
+            order = order[::-1]
+        return CatalogView(self, indices[order])
+
+class CatalogView:
+    """Sequence of catalog rows selected by index; rows are built only when asked for.
+
+    Rows written after the cache was loaded can be patched in: they are kept
+    in a side list and referenced by negative indices, so the cache itself
+    stays read-only.
+    """
+    def __init__(self, cache, indices):
+        self.cache = cache
+        self.indices = indices
+        self.patched = []
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, position):
+        return self._row(self.indices[position])
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self._row(i)
+
+    def _row(self, i):
+        return self.cache.row(i) if i >= 0 else self.patched[-i - 1]
+
+    def _patch_index(self, row):
+        self.patched.append(row)
+        return -len(self.patched)
+
+    def __setitem__(self, position, row):
+        self.indices[position] = self._patch_index(row)
+
+    def __delitem__(self, position):
+        self.indices = np.delete(self.indices, position)
+
+    def insert(self, position, row):
+        self.indices = np.insert(self.indices, position, self._patch_index(row))
+
+    def ids(self):
+        """Book ids in view order"""
+        cached = self.indices >= 0
+        ids = np.zeros(len(self.indices), dtype=np.int64)
+        ids[cached] = self.cache.book_id[self.indices[cached]]
+        ids = ids.tolist()
+        for position in np.flatnonzero(~cached):
+            ids[position] = self.patched[-self.indices[position] - 1].book_id
+        return ids
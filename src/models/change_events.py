@@ -0,0 +1,26 @@
+import logging
+
+class ChangeNotifier:
+    """Lets caches subscribe to a model's committed writes.
+
+    Listeners are called as listener(action, entity_id, data) after the
+    transaction commits, on the thread that performed the write. data is the
+    written row (a CatalogRow) for book adds and updates and the new copy
+    counts for copy writes, otherwise None. Bulk imports report
+    ('import', None, None) once, after the last batch.
+    """
+    def add_change_listener(self, listener):
+        self.__dict__.setdefault('_change_listeners', []).append(listener)
+
+    def remove_change_listener(self, listener):
+        listeners = self.__dict__.get('_change_listeners', [])
+        if listener in listeners:
+            listeners.remove(listener)
+
+    def _notify_change(self, action, entity_id, data=None):
+        for listener in list(self.__dict__.get('_change_listeners', [])):
+            try:
+                listener(action, entity_id, data)
+            except Exception as e:
+                # A failing cache must not turn a committed write into an error
+                logging.error(f"Error in change listener: {str(e)}")
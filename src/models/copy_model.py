@@ -2,32 +2,53 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from datetime import datetime
 import logging
+from db.unit_of_work import session_scope
+from models.change_events import ChangeNotifier
 
 logging.basicConfig(filename='book_management.log', level=logging.ERROR)
 
-class CopyModel:
+# Keeps books.active_copy_count / available_copy_count in step with book_copies
+ADJUST_COPY_COUNTS_SQL = text("""
+    UPDATE books
+    SET active_copy_count = active_copy_count + :active_delta,
+        available_copy_count = available_copy_count + :available_delta
+    WHERE book_id = :book_id
+    RETURNING active_copy_count AS copy_count, available_copy_count
+""")
+
+COPY_COLUMNS = "copy_id, book_id, copy_number, acquisition_date, current_condition, status, is_active"
+
+class CopyModel(ChangeNotifier):
     def __init__(self, session_pool):
         self.session_pool = session_pool
 
-    def get_book_copies(self, book_id):
-        session = self.session_pool.get_session()
+    def get_book_copies(self, book_id, uow=None):
         try:
-            query = """
-                SELECT copy_id, book_id, copy_number, acquisition_date, current_condition, 
-                       status, is_active
-                FROM book_copies 
-                WHERE book_id = :book_id AND is_active = true
-                ORDER BY copy_number
-            """
-            result = session.execute(text(query), {'book_id': book_id})
-            return result.fetchall()
+            with session_scope(self.session_pool, uow) as session:
+                query = f"""
+                    SELECT {COPY_COLUMNS}
+                    FROM book_copies 
+                    WHERE book_id = :book_id AND is_active = true
+                    ORDER BY copy_number
+                """
+                result = session.execute(text(query), {'book_id': book_id})
+                return result.fetchall()
         except Exception as e:
             logging.error(f"Error in get_book_copies: {str(e)}")
             raise
-        finally:
-            self.session_pool.close_session(session)
+
+    def get_book_title(self, book_id, uow=None):
+        """Title of an active book, or None"""
+        try:
+            with session_scope(self.session_pool, uow) as session:
+                query = text("SELECT title FROM books WHERE book_id = :book_id AND is_active = true")
+                return session.execute(query, {'book_id': book_id}).scalar()
+        except Exception as e:
+            logging.error(f"Error in get_book_title: {str(e)}")
+            raise
 
     def add_book_copy(self, book_id, copy_data):
+        """Insert a copy and return the written copy row"""
         session = self.session_pool.get_session()
         try:
             # Check for duplicate copy_number
@@ -37,7 +58,7 @@ class CopyModel:
             if existing:
                 raise ValueError("Copy number already exists for this book")
                 
-            insert_sql = text("""
+            insert_sql = text(f"""
                 INSERT INTO book_copies (
                     book_id, copy_number, acquisition_date, current_condition,
                     status, is_active, created_at
@@ -46,12 +67,14 @@ class CopyModel:
                     :book_id, :copy_number, :acquisition_date, :current_condition,
                     :status, true, CURRENT_TIMESTAMP
                 )
-                RETURNING copy_id
+                RETURNING {COPY_COLUMNS}
             """)
             copy_data['book_id'] = book_id
-            result = session.execute(insert_sql, copy_data)
+            copy = session.execute(insert_sql, copy_data).fetchone()
+            counts = self._adjust_copy_counts(session, book_id, 1, 1 if copy_data['status'] == 'available' else 0)
             session.commit()
-            return result.scalar()
+            self._notify_change('copies', book_id, counts)
+            return copy
         except IntegrityError as e:
             session.rollback()
             logging.error(f"Error in add_book_copy: {str(e)}")
@@ -63,9 +86,13 @@ class CopyModel:
             self.session_pool.close_session(session)
 
     def update_book_copy(self, copy_id, copy_data):
+        """Update a copy and return the written copy row"""
         session = self.session_pool.get_session()
         try:
-            update_sql = text("""
+            current = session.execute(text(
+                "SELECT book_id, status, is_active FROM book_copies WHERE copy_id = :copy_id FOR UPDATE"
+            ), {'copy_id': copy_id}).fetchone()
+            update_sql = text(f"""
                 UPDATE book_copies 
                 SET copy_number = :copy_number,
                     acquisition_date = :acquisition_date,
@@ -73,12 +100,20 @@ class CopyModel:
                     status = :status,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE copy_id = :copy_id
-                RETURNING copy_id
+                RETURNING {COPY_COLUMNS}
             """)
             copy_data['copy_id'] = copy_id
-            result = session.execute(update_sql, copy_data)
+            copy = session.execute(update_sql, copy_data).fetchone()
+            counts = None
+            if current and current.is_active:
+                was_available = 1 if current.status == 'available' else 0
+                is_available = 1 if copy_data['status'] == 'available' else 0
+                if was_available != is_available:
+                    counts = self._adjust_copy_counts(session, current.book_id, 0, is_available - was_available)
             session.commit()
-            return result.scalar()
+            if current:
+                self._notify_change('copies', current.book_id, counts)
+            return copy
         except IntegrityError as e:
             session.rollback()
             logging.error(f"Error in update_book_copy: {str(e)}")
@@ -93,12 +128,17 @@ class CopyModel:
                 UPDATE book_copies 
                 SET is_active = false,
                     updated_at = CURRENT_TIMESTAMP
-                WHERE copy_id = :copy_id
-                RETURNING copy_id
+                WHERE copy_id = :copy_id AND is_active = true
+                RETURNING copy_id, book_id, status
             """)
-            result = session.execute(delete_sql, {'copy_id': copy_id})
+            deleted = session.execute(delete_sql, {'copy_id': copy_id}).fetchone()
+            counts = None
+            if deleted:
+                counts = self._adjust_copy_counts(session, deleted.book_id, -1, -1 if deleted.status == 'available' else 0)
             session.commit()
-            return result.scalar()
+            if deleted:
+                self._notify_change('copies', deleted.book_id, counts)
+            return deleted.copy_id if deleted else None
         except SQLAlchemyError as e:
             session.rollback()
             logging.error(f"Error in delete_book_copy: {str(e)}")
@@ -106,6 +146,15 @@ class CopyModel:
         finally:
             self.session_pool.close_session(session)
 
+    def _adjust_copy_counts(self, session, book_id, active_delta, available_delta):
+        """Apply copy count changes to the book inside the caller's transaction; returns the new counts"""
+        counts = session.execute(ADJUST_COPY_COUNTS_SQL, {
+            'book_id': book_id,
+            'active_delta': active_delta,
+            'available_delta': available_delta
+        }).fetchone()
+        return dict(counts._mapping) if counts else None
+
     def validate_book_copy_data(self, copy_data, book_id):
         errors = []
         if not copy_data.get('copy_number') or len(copy_data['copy_number'].strip()) < 1:
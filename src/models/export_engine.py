@@ -0,0 +1,127 @@
+import csv
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+class ExportProgress(namedtuple('ExportProgress', ['rows', 'bytes', 'seconds', 'path', 'done'])):
+    """Rows and bytes written so far"""
+    @property
+    def megabytes_per_second(self):
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+class CsvExport:
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+class JsonlExport:
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.columns = columns
+
+    def write(self, rows):
+        # Dates, timestamps and numerics are written as their string form
+        self.file.writelines(json.dumps(dict(zip(self.columns, row)), default=str) + '\n' for row in rows)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+class ParquetExport:
+    """One row group per chunk; the schema is taken from the first chunk"""
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet export needs the pyarrow package")
+        self.pa = pyarrow
+        self.parquet = pyarrow.parquet
+        self.sink = pyarrow.OSFile(path, 'wb')
+        self.columns = columns
+        self.schema = None
+        self.writer = None
+
+    def write(self, rows):
+        data = {column: [row[i] for row in rows] for i, column in enumerate(self.columns)}
+        if self.schema is None:
+            schema = self.pa.Table.from_pydict(data).schema
+            # A column that is all NULL in the first chunk has no type yet; store it as text
+            self.schema = self.pa.schema([
+                field.with_type(self.pa.string()) if self.pa.types.is_null(field.type) else field for field in schema
+            ])
+            self.writer = self.parquet.ParquetWriter(self.sink, self.schema)
+        for field in self.schema:
+            if self.pa.types.is_string(field.type):
+                data[field.name] = [None if value is None else str(value) for value in data[field.name]]
+        self.writer.write_table(self.pa.Table.from_pydict(data, schema=self.schema))
+
+    def tell(self):
+        return self.sink.tell()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.sink.close()
+
+WRITERS = {'csv': CsvExport, 'jsonl': JsonlExport, 'parquet': ParquetExport}
+
+class ExportEngine:
+    """Writes the chunks of a streaming query (e.g. iter_books) to a file.
+
+    Only one chunk is held at a time, so memory stays flat however large the
+    table. Parquet needs pyarrow, which is imported only when it is asked for.
+    """
+    def __init__(self, columns, fmt, convert=None):
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.columns = list(columns)
+        self.fmt = fmt
+        self.convert = convert
+
+    def iter_export(self, chunks, path):
+        """Write chunks to path, yielding an ExportProgress after each one.
+
+        The last progress has done=True. Closing the generator early (cancel)
+        or an error removes the partial file.
+        """
+        started = time.monotonic()
+        rows = 0
+        writer = WRITERS[self.fmt](path, self.columns)
+        finished = False
+        try:
+            for chunk in chunks:
+                if self.convert:
+                    chunk = [self.convert(row) for row in chunk]
+                writer.write(chunk)
+                rows += len(chunk)
+                yield ExportProgress(rows, writer.tell(), time.monotonic() - started, path, False)
+            writer.close()
+            finished = True
+            seconds = time.monotonic() - started
+            size = os.path.getsize(path)
+            logging.info(f"Exported {rows} rows to {path} in {seconds:.1f}s")
+            yield ExportProgress(rows, size, seconds, path, True)
+        finally:
+            if hasattr(chunks, 'close'):
+                # Releases the server-side cursor when the export stops early
+                chunks.close()
+            if not finished:
+                writer.close()
+                os.remove(path)
@@ -0,0 +1,312 @@
+import abc
+import csv
+import logging
+import os
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from models.validation import validate_many, validation_pool, pool_worthwhile
+
+BOOK_FIELDS = ['title', 'subtitle', 'author', 'isbn', 'publication_year', 'publisher', 'pages', 'language', 'genre', 'description']
+MEMBER_FIELDS = ['member_number', 'first_name', 'last_name', 'email', 'phone', 'date_of_birth', 'address',
+                 'membership_date', 'membership_expiry', 'membership_status', 'max_books_allowed',
+                 'max_renewal_allowed', 'emergency_contact_name', 'emergency_contact_phone', 'member_notes']
+BATCH_SIZE = 1000
+
+# What to do with a row whose ISBN is already in the catalog
+DUPLICATE_POLICIES = ('skip', 'merge', 'update')
+
+class ImportProgress(namedtuple('ImportProgress', ['processed', 'total', 'imported', 'updated', 'skipped', 'rejected',
+                                                   'seconds', 'errors_path', 'done'])):
+    """Counts after a batch; errors_path is None while nothing was rejected or skipped"""
+    @property
+    def rows_per_second(self):
+        return self.processed / self.seconds if self.seconds else 0.0
+
+class RejectedRows:
+    """Error CSV of rejected input rows with their line and reason, created on the first rejection"""
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = ['line', 'error'] + list(fieldnames)
+        self.count = 0
+        self.file = None
+        self.writer = None
+
+    def write(self, line, row, reason):
+        if self.writer is None:
+            self.file = open(self.path, 'w', encoding='utf-8', newline='')
+            self.writer = csv.DictWriter(self.file, self.fieldnames, extrasaction='ignore')
+            self.writer.writeheader()
+        self.writer.writerow(dict(row, line=line, error=reason))
+        self.count += 1
+
+    @property
+    def written_path(self):
+        return self.path if self.count else None
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+class CsvImportEngine(abc.ABC):
+    """Streams a CSV file into the database in batches.
+
+    Rows are read and handled a batch at a time, so memory does not grow
+    with the file. Subclasses name their columns in fields, their record
+    kind for validate_many in noun, and implement parse and import_batch;
+    rejected and skipped rows are written, with the reason, to <file>.errors.csv.
+    """
+    fields = ()
+    noun = 'row'
+
+    def __init__(self, model, batch_size=BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        # Process pool for validation, for files large enough that it pays (see pool_worthwhile)
+        self.pool = None
+
+    def errors_path(self, path):
+        root, ext = os.path.splitext(path)
+        return f"{root}.errors{ext or '.csv'}"
+
+    def count_rows(self, path):
+        # A binary line count is far cheaper than the import; only used for the progress total
+        with open(path, 'rb') as file:
+            return max(sum(1 for _ in file) - 1, 0)
+
+    def begin(self):
+        """Called once before the first batch"""
+
+    @abc.abstractmethod
+    def import_batch(self, batch):
+        """Write [(line, row)]; returns (rows updated, [(line, row, reason)] skipped, [(line, row, reason)] rejected)"""
+
+    @abc.abstractmethod
+    def parse(self, row):
+        """Field dict for a CSV row; raises ValueError for values that cannot be converted"""
+
+    def prepared(self, record):
+        """A validated record as it is written"""
+        return record
+
+    def open_pool(self, rows):
+        if pool_worthwhile(rows) and self.pool is None:
+            self.pool = validation_pool()
+
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def validate_batch(self, batch):
+        """Split a batch into ([(line, row, record)], [(line, row, reason)])"""
+        parsed = []
+        failures = []
+        for line, row in batch:
+            try:
+                parsed.append((line, row, self.parse(row)))
+            except ValueError as e:
+                failures.append((line, row, str(e)))
+        records = []
+        errors = validate_many([record for _, _, record in parsed], self.noun, self.pool)
+        for (line, row, record), record_errors in zip(parsed, errors):
+            if record_errors:
+                failures.append((line, row, '; '.join(record_errors)))
+            else:
+                records.append((line, row, self.prepared(record)))
+        return records, failures
+
+    def iter_import(self, path):
+        """Import path, yielding an ImportProgress after every batch.
+
+        Each batch is committed before its progress is yielded, so closing the
+        generator (cancel) keeps the batches already imported. The last
+        progress has done=True.
+        """
+        total = self.count_rows(path)
+        started = time.monotonic()
+        processed = imported = updated = skipped = rejected = 0
+        errors = None
+        try:
+            self.open_pool(total)
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                reader = self.open_reader(file)
+                errors = RejectedRows(self.errors_path(path), reader.fieldnames)
+                self.begin()
+                while True:
+                    batch = self.read_batch(reader)
+                    if not batch:
+                        break
+                    batch_updated, duplicates, failures = self.import_batch(batch)
+                    for line, row, reason in sorted(failures + duplicates, key=lambda failure: failure[0]):
+                        errors.write(line, row, reason)
+                    processed += len(batch)
+                    rejected += len(failures)
+                    skipped += len(duplicates)
+                    updated += batch_updated
+                    imported = processed - rejected - skipped - updated
+                    yield ImportProgress(processed, max(total, processed), imported, updated, skipped, rejected,
+                                         time.monotonic() - started, errors.written_path, False)
+            seconds = time.monotonic() - started
+            logging.info(f"Imported {imported} {self.noun}s from {path} in {seconds:.1f}s, "
+                         f"{updated} updated, {skipped} skipped, {rejected} rejected")
+            yield ImportProgress(processed, processed, imported, updated, skipped, rejected,
+                                 seconds, errors.written_path, True)
+        finally:
+            self.close_pool()
+            if errors is not None:
+                errors.close()
+
+    def open_reader(self, file):
+        reader = csv.DictReader(file)
+        if not reader.fieldnames or not all(field in self.fields for field in reader.fieldnames):
+            raise ValueError(f"CSV must contain valid {self.noun} fields")
+        return reader
+
+    def read_batch(self, reader):
+        batch = []
+        for row in reader:
+            batch.append((reader.line_num, row))
+            if len(batch) == self.batch_size:
+                break
+        return batch
+
+    def parse_int(self, value, label, default=None):
+        try:
+            return int(value) if value else default
+        except ValueError:
+            raise ValueError(f"{label} must be a whole number")
+
+class BookImportEngine(CsvImportEngine):
+    """Imports a CSV file of books.
+
+    Duplicate ISBNs, against the catalog or earlier lines, are sorted out
+    before any SQL runs and handled by the duplicates policy: 'skip' leaves
+    the stored book alone, 'merge' fills its empty fields and 'update'
+    overwrites it. New rows go to BookModel.insert_books.
+    """
+    fields = BOOK_FIELDS
+    noun = 'book'
+
+    def __init__(self, model, batch_size=BATCH_SIZE, duplicates='skip'):
+        if duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unknown duplicate policy: {duplicates}")
+        super().__init__(model, batch_size)
+        self.duplicates = duplicates
+
+    def begin(self):
+        self.known = self.model.existing_isbns()
+        self.seen = {}
+
+    def import_batch(self, batch):
+        books, failures = self.validate_batch(batch)
+        books, updates, duplicates = self.sort_duplicates(books, self.known, self.seen)
+        if books:
+            for i, reason in self.model.insert_books([book for _, _, book in books]):
+                line, row, _ = books[i]
+                failures.append((line, row, reason))
+        if updates:
+            self.model.update_books([book for _, _, book in updates], merge=self.duplicates == 'merge')
+        return len(updates), duplicates, failures
+
+    def sort_duplicates(self, books, known, seen):
+        """Split validated books into (new, updates, skipped) by ISBN.
+
+        known maps the catalog's ISBNs to book_ids; seen maps ISBNs met earlier
+        in the file to their line, and is extended here. A repeat within the
+        file is always skipped, as the book it repeats may not exist yet.
+        """
+        new, updates, skipped = [], [], []
+        for line, row, book in books:
+            isbn13 = self.model.normalize_isbn(book['isbn'])
+            if not isbn13:
+                new.append((line, row, book))
+                continue
+            key = int(isbn13)
+            if key in seen:
+                skipped.append((line, row, f"Same ISBN as line {seen[key]}, skipped"))
+                continue
+            seen[key] = line
+            if key not in known:
+                new.append((line, row, book))
+            elif self.duplicates == 'skip':
+                skipped.append((line, row, f"ISBN already in the catalog (book {known[key]}), skipped"))
+            else:
+                updates.append((line, row, dict(book, book_id=known[key])))
+        return new, updates, skipped
+
+    def parse(self, row):
+        book_data = {key: (row.get(key) or '').strip() for key in BOOK_FIELDS}
+        # NULL rather than 0: the schema's CHECKs reject 0 years and pages
+        book_data['publication_year'] = self.parse_int(book_data['publication_year'], "Publication year")
+        book_data['pages'] = self.parse_int(book_data['pages'], "Pages")
+        # Books without an ISBN must not collide on the unique isbn column
+        book_data['isbn'] = book_data['isbn'] or None
+        return book_data
+
+class MemberImportEngine(CsvImportEngine):
+    """Imports a CSV file of members.
+
+    Uniqueness is checked for a whole batch with one query (MemberModel.find_taken)
+    and against earlier lines in memory, instead of two queries per member.
+    Blank member numbers are assigned in bulk by MemberModel.insert_members.
+    """
+    fields = MEMBER_FIELDS
+    noun = 'member'
+
+    def begin(self):
+        self.seen_emails = {}
+        self.seen_numbers = {}
+
+    def import_batch(self, batch):
+        members, failures = self.validate_batch(batch)
+        if not members:
+            return 0, [], failures
+        taken_emails, taken_numbers = self.model.find_taken(
+            {member['email'] for _, _, member in members},
+            {member['member_number'] for _, _, member in members if member['member_number']}
+        )
+        new = []
+        for line, row, member in members:
+            email, number = member['email'], member['member_number']
+            if email in taken_emails:
+                failures.append((line, row, "Email address already exists"))
+            elif number in taken_numbers:
+                failures.append((line, row, "Member number already exists"))
+            elif email in self.seen_emails:
+                failures.append((line, row, f"Same email as line {self.seen_emails[email]}"))
+            elif number and number in self.seen_numbers:
+                failures.append((line, row, f"Same member number as line {self.seen_numbers[number]}"))
+            else:
+                self.seen_emails[email] = line
+                if number:
+                    self.seen_numbers[number] = line
+                new.append((line, row, member))
+        if new:
+            for i, reason in self.model.insert_members([member for _, _, member in new]):
+                line, row, _ = new[i]
+                failures.append((line, row, reason))
+        return 0, [], failures
+
+    def prepared(self, member):
+        member['date_of_birth'] = member['date_of_birth'] or None
+        return member
+
+    def parse(self, row):
+        """Member fields from a CSV row, with the member form's defaults for blank ones"""
+        member_data = {key: (row.get(key) or '').strip() for key in MEMBER_FIELDS}
+        today = date.today()
+        member_data['membership_date'] = member_data['membership_date'] or today.isoformat()
+        if not member_data['membership_expiry']:
+            try:
+                start = datetime.strptime(member_data['membership_date'], '%Y-%m-%d').date()
+                # One year on, with 29 February moving to the 28th like QDate.addYears
+                day = 28 if (start.month, start.day) == (2, 29) else start.day
+                member_data['membership_expiry'] = start.replace(year=start.year + 1, day=day).isoformat()
+            except ValueError:
+                # Reported by validation as an invalid membership date
+                pass
+        member_data['membership_status'] = (member_data['membership_status'] or 'active').lower()
+        member_data['max_books_allowed'] = self.parse_int(member_data['max_books_allowed'], "Maximum books allowed", 5)
+        member_data['max_renewal_allowed'] = self.parse_int(member_data['max_renewal_allowed'], "Maximum renewals allowed", 2)
+        return member_data
@@ -1,112 +1,294 @@
 import logging
-import re
 from datetime import datetime, date, timedelta
 from sqlalchemy import text, select, func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from db.streaming import stream_rows, CHUNK_SIZE
+from db.unit_of_work import session_scope
+from models.validation import member_errors, email_ok, phone_ok
+from models.member_numbers import MemberNumberAllocator
+from models.member_search import search_keys, search_filter
 
 logger = logging.getLogger(__name__)
 
+MEMBER_INSERT_SQL = """
+    INSERT INTO members (
+        member_number, first_name, last_name, email, phone,
+        date_of_birth, address, membership_date, membership_expiry,
+        membership_status, max_books_allowed, max_renewal_allowed,
+        emergency_contact_name, emergency_contact_phone, member_notes,
+        phone_digits, email_lower, name_key, is_active
+    ) VALUES (
+        :member_number, :first_name, :last_name, :email, :phone,
+        :date_of_birth, :address, :membership_date, :membership_expiry,
+        :membership_status, :max_books_allowed, :max_renewal_allowed,
+        :emergency_contact_name, :emergency_contact_phone, :member_notes,
+        :phone_digits, :email_lower, :name_key, true
+    )
+"""
+
+# RETURNING list that gives a written member the same shape as a get_members row
+MEMBER_ROW_RETURNING = """
+    RETURNING member_id, member_number, first_name, last_name,
+              email, phone, membership_status,
+              membership_date, membership_expiry,
+              (SELECT COUNT(*) FROM loans l
+               WHERE l.member_id = members.member_id AND l.loan_status = 'active') AS active_loans,
+              (SELECT COALESCE(SUM(f.amount), 0) FROM fines f
+               WHERE f.member_id = members.member_id AND f.fine_status = 'pending') AS total_outstanding_fines,
+              (SELECT MAX(l.loan_date) FROM loans l
+               WHERE l.member_id = members.member_id AND l.loan_status = 'active') AS last_activity
+"""
+
+# Member rows carry (first_name, last_name) as one cell; exports split it
+MEMBER_EXPORT_COLUMNS = ['member_id', 'member_number', 'first_name', 'last_name', 'email', 'phone',
+                         'membership_status', 'membership_date', 'membership_expiry', 'active_loans',
+                         'total_outstanding_fines', 'last_activity']
+
+def member_export_row(row):
+    return row[:2] + row[2] + row[3:]
+
+PAGE_SIZE = 200
+
+# Loans and fines are aggregated per member (one index-only lookup each), so a
+# member with several loans and fines is still one row and fines are summed
+# once each. Being LATERAL, a page sorted on a member column only aggregates
+# for the members on that page. Filters go in {where}.
+MEMBERS_QUERY = """
+    SELECT m.member_id, m.member_number,
+           m.first_name, m.last_name,
+           m.email, m.phone, m.membership_status,
+           m.membership_date, m.membership_expiry,
+           l.active_loans,
+           COALESCE(f.total_outstanding_fines, 0) AS total_outstanding_fines,
+           l.last_activity
+    FROM members m
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS active_loans, MAX(loan_date) AS last_activity
+        FROM loans
+        WHERE member_id = m.member_id AND loan_status = 'active'
+    ) l
+    CROSS JOIN LATERAL (
+        SELECT SUM(amount) AS total_outstanding_fines
+        FROM fines
+        WHERE member_id = m.member_id AND fine_status = 'pending'
+    ) f
+    WHERE {where}
+    ORDER BY {order_by}
+"""
+
+# Keyset sort expressions and the value NULLs collapse to, so (key, member_id) is totally ordered
+MEMBER_SORT_KEYS = {
+    'member_id': ("m.member_id", 0),
+    'member_number': ("m.member_number", ''),
+    'first_name': ("m.first_name", ''),
+    'last_name': ("m.last_name", ''),
+    'email': ("COALESCE(m.email, '')", ''),
+    'phone': ("COALESCE(m.phone, '')", ''),
+    'membership_status': ("COALESCE(m.membership_status::text, '')", ''),
+    'membership_date': ("m.membership_date", date.min),
+    'membership_expiry': ("m.membership_expiry", date.min),
+    'active_loans': ("l.active_loans", 0),
+    'total_outstanding_fines': ("COALESCE(f.total_outstanding_fines, 0)", 0),
+    'last_activity': ("COALESCE(l.last_activity, DATE '0001-01-01')", date.min),
+}
+
+MEMBER_LOANS_QUERY = text("""
+    SELECT l.loan_id, b.title, l.loan_date, l.due_date,
+           l.return_date, l.loan_status, l.renewal_count
+    FROM loans l
+    JOIN book_copies bc ON l.copy_id = bc.copy_id
+    JOIN books b ON bc.book_id = b.book_id
+    WHERE l.member_id = :member_id
+    ORDER BY l.loan_date DESC
+""")
+
 class MemberModel:
     def __init__(self, session_pool):
         self.session_pool = session_pool
+        self.member_numbers = MemberNumberAllocator(session_pool)
         
     def get_members(self, search_query=None, status=None, membership_type=None, 
                    sort_by='last_name', sort_order='ASC'):
         """Retrieve members with loan counts and fine totals"""
         try:
             with self.session_pool() as session:
-                query = text("""
-                    SELECT m.member_id, m.member_number, 
-                           m.first_name, m.last_name,
-                           m.email, m.phone, m.membership_status,
-                           m.membership_date, m.membership_expiry,
-                           COUNT(DISTINCT l.loan_id) as active_loans,
-                           COALESCE(SUM(f.amount), 0) as total_outstanding_fines,
-                           MAX(l.loan_date) as last_activity
-                    FROM members m
-                    LEFT JOIN loans l ON m.member_id = l.member_id AND l.loan_status = 'active'
-                    LEFT JOIN fines f ON m.member_id = f.member_id AND f.fine_status = 'pending'
-                    WHERE m.is_active = true
-                    GROUP BY m.member_id
-                """)
-                
-                params = {}
-                if search_query:
-                    query = text(str(query) + """
-                        AND (m.first_name ILIKE :search 
-                             OR m.last_name ILIKE :search 
-                             OR m.email ILIKE :search 
-                             OR m.member_number ILIKE :search 
-                             OR m.phone ILIKE :search)
-                    """)
-                    params['search'] = f'%{search_query}%'
-                
-                if status:
-                    query = text(str(query) + " AND m.membership_status = :status")
-                    params['status'] = status
-                
-                if membership_type:
-                    query = text(str(query) + " AND m.membership_type = :membership_type")
-                    params['membership_type'] = membership_type
-                
-                if sort_by in ['member_id', 'member_number', 'first_name', 'last_name', 
-                              'email', 'phone', 'membership_status', 'membership_date',
-                              'membership_expiry', 'active_loans', 'total_outstanding_fines',
-                              'last_activity']:
-                    query = text(str(query) + f" ORDER BY m.{sort_by} {sort_order}")
-                
+                query, params = self._members_query(search_query, status, membership_type, sort_by, sort_order)
                 result = session.execute(query, params).fetchall()
-                return [
-                    (row.member_id, row.member_number, (row.first_name, row.last_name),
-                     row.email, row.phone, row.membership_status, row.membership_date,
-                     row.membership_expiry, row.active_loans, row.total_outstanding_fines,
-                     row.last_activity)
-                    for row in result
-                ]
+                return [self._member_row(row) for row in result]
                 
         except Exception as e:
             logger.error(f"Error retrieving members: {str(e)}")
             raise
-    
-    def add_member(self, member_data):
-        """Add a new member to the database"""
+
+    def iter_members(self, search_query=None, status=None, membership_type=None,
+                     sort_by='last_name', sort_order='ASC', chunk_size=CHUNK_SIZE):
+        """Stream the rows of get_members in chunks from a server-side cursor"""
         try:
             with self.session_pool() as session:
-                insert_query = text("""
-                    INSERT INTO members (
-                        member_number, first_name, last_name, email, phone,
-                        date_of_birth, address, membership_date, membership_expiry,
-                        membership_status, max_books_allowed, max_renewal_allowed,
-                        emergency_contact_name, emergency_contact_phone, member_notes,
-                        is_active
-                    ) VALUES (
-                        :member_number, :first_name, :last_name, :email, :phone,
-                        :date_of_birth, :address, :membership_date, :membership_expiry,
-                        :membership_status, :max_books_allowed, :max_renewal_allowed,
-                        :emergency_contact_name, :emergency_contact_phone, :member_notes,
-                        true
-                    ) RETURNING member_id
-                """)
+                query, params = self._members_query(search_query, status, membership_type, sort_by, sort_order)
+                yield from stream_rows(session, query, params, self._member_row, chunk_size=chunk_size)
+
+        except Exception as e:
+            logger.error(f"Error streaming members: {str(e)}")
+            raise
+
+    def get_members_page(self, search_query=None, status=None, membership_type=None,
+                         sort_by='last_name', sort_order='ASC', after=None, limit=PAGE_SIZE):
+        """Fetch one page of members using keyset pagination.
+
+        `after` is the cursor returned with the previous page, or None for the first page.
+        Returns (rows, next_cursor); next_cursor is None once the last page has been read.
+        """
+        try:
+            with self.session_pool() as session:
+                conditions, params = self._member_filters(search_query, status, membership_type)
+                sort_by, sort_order = self._resolve_sort(sort_by, sort_order)
+                sort_key = MEMBER_SORT_KEYS[sort_by][0]
+                if after is not None:
+                    comparison = '>' if sort_order == 'ASC' else '<'
+                    conditions.append(f"({sort_key}, m.member_id) {comparison} (:after_key, :after_id)")
+                    params['after_key'], params['after_id'] = after
+
+                query = MEMBERS_QUERY.format(
+                    where=' AND '.join(conditions),
+                    order_by=f"{sort_key} {sort_order}, m.member_id {sort_order}"
+                ) + " LIMIT :limit"
+                # Fetch one extra row to find out whether another page exists
+                params['limit'] = limit + 1
+
+                rows = session.execute(text(query), params).fetchall()
+                if len(rows) <= limit:
+                    return [self._member_row(row) for row in rows], None
+                rows = rows[:limit]
+                return [self._member_row(row) for row in rows], self._page_cursor(rows[-1], sort_by)
+
+        except Exception as e:
+            logger.error(f"Error retrieving members page: {str(e)}")
+            raise
+
+    def _members_query(self, search_query, status, membership_type, sort_by, sort_order):
+        """Unpaged member query shared by get_members and iter_members"""
+        conditions, params = self._member_filters(search_query, status, membership_type)
+        sort_by, sort_order = self._resolve_sort(sort_by, sort_order)
+        query = text(MEMBERS_QUERY.format(
+            where=' AND '.join(conditions),
+            order_by=f"{MEMBER_SORT_KEYS[sort_by][0]} {sort_order}, m.member_id {sort_order}"
+        ))
+        return query, params
+
+    def _member_filters(self, search_query, status, membership_type):
+        conditions = ["m.is_active = true"]
+        params = {}
+        if search_query:
+            condition, search_params = search_filter(search_query)
+            conditions.append(condition)
+            params.update(search_params)
+        
+        if status:
+            conditions.append("m.membership_status = :status")
+            params['status'] = status
+        
+        if membership_type:
+            conditions.append("m.membership_type = :membership_type")
+            params['membership_type'] = membership_type
+        return conditions, params
+
+    def _resolve_sort(self, sort_by, sort_order):
+        """Fall back to last name for unknown columns; only ASC and DESC reach the SQL"""
+        sort_by = sort_by if sort_by in MEMBER_SORT_KEYS else 'last_name'
+        return sort_by, 'DESC' if str(sort_order).upper() == 'DESC' else 'ASC'
+
+    def _page_cursor(self, row, sort_by):
+        """Keyset cursor (sort value, member_id) for the last row of a page"""
+        default = MEMBER_SORT_KEYS[sort_by][1]
+        value = getattr(row, sort_by)
+        return (value if value is not None else default, row.member_id)
+
+    def _member_row(self, row):
+        return (row.member_id, row.member_number, (row.first_name, row.last_name),
+                row.email, row.phone, row.membership_status, row.membership_date,
+                row.membership_expiry, row.active_loans, row.total_outstanding_fines,
+                row.last_activity)
+    
+    def add_member(self, member_data, uow=None):
+        """Add a new member to the database and return its table row"""
+        try:
+            with session_scope(self.session_pool, uow) as session:
+                insert_query = text(MEMBER_INSERT_SQL + MEMBER_ROW_RETURNING)
                 
-                result = session.execute(insert_query, member_data)
-                session.commit()
-                return result.scalar()
+                row = session.execute(insert_query, dict(member_data, **search_keys(member_data))).fetchone()
+                return self._member_row(row)
                 
         except IntegrityError as e:
-            session.rollback()
             logger.error(f"Integrity error adding member: {str(e)}")
             raise ValueError("Member number or email already exists")
         except Exception as e:
-            session.rollback()
             logger.error(f"Error adding member: {str(e)}")
             raise
     
-    def update_member(self, member_id, member_data):
-        """Update existing member data"""
+    def insert_members(self, members):
+        """Insert a batch of validated members with one executemany in one transaction.
+
+        Members without a member number are given consecutive ones. If the
+        batch hits a constraint (e.g. an email added meanwhile) it is retried
+        row by row under savepoints. Returns [(index in members, reason)] for
+        the rejected rows.
+        """
+        try:
+            with session_scope(self.session_pool) as session:
+                insert_query = text(MEMBER_INSERT_SQL)
+                try:
+                    session.execute(insert_query, self._numbered(session, members))
+                    session.commit()
+                    return []
+                except IntegrityError:
+                    session.rollback()
+                rejected = []
+                for i, member in enumerate(self._numbered(session, members)):
+                    try:
+                        with session.begin_nested():
+                            session.execute(insert_query, member)
+                    except IntegrityError as e:
+                        rejected.append((i, str(e.orig)))
+                return rejected
+
+        except Exception as e:
+            logger.error(f"Error importing members: {str(e)}")
+            raise
+
+    def _numbered(self, session, members):
+        """Copies of members with a member number filled in where it is blank, and their search keys"""
+        blanks = sum(1 for member in members if not member['member_number'])
+        numbers = iter(self.member_numbers.allocate_many(blanks, session))
+        return [dict(member, member_number=member['member_number'] or next(numbers), **search_keys(member))
+                for member in members]
+
+    def find_taken(self, emails, member_numbers):
+        """Which of emails and member_numbers are already stored, in one query.
+
+        Deleted members count too, as the unique constraints still hold their
+        values. Returns (taken emails, taken member numbers) as sets.
+        """
         try:
             with self.session_pool() as session:
-                update_query = text("""
+                rows = session.execute(text("""
+                    SELECT email, member_number FROM members
+                    WHERE email = ANY(:emails) OR member_number = ANY(:member_numbers)
+                """), {'emails': list(emails), 'member_numbers': list(member_numbers)}).fetchall()
+                emails, member_numbers = set(emails), set(member_numbers)
+                return ({row.email for row in rows if row.email in emails},
+                        {row.member_number for row in rows if row.member_number in member_numbers})
+
+        except Exception as e:
+            logger.error(f"Error checking member uniqueness: {str(e)}")
+            raise
+
+    def update_member(self, member_id, member_data, uow=None):
+        """Update existing member data and return its table row"""
+        try:
+            with session_scope(self.session_pool, uow) as session:
+                update_query = text(f"""
                     UPDATE members
                     SET first_name = :first_name,
                         last_name = :last_name,
@@ -121,27 +303,29 @@ class MemberModel:
                         max_renewal_allowed = :max_renewal_allowed,
                         emergency_contact_name = :emergency_contact_name,
                         emergency_contact_phone = :emergency_contact_phone,
-                        member_notes = :member_notes
+                        member_notes = :member_notes,
+                        phone_digits = :phone_digits,
+                        email_lower = :email_lower,
+                        name_key = :name_key
                     WHERE member_id = :member_id
+                    {MEMBER_ROW_RETURNING}
                 """)
                 
                 member_data['member_id'] = member_id
-                session.execute(update_query, member_data)
-                session.commit()
+                row = session.execute(update_query, dict(member_data, **search_keys(member_data))).fetchone()
+                return self._member_row(row) if row else None
                 
         except IntegrityError as e:
-            session.rollback()
             logger.error(f"Integrity error updating member: {str(e)}")
             raise ValueError("Email already exists")
         except Exception as e:
-            session.rollback()
             logger.error(f"Error updating member: {str(e)}")
             raise
     
     def delete_member(self, member_id):
         """Soft delete a member"""
         try:
-            with self.session_pool() as session:
+            with session_scope(self.session_pool) as session:
                 # Check for active loans
                 loan_check = session.execute(
                     text("SELECT COUNT(*) FROM loans WHERE member_id = :member_id AND loan_status = 'active'"),
@@ -155,30 +339,28 @@ class MemberModel:
                     text("UPDATE members SET is_active = false WHERE member_id = :member_id"),
                     {'member_id': member_id}
                 )
-                session.commit()
                 
         except Exception as e:
-            session.rollback()
             logger.error(f"Error deleting member: {str(e)}")
             raise
     
     def renew_membership(self, member_id, new_expiry_date):
-        """Renew membership with new expiry date"""
+        """Renew membership with new expiry date and return the member's table row"""
         try:
-            with self.session_pool() as session:
-                session.execute(
-                    text("""
+            with session_scope(self.session_pool) as session:
+                row = session.execute(
+                    text(f"""
                         UPDATE members
                         SET membership_expiry = :new_expiry_date,
                             membership_status = 'active'
                         WHERE member_id = :member_id
+                        {MEMBER_ROW_RETURNING}
                     """),
                     {'member_id': member_id, 'new_expiry_date': new_expiry_date}
-                )
-                session.commit()
+                ).fetchone()
+                return self._member_row(row) if row else None
                 
         except Exception as e:
-            session.rollback()
             logger.error(f"Error renewing membership: {str(e)}")
             raise
     
@@ -186,26 +368,27 @@ class MemberModel:
         """Get complete loan history for a member"""
         try:
             with self.session_pool() as session:
-                query = text("""
-                    SELECT l.loan_id, b.title, l.loan_date, l.due_date,
-                           l.return_date, l.loan_status, l.renewal_count
-                    FROM loans l
-                    JOIN book_copies bc ON l.copy_id = bc.copy_id
-                    JOIN books b ON bc.book_id = b.book_id
-                    WHERE l.member_id = :member_id
-                    ORDER BY l.loan_date DESC
-                """)
-                
-                result = session.execute(query, {'member_id': member_id}).fetchall()
-                return [
-                    (row.loan_id, row.title, row.loan_date, row.due_date,
-                     row.return_date, row.loan_status, row.renewal_count)
-                    for row in result
-                ]
+                result = session.execute(MEMBER_LOANS_QUERY, {'member_id': member_id}).fetchall()
+                return [self._loan_row(row) for row in result]
                 
         except Exception as e:
             logger.error(f"Error retrieving member loans: {str(e)}")
             raise
+
+    def iter_member_loans(self, member_id, chunk_size=CHUNK_SIZE):
+        """Stream a member's loan history in chunks from a server-side cursor"""
+        try:
+            with self.session_pool() as session:
+                yield from stream_rows(session, MEMBER_LOANS_QUERY, {'member_id': member_id},
+                                       self._loan_row, chunk_size=chunk_size)
+
+        except Exception as e:
+            logger.error(f"Error streaming member loans: {str(e)}")
+            raise
+
+    def _loan_row(self, row):
+        return (row.loan_id, row.title, row.loan_date, row.due_date,
+                row.return_date, row.loan_status, row.renewal_count)
     
     def get_member_fines(self, member_id):
         """Get outstanding fines for a member"""
@@ -234,13 +417,12 @@ class MemberModel:
             with self.session_pool() as session:
                 query = text("""
                     SELECT m.membership_status, m.max_books_allowed,
-                           COUNT(l.loan_id) as active_loans,
-                           COALESCE(SUM(f.amount), 0) as total_fines
+                           (SELECT COUNT(*) FROM loans l
+                            WHERE l.member_id = m.member_id AND l.loan_status = 'active') as active_loans,
+                           (SELECT COALESCE(SUM(f.amount), 0) FROM fines f
+                            WHERE f.member_id = m.member_id AND f.fine_status = 'pending') as total_fines
                     FROM members m
-                    LEFT JOIN loans l ON m.member_id = l.member_id AND l.loan_status = 'active'
-                    LEFT JOIN fines f ON m.member_id = f.member_id AND f.fine_status = 'pending'
                     WHERE m.member_id = :member_id AND m.is_active = true
-                    GROUP BY m.member_id
                 """)
                 
                 result = session.execute(query, {'member_id': member_id}).fetchone()
@@ -262,134 +444,58 @@ class MemberModel:
             logger.error(f"Error checking member eligibility: {str(e)}")
             raise
     
-    def validate_member_data(self, member_data):
-        """Validate member data before saving"""
-        errors = []
-        
-        # Required fields
-        if not member_data['first_name']:
-            errors.append("First name is required")
-        if not member_data['last_name']:
-            errors.append("Last name is required")
-        if not member_data['email']:
-            errors.append("Email is required")
-            
-        # Length validations
-        if len(member_data['first_name']) > 100:
-            errors.append("First name must be 100 characters or less")
-        if len(member_data['last_name']) > 100:
-            errors.append("Last name must be 100 characters or less")
-        if len(member_data['email']) > 255:
-            errors.append("Email must be 255 characters or less")
-            
-        # Format validations
-        if member_data['email'] and not self.validate_email(member_data['email']):
-            errors.append("Invalid email format")
-        if member_data['phone'] and not self.validate_phone(member_data['phone']):
-            errors.append("Invalid phone number format")
-            
-        # Date validations
-        try:
-            dob = datetime.strptime(member_data['date_of_birth'], '%Y-%m-%d').date()
-            if dob > date.today().replace(year=date.today().year-1):
-                errors.append("Date of birth must be at least 1 year ago")
-        except ValueError:
-            errors.append("Invalid date of birth format")
-            
-        try:
-            membership_date = datetime.strptime(member_data['membership_date'], '%Y-%m-%d').date()
-            if membership_date > date.today():
-                errors.append("Membership date cannot be in the future")
-        except ValueError:
-            errors.append("Invalid membership date format")
-            
-        try:
-            expiry_date = datetime.strptime(member_data['membership_expiry'], '%Y-%m-%d').date()
-            if expiry_date < membership_date:
-                errors.append("Expiry date must be after membership date")
-        except ValueError:
-            errors.append("Invalid expiry date format")
-            
-        # Numeric validations
-        if not 1 <= member_data['max_books_allowed'] <= 20:
-            errors.append("Maximum books allowed must be between 1 and 20")
-        if not 0 <= member_data['max_renewal_allowed'] <= 10:
-            errors.append("Maximum renewals allowed must be between 0 and 10")
+    def validate_member_data(self, member_data, uow=None):
+        """Validate member data before saving; both uniqueness checks take one query"""
+        errors = self.validate_member_fields(member_data)
             
         # Uniqueness checks
-        if member_data['member_number'] and not self.is_member_number_unique(
-            member_data['member_number'], 
-            member_data.get('member_id')
-        ):
+        number_taken, email_taken = self.find_conflicts(
+            member_data['member_number'], member_data['email'], member_data.get('member_id'), uow
+        )
+        if number_taken:
             errors.append("Member number already exists")
-            
-        if not self.is_email_unique(
-            member_data['email'],
-            member_data.get('member_id')
-        ):
+        if email_taken:
             errors.append("Email address already exists")
             
         return errors
-    
-    def validate_email(self, email):
-        """Validate email format using regex"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
-    
-    def validate_phone(self, phone):
-        """Validate phone number format"""
-        pattern = r'^\+?1?\d{9,15}$'
-        return bool(re.match(pattern, phone)) if phone else True
-    
-    def is_member_number_unique(self, member_number, exclude_member_id=None):
-        """Check if member number is unique"""
+
+    def find_conflicts(self, member_number, email, exclude_member_id=None, uow=None):
+        """Whether another active member has member_number / email, as (bool, bool)"""
         try:
-            with self.session_pool() as session:
-                query = text("SELECT COUNT(*) FROM members WHERE member_number = :member_number AND is_active = true")
-                params = {'member_number': member_number}
+            with session_scope(self.session_pool, uow) as session:
+                query = """
+                    SELECT COALESCE(bool_or(member_number = :member_number), false) AS number_taken,
+                           COALESCE(bool_or(email = :email), false) AS email_taken
+                    FROM members
+                    WHERE (member_number = :member_number OR email = :email) AND is_active = true
+                """
+                # A blank member number is generated later, so it never conflicts
+                params = {'member_number': member_number or None, 'email': email}
                 if exclude_member_id:
-                    query = text(str(query) + " AND member_id != :member_id")
+                    query += " AND member_id != :member_id"
                     params['member_id'] = exclude_member_id
-                return session.execute(query, params).scalar() == 0
+                row = session.execute(text(query), params).fetchone()
+                return row.number_taken, row.email_taken
         except Exception as e:
-            logger.error(f"Error checking member number uniqueness: {str(e)}")
+            logger.error(f"Error checking member uniqueness: {str(e)}")
             raise
+
+    def validate_member_fields(self, member_data):
+        """Validate member data without touching the database (no uniqueness checks)"""
+        return member_errors(member_data)
     
-    def is_email_unique(self, email, exclude_member_id=None):
-        """Check if email is unique"""
-        try:
-            with self.session_pool() as session:
-                query = text("SELECT COUNT(*) FROM members WHERE email = :email AND is_active = true")
-                params = {'email': email}
-                if exclude_member_id:
-                    query = text(str(query) + " AND member_id != :member_id")
-                    params['member_id'] = exclude_member_id
-                return session.execute(query, params).scalar() == 0
-        except Exception as e:
-            logger.error(f"Error checking email uniqueness: {str(e)}")
-            raise
+    def validate_email(self, email):
+        """Validate email format using regex"""
+        return email_ok(email)
     
-    def generate_unique_member_number(self):
-        """Generate a unique member number"""
+    def validate_phone(self, phone):
+        """Validate phone number format"""
+        return phone_ok(phone)
+    
+    def generate_unique_member_number(self, uow=None):
+        """Generate a unique member number (usually without a database round trip)"""
         try:
-            with self.session_pool() as session:
-                year = datetime.now().year
-                base_number = f"MEM-{year}-"
-                query = text("SELECT member_number FROM members WHERE member_number LIKE :pattern ORDER BY member_number DESC LIMIT 1")
-                
-                result = session.execute(query, {'pattern': f'{base_number}%'}).scalar()
-                if result:
-                    last_num = int(result.split('-')[-1])
-                    new_num = last_num + 1
-                else:
-                    new_num = 1
-                
-                new_member_number = f"{base_number}{new_num:04d}"
-                while not self.is_member_number_unique(new_member_number):
-                    new_num += 1
-                    new_member_number = f"{base_number}{new_num:04d}"
-                    
-                return new_member_number
+            return self.member_numbers.allocate(uow.session if uow else None)
                 
         except Exception as e:
             logger.error(f"Error generating member number: {str(e)}")
@@ -459,4 +565,35 @@ class MemberModel:
                 
         except Exception as e:
             logger.error(f"Error retrieving membership statistics: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    def backfill_search_keys(self, batch_size=1000):
+        """Fill phone_digits, email_lower and name_key for members written before they were maintained.
+
+        Walks the table in member_id order, one transaction per batch, so it
+        can be stopped and rerun. Returns the rows updated.
+        """
+        try:
+            with session_scope(self.session_pool) as session:
+                updated = 0
+                last_id = 0
+                while True:
+                    rows = session.execute(text("""
+                        SELECT member_id, first_name, last_name, email, phone FROM members
+                        WHERE member_id > :last_id AND name_key IS NULL
+                        ORDER BY member_id
+                        LIMIT :limit
+                    """), {'last_id': last_id, 'limit': batch_size}).fetchall()
+                    if not rows:
+                        return updated
+                    last_id = rows[-1].member_id
+                    session.execute(text("""
+                        UPDATE members
+                        SET phone_digits = :phone_digits, email_lower = :email_lower, name_key = :name_key
+                        WHERE member_id = :member_id
+                    """), [dict(search_keys(row._mapping), member_id=row.member_id) for row in rows])
+                    session.commit()
+                    updated += len(rows)
+
+        except Exception as e:
+            logger.error(f"Error backfilling member search keys: {str(e)}")
+            raise
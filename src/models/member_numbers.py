@@ -0,0 +1,53 @@
+import threading
+from datetime import datetime
+from sqlalchemy import text
+
+# Must match INCREMENT BY of member_number_seq in schema.sql
+BLOCK_SIZE = 100
+
+class MemberNumberAllocator:
+    """Hands out MEM-<year>-NNNN member numbers from blocks reserved in the database.
+
+    Each nextval('member_number_seq') reserves BLOCK_SIZE numbers for this
+    process (hi/lo), so desks never race for the same number and most
+    allocations cost no round trip. Numbers left in a block when the
+    process exits are skipped, never reused. The counter runs on across
+    years; only the year in the prefix changes.
+    """
+    def __init__(self, session_pool, block_size=BLOCK_SIZE):
+        self.session_pool = session_pool
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        # Unused numbers of the reserved blocks, as [start, end) ranges
+        self.blocks = []
+
+    def allocate(self, session=None):
+        return self.allocate_many(1, session)[0]
+
+    def allocate_many(self, count, session=None):
+        """count new member numbers; reserves any blocks still needed with one query"""
+        with self.lock:
+            available = sum(end - start for start, end in self.blocks)
+            if available < count:
+                self._reserve(-(-(count - available) // self.block_size), session)
+            numbers = []
+            while len(numbers) < count:
+                start, end = self.blocks[0]
+                take = min(end - start, count - len(numbers))
+                numbers.extend(range(start, start + take))
+                if start + take == end:
+                    self.blocks.pop(0)
+                else:
+                    self.blocks[0] = (start + take, end)
+        year = datetime.now().year
+        return [f"MEM-{year}-{number:04d}" for number in numbers]
+
+    def _reserve(self, blocks, session=None):
+        # nextval is not transactional, so a caller's session can be used mid-transaction
+        query = text("SELECT nextval('member_number_seq') FROM generate_series(1, :blocks)")
+        if session is not None:
+            starts = session.execute(query, {'blocks': blocks}).scalars().all()
+        else:
+            with self.session_pool() as session:
+                starts = session.execute(query, {'blocks': blocks}).scalars().all()
+        self.blocks.extend((start, start + self.block_size) for start in starts)
@@ -0,0 +1,69 @@
+import re
+import unicodedata
+
+# Search input shapes, checked in this order
+EMAIL_SHAPE = re.compile(r'@')
+MEMBER_NUMBER_SHAPE = re.compile(r'^[A-Za-z]+-\d')
+PHONE_SHAPE = re.compile(r'^\+?[\d\s().-]*\d[\d\s().-]*$')
+NON_DIGITS = re.compile(r'[^0-9]')
+
+def phone_digits(phone):
+    """Digits of a phone number, so '+1 (555) 010-2030' and '15550102030' match"""
+    digits = NON_DIGITS.sub('', phone or '')
+    return digits or None
+
+def email_key(email):
+    email = (email or '').strip().lower()
+    return email or None
+
+def name_key(*parts):
+    """Lower-cased name with accents removed and spaces collapsed ('José  Núñez' -> 'jose nunez')"""
+    text = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.casefold().split())
+
+def search_keys(member_data):
+    """The stored search columns for a member's fields"""
+    return {
+        'phone_digits': phone_digits(member_data.get('phone')),
+        'email_lower': email_key(member_data.get('email')),
+        'name_key': name_key(member_data.get('first_name'), member_data.get('last_name')),
+    }
+
+def _like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def search_filter(search_query):
+    """SQL condition over members m and its params for a desk search, chosen by the query's shape.
+
+    Each shape is answered by one index on the normalized columns:
+    an email (contains @) by an email prefix, a member number (MEM-...) by
+    a number prefix, a phone number (digits and phone punctuation) by a
+    digit substring, and anything else by every word appearing in the
+    name, or by an email prefix.
+    """
+    query = search_query.strip()
+    if EMAIL_SHAPE.search(query):
+        return "m.email_lower LIKE :email_prefix", {'email_prefix': _like(email_key(query)) + '%'}
+    if MEMBER_NUMBER_SHAPE.match(query):
+        return "upper(m.member_number) LIKE :number_prefix", {'number_prefix': _like(query.upper()) + '%'}
+    if PHONE_SHAPE.match(query):
+        return "m.phone_digits LIKE :phone_digits", {'phone_digits': '%' + phone_digits(query) + '%'}
+    words = name_key(query).split()
+    params = {f'name_{i}': '%' + _like(word) + '%' for i, word in enumerate(words)}
+    params['email_prefix'] = _like(email_key(query)) + '%'
+    names = ' AND '.join(f"m.name_key LIKE :name_{i}" for i in range(len(words)))
+    return f"(({names}) OR m.email_lower LIKE :email_prefix)", params
+
+def matches_search(search_query, first_name, last_name, email, member_number, phone):
+    """Whether a member matches a desk search the way search_filter finds it"""
+    query = search_query.strip()
+    if EMAIL_SHAPE.search(query):
+        return (email_key(email) or '').startswith(email_key(query))
+    if MEMBER_NUMBER_SHAPE.match(query):
+        return (member_number or '').upper().startswith(query.upper())
+    if PHONE_SHAPE.match(query):
+        return phone_digits(query) in (phone_digits(phone) or '')
+    name = name_key(first_name, last_name)
+    return (all(word in name for word in name_key(query).split())
+            or (email_key(email) or '').startswith(email_key(query)))
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """Thread-safe LRU cache of query results with a time-to-live per entry.
+
+    Keys are normalized filter tuples. Writers call invalidate() with a
+    predicate, so only entries the write could have changed are dropped.
+    """
+    def __init__(self, max_entries=128, ttl=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; results read before a write are not stored after it
+        self.version = 0
+
+    def get(self, key):
+        """Return (True, value) for a fresh entry, otherwise (False, None)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self.clock():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, version=None):
+        """Store a result; pass the version read before querying to skip results a write has outdated"""
+        with self.lock:
+            if version is not None and version != self.version:
+                return
+            self.entries[key] = (value, self.clock() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        """Drop entries for which predicate(key, value) is true, or all of them; returns the count"""
+        with self.lock:
+            stale = [key for key, (value, _) in self.entries.items() if predicate is None or predicate(key, value)]
+            for key in stale:
+                del self.entries[key]
+            self.invalidations += len(stale)
+            self.version += 1
+            return len(stale)
+
+    def patch(self, predicate, fn):
+        """Update entries for which predicate(key, value) is true in place with fn(key, value)"""
+        with self.lock:
+            matching = [(key, value) for key, (value, _) in self.entries.items() if predicate(key, value)]
+            for key, value in matching:
+                fn(key, value)
+            self.version += 1
+            return len(matching)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
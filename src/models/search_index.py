@@ -0,0 +1,102 @@
+import re
+from bisect import bisect_left, insort
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Hyphens inside ISBNs are dropped, so '978-0-13' and '978013' give the same token
+ISBN_HYPHEN = re.compile(r"(?<=[0-9Xx])-(?=[0-9Xx])")
+
+# Shorter words only match whole tokens; expanding 'a' would touch most of the vocabulary
+MIN_PREFIX = 2
+
+def tokenize(text):
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(ISBN_HYPHEN.sub('', str(text)).casefold())
+
+def is_prefix_word(word):
+    return len(word) >= MIN_PREFIX
+
+def word_matches(word, token):
+    """Whether a searched word matches a token: as a prefix, or whole if it is too short for one"""
+    return token.startswith(word) if is_prefix_word(word) else token == word
+
+def matches(text, *fields):
+    """Whether every word of text matches a token of the fields, the way every book search does"""
+    tokens = {token for field in fields for token in tokenize(field)}
+    return all(any(word_matches(word, token) for token in tokens) for word in tokenize(text))
+
+class SearchIndex:
+    """Inverted index from title, author, ISBN and genre tokens to book ids.
+
+    Tokens are also kept in a sorted list, so searched words are matched as
+    prefixes with a bisect instead of a scan. The index is built
+    once from the catalog cache and then patched per book write.
+    """
+    def __init__(self):
+        self.postings = {}
+        # book_id -> tokens it was indexed under, so re-indexing can unlink the old ones
+        self.documents = {}
+        self.tokens = []
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        index = cls()
+        for i in catalog.live():
+            index._link(int(catalog.book_id[i]), catalog.title[i], catalog.author[i], catalog.isbn[i], catalog.genre(i))
+        index.tokens = sorted(index.postings)
+        return index
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, book_id, title=None, author=None, isbn=None, genre=None):
+        """Index a new book or re-index an updated one"""
+        self.remove(book_id)
+        for token in self._link(book_id, title, author, isbn, genre):
+            insort(self.tokens, token)
+
+    def remove(self, book_id):
+        for token in self.documents.pop(book_id, ()):
+            ids = self.postings[token]
+            ids.discard(book_id)
+            if not ids:
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+
+    def _link(self, book_id, *fields):
+        """Add the book to its tokens' postings; returns tokens new to the vocabulary"""
+        tokens = frozenset(token for field in fields for token in tokenize(field))
+        self.documents[book_id] = tokens
+        new_tokens = []
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                new_tokens.append(token)
+            ids.add(book_id)
+        return new_tokens
+
+    def prefix_matches(self, prefix):
+        matches = set()
+        for i in range(bisect_left(self.tokens, prefix), len(self.tokens)):
+            token = self.tokens[i]
+            if not token.startswith(prefix):
+                break
+            matches |= self.postings[token]
+        return matches
+
+    def search(self, text):
+        """Ids of books where every word of text starts a token; None for empty text"""
+        words = tokenize(text)
+        if not words:
+            return None
+        candidates = [self.prefix_matches(word) if is_prefix_word(word) else self.postings.get(word, set())
+                      for word in set(words)]
+        # Intersect starting from the rarest word
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            if not result:
+                break
+            result &= ids
+        return result
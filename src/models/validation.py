@@ -0,0 +1,173 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from datetime import date, datetime
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_PATTERN = re.compile(r'^\+?1?\d{9,15}$')
+ISBN10_PATTERN = re.compile(r'^\d{9}[\dX]$')
+ISBN13_PATTERN = re.compile(r'^\d{13}$')
+
+MEMBERSHIP_STATUSES = ('active', 'expired', 'suspended', 'cancelled')
+
+# Below this many records, or with one CPU, the pool costs more than it saves
+PARALLEL_THRESHOLD = 50000
+
+def isbn_checksum_ok(isbn):
+    if not isbn:
+        return True
+    isbn = isbn.replace('-', '').replace(' ', '')
+    if ISBN10_PATTERN.match(isbn):
+        total = sum((10 - i) * int(c) for i, c in enumerate(isbn[:9]))
+        return (11 - (total % 11)) % 11 == (10 if isbn[-1] == 'X' else int(isbn[-1]))
+    if ISBN13_PATTERN.match(isbn):
+        total = sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(isbn[:12]))
+        return (10 - (total % 10)) % 10 == int(isbn[-1])
+    return False
+
+def email_ok(email):
+    return bool(EMAIL_PATTERN.match(email))
+
+def phone_ok(phone):
+    return bool(PHONE_PATTERN.match(phone)) if phone else True
+
+def book_errors(book_data, max_year=None):
+    max_year = max_year or datetime.now().year + 1
+    errors = []
+    if not book_data.get('title') or len(book_data['title'].strip()) < 1:
+        errors.append("Title is required")
+    if book_data.get('title') and len(book_data['title']) > 255:
+        errors.append("Title must be 255 characters or less")
+    if not book_data.get('author') or len(book_data['author'].strip()) < 1:
+        errors.append("Author is required")
+    if book_data.get('author') and len(book_data['author']) > 255:
+        errors.append("Author must be 255 characters or less")
+    if book_data.get('isbn') and not isbn_checksum_ok(book_data['isbn']):
+        errors.append("Invalid ISBN checksum")
+    if book_data.get('publication_year') and not (1000 < book_data['publication_year'] <= max_year):
+        errors.append(f"Publication year must be between 1000 and {max_year}")
+    if book_data.get('pages') and book_data['pages'] <= 0:
+        errors.append("Pages must be greater than 0")
+    if book_data.get('publisher') and len(book_data['publisher']) > 255:
+        errors.append("Publisher must be 255 characters or less")
+    if book_data.get('subtitle') and len(book_data['subtitle']) > 255:
+        errors.append("Subtitle must be 255 characters or less")
+    if book_data.get('description') and len(book_data['description']) > 1000:
+        errors.append("Description must be 1000 characters or less")
+    return errors
+
+def member_errors(member_data, today=None):
+    """Member field checks that need no database (uniqueness is checked by the model)"""
+    today = today or date.today()
+    errors = []
+
+    # Required fields
+    if not member_data['first_name']:
+        errors.append("First name is required")
+    if not member_data['last_name']:
+        errors.append("Last name is required")
+    if not member_data['email']:
+        errors.append("Email is required")
+
+    # Length validations
+    if len(member_data['first_name']) > 100:
+        errors.append("First name must be 100 characters or less")
+    if len(member_data['last_name']) > 100:
+        errors.append("Last name must be 100 characters or less")
+    if len(member_data['email']) > 255:
+        errors.append("Email must be 255 characters or less")
+
+    # Format validations
+    if member_data['email'] and not email_ok(member_data['email']):
+        errors.append("Invalid email format")
+    if member_data['phone'] and not phone_ok(member_data['phone']):
+        errors.append("Invalid phone number format")
+
+    if member_data.get('membership_status') not in MEMBERSHIP_STATUSES:
+        errors.append(f"Membership status must be one of {', '.join(MEMBERSHIP_STATUSES)}")
+
+    # Date validations
+    try:
+        # Optional in the schema; the member form always sends one
+        if member_data['date_of_birth']:
+            dob = datetime.strptime(member_data['date_of_birth'], '%Y-%m-%d').date()
+            if dob > today.replace(year=today.year - 1, day=min(today.day, 28) if today.month == 2 else today.day):
+                errors.append("Date of birth must be at least 1 year ago")
+    except ValueError:
+        errors.append("Invalid date of birth format")
+
+    membership_date = None
+    try:
+        membership_date = datetime.strptime(member_data['membership_date'], '%Y-%m-%d').date()
+        if membership_date > today:
+            errors.append("Membership date cannot be in the future")
+    except ValueError:
+        errors.append("Invalid membership date format")
+
+    try:
+        expiry_date = datetime.strptime(member_data['membership_expiry'], '%Y-%m-%d').date()
+        if membership_date and expiry_date < membership_date:
+            errors.append("Expiry date must be after membership date")
+    except ValueError:
+        errors.append("Invalid expiry date format")
+
+    # Numeric validations
+    if not 1 <= member_data['max_books_allowed'] <= 20:
+        errors.append("Maximum books allowed must be between 1 and 20")
+    if not 0 <= member_data['max_renewal_allowed'] <= 10:
+        errors.append("Maximum renewals allowed must be between 0 and 10")
+
+    return errors
+
+VALIDATORS = {'book': book_errors, 'member': member_errors}
+
+def _validate_chunk(kind, records):
+    # Top-level so the pool can pickle it; validators are looked up by name for the same reason
+    validator = VALIDATORS[kind]
+    return [validator(record) for record in records]
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def pool_processes():
+    return os.cpu_count() or 1
+
+def pool_worthwhile(records):
+    """Whether validating this many records is faster with validation_pool than inline"""
+    return records >= PARALLEL_THRESHOLD and pool_processes() > 1
+
+def validation_pool():
+    """Process pool for validate_many, one worker per CPU.
+
+    Workers are spawned rather than forked, since the GUI process has
+    threads (Qt, the query pool) that a fork would copy mid-flight.
+    """
+    return ProcessPoolExecutor(pool_processes(), mp_context=multiprocessing.get_context('spawn'))
+
+def validate_many(records, kind, pool=None):
+    """Validate a list or iterator of 'book' or 'member' dicts; returns one error list per record, in order.
+
+    With a pool (see validation_pool) the records are split into one slice
+    per worker and validated in parallel; without one they are validated
+    here. A record takes only a few times longer to validate than to pickle,
+    so small slices spend the gain on task overhead; see pool_worthwhile.
+    """
+    if kind not in VALIDATORS:
+        raise ValueError(f"Unknown record kind: {kind}")
+    if pool is None:
+        return _validate_chunk(kind, records)
+    records = list(records)
+    size = max(1, -(-len(records) // pool_processes()))
+    errors = []
+    for chunk_errors in pool.map(partial(_validate_chunk, kind), _chunks(records, size)):
+        errors.extend(chunk_errors)
+    return errors
@@ -0,0 +1,76 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QToolTip
+from PyQt5.QtCore import Qt, QEvent, QRect, QSize, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from icon_manager import icon_manager
+from views.table_models import ENTITY_ID_ROLE
+
+BUTTON_SIZE = 28
+ICON_SIZE = 16
+SPACING = 4
+MARGIN = 4
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """Paints a row of action buttons in a table cell and reports clicks.
+
+    No widgets are created per row: the buttons are drawn for visible cells
+    only and clicks are hit-tested against the same geometry. A click emits
+    the action name and the entity id of the row it landed on.
+    """
+    action_triggered = pyqtSignal(str, object)
+
+    def __init__(self, actions, parent=None):
+        """actions is a list of (action, icon_name, tooltip) tuples"""
+        super().__init__(parent)
+        self.actions = actions
+
+    def button_rects(self, cell_rect):
+        """Geometry of each button inside a cell"""
+        rects = []
+        x = cell_rect.left() + MARGIN
+        y = cell_rect.top() + (cell_rect.height() - BUTTON_SIZE) // 2
+        for _ in self.actions:
+            rects.append(QRect(x, y, BUTTON_SIZE, BUTTON_SIZE))
+            x += BUTTON_SIZE + SPACING
+        return rects
+
+    def action_at(self, cell_rect, pos):
+        for (action, _, tooltip), rect in zip(self.actions, self.button_rects(cell_rect)):
+            if rect.contains(pos):
+                return action, tooltip
+        return None, None
+
+    def paint(self, painter, option, index):
+        # Let the style draw selection and alternating row backgrounds
+        super().paint(painter, option, index)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QColor("#DDDDDD"))
+        painter.setBrush(QColor("#F5F5F5"))
+        offset = (BUTTON_SIZE - ICON_SIZE) // 2
+        for (_, icon_name, _), rect in zip(self.actions, self.button_rects(option.rect)):
+            painter.drawRoundedRect(rect, 4, 4)
+            icon_manager.get_icon(icon_name).paint(painter, rect.adjusted(offset, offset, -offset, -offset))
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        width = MARGIN * 2 + len(self.actions) * (BUTTON_SIZE + SPACING)
+        return QSize(width, BUTTON_SIZE + MARGIN * 2)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() in (QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick) and event.button() == Qt.LeftButton:
+            action, _ = self.action_at(option.rect, event.pos())
+            if action:
+                # Swallow double clicks on a button so they don't also open the edit dialog
+                if event.type() == QEvent.MouseButtonRelease:
+                    self.action_triggered.emit(action, index.data(ENTITY_ID_ROLE))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            _, tooltip = self.action_at(option.rect, event.pos())
+            if tooltip:
+                QToolTip.showText(event.globalPos(), tooltip, view)
+                return True
+        return super().helpEvent(event, view, option, index)
@@ -1,11 +1,13 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, 
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTableView, 
                              QPushButton, QLineEdit, QHBoxLayout, QMessageBox, QDialog, 
-                             QFormLayout, QComboBox, QSpinBox, QLabel, QToolButton, 
-                             QDateEdit, QFrame, QHeaderView)
+                             QFormLayout, QComboBox, QSpinBox, QLabel, 
+                             QDateEdit, QFrame, QHeaderView, QCheckBox, QProgressDialog, QInputDialog)
 from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QColor
 from datetime import datetime
 from icon_manager import icon_manager
+from views.table_models import BookTableModel, CopyTableModel
+from views.action_delegate import ActionButtonDelegate
+from views.year_histogram import YearHistogram
 import os
 from PyQt5.QtCore import QFile, QTextStream
 
@@ -21,14 +23,6 @@ class StyledButton(QPushButton):
         self.primary = primary
         self.setProperty("primary", str(primary).lower())
 
-class StyledToolButton(QToolButton):
-    """Custom styled tool button"""
-    def __init__(self, icon_name, tooltip="", button_type="default"):
-        super().__init__()
-        self.setIcon(icon_manager.get_icon(icon_name))
-        self.setToolTip(tooltip)
-        self.setProperty("button_type", button_type)
-
 class SearchFrame(QFrame):
     """Styled search and filter frame"""
     def __init__(self):
@@ -42,6 +36,7 @@ class BookManagementView(QWidget):
     def __init__(self):
         super().__init__()
         self.copies_table = None
+        self.copies_model = None
         self.load_styles()
         self.init_ui()
 
@@ -70,8 +65,14 @@ class BookManagementView(QWidget):
         self.search_input.setPlaceholderText("🔍 Search by title, author, ISBN, or genre...")
         self.search_input.setMinimumHeight(40)
         
+        self.fuzzy_toggle = QCheckBox("Fuzzy")
+        self.fuzzy_toggle.setToolTip("Typo-tolerant matching on title and author")
+        
+        # Genres carry their name as item data; labels are replaced by live counts from the facets
         self.genre_filter = QComboBox()
-        self.genre_filter.addItems(['All', 'Fiction', 'Non-Fiction', 'Science', 'History', 'Biography', 'Other'])
+        self.genre_filter.addItem('All', '')
+        for genre in ['Fiction', 'Non-Fiction', 'Science', 'History', 'Biography', 'Other']:
+            self.genre_filter.addItem(genre, genre)
         self.genre_filter.setMinimumHeight(40)
         
         self.year_min = QSpinBox()
@@ -83,6 +84,11 @@ class BookManagementView(QWidget):
         self.year_max.setRange(1000, datetime.now().year + 1)
         self.year_max.setValue(datetime.now().year + 1)
         self.year_max.setMinimumHeight(40)
+
+        self.year_histogram = YearHistogram()
+        self.year_histogram.set_range(self.year_min.value(), self.year_max.value())
+        self.year_min.valueChanged.connect(lambda _: self.year_histogram.set_range(self.year_min.value(), self.year_max.value()))
+        self.year_max.valueChanged.connect(lambda _: self.year_histogram.set_range(self.year_min.value(), self.year_max.value()))
         
         self.search_button = StyledButton("Search", "search", primary=True)
         self.clear_search_button = StyledButton("Clear", "delete")
@@ -90,28 +96,37 @@ class BookManagementView(QWidget):
         # Add widgets to search frame layout
         search_frame.layout().addWidget(QLabel("Search:"))
         search_frame.layout().addWidget(self.search_input, 2)
+        search_frame.layout().addWidget(self.fuzzy_toggle)
         search_frame.layout().addWidget(QLabel("Genre:"))
         search_frame.layout().addWidget(self.genre_filter)
         search_frame.layout().addWidget(QLabel("Year Range:"))
         search_frame.layout().addWidget(self.year_min)
         search_frame.layout().addWidget(QLabel("-"))
         search_frame.layout().addWidget(self.year_max)
+        search_frame.layout().addWidget(self.year_histogram)
         search_frame.layout().addWidget(self.search_button)
         search_frame.layout().addWidget(self.clear_search_button)
         
         # Book Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Title", "Author", "ISBN", "Year", "Publisher", "Pages", "Genre", "Copies", "Actions"
-        ])
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table = QTableView()
+        self.table_model = BookTableModel(self)
+        self.table.setModel(self.table_model)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(50)
         self.table.setMinimumHeight(400)
         
+        # Action buttons are painted by a delegate instead of per-row widgets
+        self.action_delegate = ActionButtonDelegate([
+            ('edit', "edit", "Edit Book"),
+            ('copies', "add", "Manage Copies"),
+            ('delete', "delete", "Delete Book")
+        ], self.table)
+        self.table.setItemDelegateForColumn(BookTableModel.ACTIONS_COLUMN, self.action_delegate)
+        
         # Column setup
         header = self.table.horizontalHeader()
         header.setStretchLastSection(False)
@@ -155,10 +170,14 @@ class BookManagementView(QWidget):
         self.import_button = StyledButton("📥 Import Books", "import")
         self.import_button.setMinimumHeight(45)
         
+        self.export_button = StyledButton("📤 Export", "export")
+        self.export_button.setMinimumHeight(45)
+        
         button_layout.addWidget(self.add_button)
         button_layout.addWidget(self.edit_button)
         button_layout.addWidget(self.delete_button)
         button_layout.addWidget(self.import_button)
+        button_layout.addWidget(self.export_button)
         button_layout.addStretch()
         
         button_frame.setLayout(button_layout)
@@ -196,76 +215,36 @@ class BookManagementView(QWidget):
             self.table.setColumnWidth(5, max(publisher_width, 100))
             self.table.setColumnWidth(7, max(genre_width, 80))
 
-    def show_books(self, books):
-        """Enhanced book display with better formatting and styling"""
-        self.table.clearContents()
-        self.table.setRowCount(len(books))
-        current_year = datetime.now().year
-        
-        for row_idx, row in enumerate(books):
-            # Set row height for better appearance
-            self.table.setRowHeight(row_idx, 50)
-            
-            # Display book data with enhanced formatting
-            for col_idx, value in enumerate(row[:8]):
-                item = QTableWidgetItem(str(value))
-                item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                
-                # Add special formatting for certain columns
-                if col_idx == 4:  # Year column
-                    year = int(value) if str(value).isdigit() else 0
-                    if year > current_year - 5:
-                        item.setBackground(QColor("#E8F5E8"))  # Light green for recent books
-                elif col_idx == 6:  # Pages column
-                    item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                
-                self.table.setItem(row_idx, col_idx, item)
-            
-            # Copy count with enhanced styling
-            copy_count = str(row[9]) if len(row) > 9 else "0"
-            copy_item = QTableWidgetItem(copy_count)
-            copy_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-            
-            # Color code based on availability
-            copies = int(copy_count) if copy_count.isdigit() else 0
-            if copies == 0:
-                copy_item.setBackground(QColor("#FFEBEE"))  # Light red
-                copy_item.setForeground(QColor("#D32F2F"))  # Red text
-            elif copies < 3:
-                copy_item.setBackground(QColor("#FFF3E0"))  # Light orange
-                copy_item.setForeground(QColor("#F57C00"))  # Orange text
-            else:
-                copy_item.setBackground(QColor("#E8F5E8"))  # Light green
-                copy_item.setForeground(QColor("#388E3C"))  # Green text
-            
-            self.table.setItem(row_idx, 8, copy_item)
-            
-            # Enhanced action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout()
-            action_layout.setContentsMargins(4, 4, 4, 4)
-            action_layout.setSpacing(4)
-            
-            book_id = str(row[0])
-            edit_btn = StyledToolButton("edit", "Edit Book", "edit")
-            edit_btn.setProperty('book_id', book_id)
-            
-            add_copy_btn = StyledToolButton("add", "Manage Copies", "add")
-            add_copy_btn.setProperty('book_id', book_id)
-            
-            delete_btn = StyledToolButton("delete", "Delete Book", "delete")
-            delete_btn.setProperty('book_id', book_id)
-            
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(add_copy_btn)
-            action_layout.addWidget(delete_btn)
-            action_layout.addStretch()
-            
-            action_widget.setLayout(action_layout)
-            self.table.setCellWidget(row_idx, 9, action_widget)
-        
+    def selected_genre(self):
+        """Genre picked in the filter, or None for All"""
+        return self.genre_filter.currentData() or None
+
+    def show_facets(self, facets, year_bucket):
+        """Relabel the genre filter with counts and redraw the year histogram"""
+        selected = self.selected_genre()
+        genres = facets['genres']
+        self.genre_filter.blockSignals(True)
+        self.genre_filter.clear()
+        self.genre_filter.addItem(f"All ({facets['total']})", '')
+        for genre in sorted(genres):
+            self.genre_filter.addItem(f"{genre} ({genres[genre]})", genre)
+        if selected and selected not in genres:
+            # Keep the current choice visible even when nothing matches it now
+            self.genre_filter.addItem(f"{selected} (0)", selected)
+        self.genre_filter.setCurrentIndex(max(self.genre_filter.findData(selected or ''), 0))
+        self.genre_filter.blockSignals(False)
+        self.year_histogram.set_counts(facets['years'], year_bucket)
+
+    def show_books(self, books, has_more=False):
+        """Show the first page of books"""
+        self.table_model.set_rows(books, has_more)
+        self.table.scrollToTop()
         self.resize_columns()
 
+    def append_books(self, books, has_more=False):
+        """Append a page of books below the rows already shown"""
+        self.table_model.append_rows(books, has_more)
+
     def show_error(self, message):
         """Enhanced error dialog"""
         msg = QMessageBox()
@@ -275,6 +254,45 @@ class BookManagementView(QWidget):
         msg.setObjectName("errorDialog")
         msg.exec_()
 
+    def show_success(self, message):
+        """Success dialog"""
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Information)
+        msg.setWindowTitle("✅ Success")
+        msg.setText(message)
+        msg.setObjectName("successDialog")
+        msg.exec_()
+
+    def ask_duplicate_policy(self):
+        """Ask what an import should do with books already in the catalog; None if cancelled"""
+        choices = {
+            "Skip them (keep the catalog as it is)": 'skip',
+            "Merge (fill only their empty fields)": 'merge',
+            "Update (overwrite them with the file)": 'update',
+        }
+        choice, ok = QInputDialog.getItem(self, "📥 Import Books", "Books whose ISBN is already in the catalog:",
+                                          list(choices), 0, False)
+        return choices[choice] if ok else None
+
+    def ask_export_target(self):
+        """Ask whether to export the listed books or their copies; None if cancelled"""
+        choices = {"Books": 'books', "Copies of these books": 'copies'}
+        choice, ok = QInputDialog.getItem(self, "📤 Export", "Export the books matching the current filters, or their copies:",
+                                          list(choices), 0, False)
+        return choices[choice] if ok else None
+
+    def show_import_progress(self):
+        """Window-modal progress dialog for a background import; its Cancel stops the import"""
+        progress = QProgressDialog("Reading file...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("📥 Importing Books")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setObjectName("importProgressDialog")
+        progress.show()
+        return progress
+
     def show_book_dialog(self, book_data=None):
         """Enhanced book dialog"""
         dialog = QDialog(self)
@@ -391,16 +409,15 @@ class BookManagementView(QWidget):
         title_label.setObjectName("titleLabel")
         
         # Copies Table
-        self.copies_table = QTableWidget()
-        self.copies_table.setColumnCount(5)
-        self.copies_table.setHorizontalHeaderLabels([
-            "Copy ID", "Copy Number", "Acquisition Date", "Condition", "Status"
-        ])
-        self.copies_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.copies_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.copies_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.copies_table = QTableView()
+        self.copies_model = CopyTableModel(dialog)
+        self.copies_table.setModel(self.copies_model)
+        self.copies_table.setSelectionMode(QTableView.SingleSelection)
+        self.copies_table.setSelectionBehavior(QTableView.SelectRows)
+        self.copies_table.setEditTriggers(QTableView.NoEditTriggers)
         self.copies_table.setAlternatingRowColors(True)
         self.copies_table.verticalHeader().setVisible(False)
+        self.copies_table.verticalHeader().setDefaultSectionSize(45)
         self.copies_table.setMinimumHeight(300)
         
         # Column setup
@@ -522,61 +539,6 @@ class BookManagementView(QWidget):
 
     def show_copies(self, copies):
         """Display copies in the copies table"""
-        if not hasattr(self, 'copies_table'):
+        if self.copies_model is None:
             return
-            
-        self.copies_table.setRowCount(len(copies))
-        
-        for row_idx, copy in enumerate(copies):
-            self.copies_table.setRowHeight(row_idx, 45)
-            
-            # Copy ID
-            id_item = QTableWidgetItem(str(copy[0]))
-            id_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-            self.copies_table.setItem(row_idx, 0, id_item)
-            
-            # Copy Number
-            number_item = QTableWidgetItem(str(copy[2]))
-            number_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            self.copies_table.setItem(row_idx, 1, number_item)
-            
-            # Acquisition Date
-            date_item = QTableWidgetItem(str(copy[3]))
-            date_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-            self.copies_table.setItem(row_idx, 2, date_item)
-            
-            # Condition with color coding
-            condition_item = QTableWidgetItem(str(copy[4]))
-            condition_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-            condition = str(copy[4]).lower()
-            if condition == 'excellent':
-                condition_item.setBackground(QColor("#E8F5E8"))
-                condition_item.setForeground(QColor("#2E7D32"))
-            elif condition == 'good':
-                condition_item.setBackground(QColor("#E3F2FD"))
-                condition_item.setForeground(QColor("#1565C0"))
-            elif condition == 'fair':
-                condition_item.setBackground(QColor("#FFF3E0"))
-                condition_item.setForeground(QColor("#EF6C00"))
-            else:  # poor
-                condition_item.setBackground(QColor("#FFEBEE"))
-                condition_item.setForeground(QColor("#C62828"))
-            self.copies_table.setItem(row_idx, 3, condition_item)
-            
-            # Status with color coding
-            status_item = QTableWidgetItem(str(copy[5]))
-            status_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-            status = str(copy[5]).lower()
-            if status == 'available':
-                status_item.setBackground(QColor("#E8F5E8"))
-                status_item.setForeground(QColor("#2E7D32"))
-            elif status == 'loaned':
-                status_item.setBackground(QColor("#FFF3E0"))
-                status_item.setForeground(QColor("#EF6C00"))
-            elif status == 'reserved':
-                status_item.setBackground(QColor("#E3F2FD"))
-                status_item.setForeground(QColor("#1565C0"))
-            else:  # lost
-                status_item.setBackground(QColor("#FFEBEE"))
-                status_item.setForeground(QColor("#C62828"))
-            self.copies_table.setItem(row_idx, 4, status_item)
\ No newline at end of file
+        self.copies_model.set_rows(copies)
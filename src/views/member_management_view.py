@@ -1,11 +1,12 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, 
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTableView, 
                              QPushButton, QLineEdit, QHBoxLayout, QMessageBox, QDialog, 
-                             QFormLayout, QComboBox, QSpinBox, QLabel, QToolButton, 
-                             QDateEdit, QFrame, QHeaderView, QTextEdit)
+                             QFormLayout, QComboBox, QSpinBox, QLabel, 
+                             QDateEdit, QFrame, QHeaderView, QTextEdit, QProgressDialog)
 from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QColor
 from datetime import datetime, timedelta
 from icon_manager import icon_manager
+from views.table_models import MemberTableModel, LoanTableModel
+from views.action_delegate import ActionButtonDelegate
 import os
 from PyQt5.QtCore import QFile, QTextStream
 
@@ -21,14 +22,6 @@ class StyledButton(QPushButton):
         self.primary = primary
         self.setProperty("primary", str(primary).lower())
 
-class StyledToolButton(QToolButton):
-    """Custom styled tool button"""
-    def __init__(self, icon_name, tooltip="", button_type="default"):
-        super().__init__()
-        self.setIcon(icon_manager.get_icon(icon_name))
-        self.setToolTip(tooltip)
-        self.setProperty("button_type", button_type)
-
 class SearchFrame(QFrame):
     """Styled search and filter frame"""
     def __init__(self):
@@ -79,6 +72,9 @@ class MemberManagementView(QWidget):
         
         self.search_button = StyledButton("Search", "search", primary=True)
         self.clear_search_button = StyledButton("Clear", "delete")
+        # Shown while members are still streaming in
+        self.cancel_load_button = StyledButton("Cancel")
+        self.cancel_load_button.setVisible(False)
         
         # Add widgets to search frame layout
         search_frame.layout().addWidget(QLabel("Search:"))
@@ -89,22 +85,30 @@ class MemberManagementView(QWidget):
         search_frame.layout().addWidget(self.membership_type_filter)
         search_frame.layout().addWidget(self.search_button)
         search_frame.layout().addWidget(self.clear_search_button)
+        search_frame.layout().addWidget(self.cancel_load_button)
         
         # Member Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(12)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Member #", "Name", "Email", "Phone", "Status", 
-            "Join Date", "Expiry Date", "Books Loaned", "Total Fines", "Last Activity", "Actions"
-        ])
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table = QTableView()
+        self.table_model = MemberTableModel(self)
+        self.table.setModel(self.table_model)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
-        self.table.setSortingEnabled(True)
+        # Header clicks sort in the database (MemberController.sort_table), not over the loaded page
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(50)
         self.table.setMinimumHeight(400)
         
+        # Action buttons are painted by a delegate instead of per-row widgets
+        self.action_delegate = ActionButtonDelegate([
+            ('edit', "edit", "Edit Member"),
+            ('delete', "delete", "Delete Member"),
+            ('renew', "import", "Renew Membership"),
+            ('view', "search", "View Loans")
+        ], self.table)
+        self.table.setItemDelegateForColumn(MemberTableModel.ACTIONS_COLUMN, self.action_delegate)
+        
         # Column setup
         header = self.table.horizontalHeader()
         header.setStretchLastSection(False)
@@ -153,11 +157,15 @@ class MemberManagementView(QWidget):
         self.import_button = StyledButton("📥 Import Members", "import")
         self.import_button.setMinimumHeight(45)
         
+        self.export_button = StyledButton("📤 Export Members", "export")
+        self.export_button.setMinimumHeight(45)
+        
         button_layout.addWidget(self.add_button)
         button_layout.addWidget(self.edit_button)
         button_layout.addWidget(self.delete_button)
         button_layout.addWidget(self.renew_button)
         button_layout.addWidget(self.import_button)
+        button_layout.addWidget(self.export_button)
         button_layout.addStretch()
         
         button_frame.setLayout(button_layout)
@@ -199,99 +207,24 @@ class MemberManagementView(QWidget):
             self.table.setColumnWidth(7, max(date_width, 90))
             self.table.setColumnWidth(10, max(date_width, 90))
 
-    def show_members(self, members):
-        """Enhanced member display with better formatting and styling"""
-        self.table.clearContents()
-        self.table.setRowCount(len(members))
-        current_date = datetime.now().date()
-        
-        for row_idx, row in enumerate(members):
-            # Set row height for better appearance
-            self.table.setRowHeight(row_idx, 50)
-            
-            # Display member data with enhanced formatting
-            for col_idx, value in enumerate(row[:11]):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                
-                # Special formatting for specific columns
-                if col_idx == 2:  # Name column - combine first and last name if separate
-                    if isinstance(value, tuple) and len(value) >= 2:
-                        item.setText(f"{value[0]} {value[1]}")
-                elif col_idx == 5:  # Status column
-                    status = str(value).lower() if value else "unknown"
-                    if status == 'active':
-                        item.setBackground(QColor("#E8F5E8"))  # Light green
-                        item.setForeground(QColor("#2E7D32"))  # Dark green
-                    elif status == 'expired':
-                        item.setBackground(QColor("#FFF3E0"))  # Light orange
-                        item.setForeground(QColor("#F57C00"))  # Orange
-                    elif status in ['suspended', 'cancelled']:
-                        item.setBackground(QColor("#FFEBEE"))  # Light red
-                        item.setForeground(QColor("#C62828"))  # Red
-                elif col_idx in [6, 7, 10]:  # Date columns
-                    if value:
-                        try:
-                            # Format date consistently
-                            if isinstance(value, str):
-                                date_obj = datetime.strptime(value, '%Y-%m-%d').date()
-                            else:
-                                date_obj = value
-                            item.setText(date_obj.strftime('%Y-%m-%d'))
-                            
-                            # Highlight expiry dates
-                            if col_idx == 7:  # Expiry date
-                                days_until_expiry = (date_obj - current_date).days
-                                if days_until_expiry < 0:
-                                    item.setBackground(QColor("#FFEBEE"))  # Expired - red
-                                elif days_until_expiry <= 30:
-                                    item.setBackground(QColor("#FFF3E0"))  # Expiring soon - orange
-                        except (ValueError, TypeError):
-                            item.setText(str(value) if value else "")
-                elif col_idx in [8, 9]:  # Numeric columns (Books Loaned, Total Fines)
-                    item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                    if col_idx == 9:  # Total Fines
-                        try:
-                            fine_amount = float(value) if value else 0.0
-                            if fine_amount > 0:
-                                item.setForeground(QColor("#D32F2F"))  # Red for outstanding fines
-                                item.setText(f"${fine_amount:.2f}")
-                            else:
-                                item.setText("$0.00")
-                        except (ValueError, TypeError):
-                            item.setText("$0.00")
-                
-                self.table.setItem(row_idx, col_idx, item)
-            
-            # Enhanced action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout()
-            action_layout.setContentsMargins(4, 4, 4, 4)
-            action_layout.setSpacing(4)
-            
-            member_id = str(row[0])
-            edit_btn = StyledToolButton("edit", "Edit Member", "edit")
-            edit_btn.setProperty('member_id', member_id)
-            
-            delete_btn = StyledToolButton("delete", "Delete Member", "delete")
-            delete_btn.setProperty('member_id', member_id)
-            
-            renew_btn = StyledToolButton("import", "Renew Membership", "renew")
-            renew_btn.setProperty('member_id', member_id)
-            
-            view_loans_btn = StyledToolButton("search", "View Loans", "view")
-            view_loans_btn.setProperty('member_id', member_id)
-            
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-            action_layout.addWidget(renew_btn)
-            action_layout.addWidget(view_loans_btn)
-            action_layout.addStretch()
-            
-            action_widget.setLayout(action_layout)
-            self.table.setCellWidget(row_idx, 11, action_widget)
-        
+    def show_members(self, members, has_more=False):
+        """Show the first page of members"""
+        self.table_model.set_rows(members, has_more)
+        self.table.scrollToTop()
         self.resize_columns()
+        self.finish_members_load()
+
+    def append_members(self, members, has_more=False):
+        """Append a page of members below the rows already shown"""
+        self.table_model.append_rows(members, has_more)
+        self.finish_members_load()
+
+    def begin_members_load(self):
+        """Offer Cancel while a page of members is loading"""
+        self.cancel_load_button.setVisible(True)
+
+    def finish_members_load(self):
+        self.cancel_load_button.setVisible(False)
 
     def show_error(self, message):
         """Enhanced error dialog"""
@@ -311,6 +244,18 @@ class MemberManagementView(QWidget):
         msg.setObjectName("successDialog")
         msg.exec_()
 
+    def show_import_progress(self):
+        """Window-modal progress dialog for a background import; its Cancel stops the import"""
+        progress = QProgressDialog("Reading file...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("📥 Importing Members")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setObjectName("importProgressDialog")
+        progress.show()
+        return progress
+
     def show_member_dialog(self, member_data=None):
         """Enhanced member dialog"""
         dialog = QDialog(self)
@@ -476,8 +421,11 @@ class MemberManagementView(QWidget):
             'cancel_button': cancel_button
         }
 
-    def show_member_loans_dialog(self, member_id, member_name, loans):
-        """Show dialog with member's loan history"""
+    def show_member_loans_dialog(self, member_id, member_name, loans=()):
+        """Show dialog with member's loan history.
+
+        Further loans can be streamed in through dialog.append_loans().
+        """
         dialog = QDialog(self)
         dialog.setWindowTitle(f"📚 Loan History for {member_name}")
         dialog.resize(800, 600)
@@ -493,38 +441,26 @@ class MemberManagementView(QWidget):
         title_label.setObjectName("titleLabel")
         
         # Loans Table
-        loans_table = QTableWidget()
-        loans_table.setColumnCount(7)
-        loans_table.setHorizontalHeaderLabels([
-            "Loan ID", "Book Title", "Loan Date", "Due Date", "Return Date", "Status", "Renewals"
-        ])
-        loans_table.setSelectionMode(QTableWidget.SingleSelection)
-        loans_table.setSelectionBehavior(QTableWidget.SelectRows)
-        loans_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        loans_table = QTableView()
+        loans_model = LoanTableModel(dialog)
+        loans_model.set_rows(loans)
+        loans_table.setModel(loans_model)
+        loans_table.setSelectionMode(QTableView.SingleSelection)
+        loans_table.setSelectionBehavior(QTableView.SelectRows)
+        loans_table.setEditTriggers(QTableView.NoEditTriggers)
         loans_table.setAlternatingRowColors(True)
         loans_table.verticalHeader().setVisible(False)
         loans_table.setMinimumHeight(400)
         
-        # Populate loans table
-        loans_table.setRowCount(len(loans))
-        for row_idx, loan in enumerate(loans):
-            for col_idx, value in enumerate(loan):
-                item = QTableWidgetItem(str(value) if value else "")
-                
-                # Color code based on status
-                if col_idx == 5:  # Status column
-                    status = str(value).lower() if value else "unknown"
-                    if status == 'active':
-                        item.setBackground(QColor("#FFF3E0"))  # Light orange
-                    elif status == 'returned':
-                        item.setBackground(QColor("#E8F5E8"))  # Light green
-                    elif status == 'overdue':
-                        item.setBackground(QColor("#FFEBEE"))  # Light red
-                
-                loans_table.setItem(row_idx, col_idx, item)
-        
         # Resize columns
         loans_table.resizeColumnsToContents()
+
+        def append_loans(more_loans):
+            first_chunk = loans_model.rowCount() == 0
+            loans_model.append_rows(more_loans)
+            if first_chunk:
+                loans_table.resizeColumnsToContents()
+        dialog.append_loans = append_loans
         
         # Close button
         close_button = StyledButton("❌ Close")
@@ -0,0 +1,349 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor
+from datetime import datetime
+
+# Role under which every model exposes the id of the row's entity
+ENTITY_ID_ROLE = Qt.UserRole + 1
+
+ALIGN_LEFT = Qt.AlignLeft | Qt.AlignVCenter
+ALIGN_CENTER = Qt.AlignCenter | Qt.AlignVCenter
+
+# Shared (background, foreground) palettes used by the colour rules
+GREEN = ("#E8F5E8", "#2E7D32")
+BLUE = ("#E3F2FD", "#1565C0")
+ORANGE = ("#FFF3E0", "#EF6C00")
+RED = ("#FFEBEE", "#C62828")
+
+_colors = {}
+
+def _color(value):
+    """Return a cached QColor for a hex string"""
+    if value not in _colors:
+        _colors[value] = QColor(value)
+    return _colors[value]
+
+def _format_date(value):
+    """Format dates and ISO date strings consistently"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d').date()
+    return value.strftime('%Y-%m-%d')
+
+
+class BaseTableModel(QAbstractTableModel):
+    """Read-only model over a list of row tuples.
+
+    Subclasses describe the columns and override display(), alignment() and
+    colors(); the view only asks for the rows that are actually visible.
+    """
+    headers = []
+    fetch_more_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.row_index = {}
+        self.header_labels = list(self.headers)
+        self.has_more = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header_labels)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section < len(self.header_labels):
+            return self.header_labels[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            return self.display(row, column)
+        if role == ENTITY_ID_ROLE:
+            return self.entity_id(row)
+        if role == Qt.TextAlignmentRole:
+            return self.alignment(row, column)
+        if role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            colors = self.colors(row, column)
+            if colors:
+                color = colors[0] if role == Qt.BackgroundRole else colors[1]
+                return _color(color) if color else None
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        # Only one request per page; append_rows() re-arms it
+        self.has_more = False
+        self.fetch_more_requested.emit()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Client-side sort on the displayed text, as QTableWidget did"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        persistent_rows = [self.rows[index.row()] for index in persistent]
+
+        self.rows = sorted(self.rows, key=lambda row: self.display(row, column), reverse=order == Qt.DescendingOrder)
+        self._rebuild_index()
+
+        self.changePersistentIndexList(persistent, [
+            self.index(self.row_index[self.entity_id(row)], index.column())
+            for row, index in zip(persistent_rows, persistent)
+        ])
+        self.layoutChanged.emit()
+
+    def set_rows(self, rows, has_more=False):
+        """Replace all rows.
+
+        Lazy sequences such as a CatalogView are kept as they are, so rows are
+        only built when the view paints them; other iterables are copied.
+        """
+        self.beginResetModel()
+        self.rows = rows if hasattr(rows, '__getitem__') else list(rows)
+        # Built on the first lookup by id
+        self.row_index = None
+        self.has_more = has_more
+        self.endResetModel()
+
+    def append_rows(self, rows, has_more=False):
+        """Append rows below the ones already loaded"""
+        if rows:
+            if not isinstance(self.rows, list):
+                self.rows = list(self.rows)
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self.rows.extend(rows)
+            if self.row_index is not None:
+                self.row_index.update((self.entity_id(row), i) for i, row in enumerate(rows, start))
+            self.endInsertRows()
+        self.has_more = has_more
+
+    def insert_row(self, row, position=None):
+        """Insert one row (at the end by default) without resetting the model"""
+        position = len(self.rows) if position is None else position
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._mutable_rows().insert(position, row)
+        self.row_index = None
+        self.endInsertRows()
+
+    def update_row(self, row):
+        """Replace the loaded row with the same entity id; returns False if it isn't loaded"""
+        position = self.position_of(self.entity_id(row))
+        if position is None:
+            return False
+        self._mutable_rows()[position] = row
+        self.dataChanged.emit(self.index(position, 0), self.index(position, self.columnCount() - 1))
+        return True
+
+    def remove_row(self, entity_id):
+        """Remove the loaded row for an entity id; returns False if it isn't loaded"""
+        position = self.position_of(entity_id)
+        if position is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._mutable_rows()[position]
+        self.row_index = None
+        self.endRemoveRows()
+        return True
+
+    def sorted_position(self, row, key, descending=False):
+        """Position that keeps the rows ordered by key (binary search)"""
+        target = key(row)
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            value = key(self.rows[middle])
+            if (value >= target) if descending else (value <= target):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _mutable_rows(self):
+        if not hasattr(self.rows, 'insert'):
+            self.rows = list(self.rows)
+        return self.rows
+
+    def row_at(self, row):
+        return self.rows[row]
+
+    def position_of(self, entity_id):
+        """Return the position of an entity's loaded row, or None"""
+        if self.row_index is None:
+            self._rebuild_index()
+        return self.row_index.get(entity_id)
+
+    def row_for_id(self, entity_id):
+        """Return the loaded row for an entity id, or None"""
+        position = self.position_of(entity_id)
+        return self.rows[position] if position is not None else None
+
+    def entity_id(self, row):
+        return row[0]
+
+    def _rebuild_index(self):
+        # Lazy sequences can list their ids without building every row
+        ids = self.rows.ids() if hasattr(self.rows, 'ids') else (self.entity_id(row) for row in self.rows)
+        self.row_index = {entity_id: i for i, entity_id in enumerate(ids)}
+
+    def set_header_labels(self, labels):
+        self.header_labels = list(labels)
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.header_labels) - 1)
+
+    def display(self, row, column):
+        value = row[column]
+        return str(value) if value is not None else ""
+
+    def alignment(self, row, column):
+        return ALIGN_LEFT
+
+    def colors(self, row, column):
+        """Return (background, foreground) hex colours for a cell, or None"""
+        return None
+
+
+class BookTableModel(BaseTableModel):
+    """Books as returned by BookModel.get_books_page"""
+    headers = ["ID", "Title", "Author", "ISBN", "Year", "Publisher", "Pages", "Genre", "Copies", "Actions"]
+    COPIES_COLUMN = 8
+    ACTIONS_COLUMN = 9
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.current_year = datetime.now().year
+
+    def copy_count(self, row):
+        return int(row[9] or 0) if len(row) > 9 else 0
+
+    def display(self, row, column):
+        if column == self.COPIES_COLUMN:
+            return str(self.copy_count(row))
+        if column == self.ACTIONS_COLUMN:
+            return ""
+        return super().display(row, column)
+
+    def alignment(self, row, column):
+        if column in (6, self.COPIES_COLUMN):  # Pages, Copies
+            return ALIGN_CENTER
+        return ALIGN_LEFT
+
+    def colors(self, row, column):
+        if column == 4:  # Year column
+            if row[4] and row[4] > self.current_year - 5:
+                return ("#E8F5E8", None)  # Light green for recent books
+        elif column == self.COPIES_COLUMN:
+            # Color code based on availability
+            copies = self.copy_count(row)
+            if copies == 0:
+                return ("#FFEBEE", "#D32F2F")
+            elif copies < 3:
+                return ("#FFF3E0", "#F57C00")
+            return ("#E8F5E8", "#388E3C")
+        return None
+
+
+class CopyTableModel(BaseTableModel):
+    """Copies as returned by CopyModel.get_book_copies"""
+    headers = ["Copy ID", "Copy Number", "Acquisition Date", "Condition", "Status"]
+    # Table column -> index in the copy row
+    FIELDS = [0, 2, 3, 4, 5]
+
+    CONDITION_COLORS = {'excellent': GREEN, 'good': BLUE, 'fair': ORANGE, 'poor': RED}
+    STATUS_COLORS = {'available': GREEN, 'loaned': ORANGE, 'reserved': BLUE, 'lost': RED}
+
+    def display(self, row, column):
+        return str(row[self.FIELDS[column]])
+
+    def alignment(self, row, column):
+        return ALIGN_LEFT if column == 1 else ALIGN_CENTER
+
+    def colors(self, row, column):
+        if column == 3:
+            return self.CONDITION_COLORS.get(str(row[4]).lower(), RED)
+        if column == 4:
+            return self.STATUS_COLORS.get(str(row[5]).lower(), RED)
+        return None
+
+
+class MemberTableModel(BaseTableModel):
+    """Members as returned by MemberModel.get_members_page"""
+    headers = ["ID", "Member #", "Name", "Email", "Phone", "Status",
+               "Join Date", "Expiry Date", "Books Loaned", "Total Fines", "Last Activity", "Actions"]
+    ACTIONS_COLUMN = 11
+
+    STATUS_COLORS = {
+        'active': ("#E8F5E8", "#2E7D32"),
+        'expired': ("#FFF3E0", "#F57C00"),
+        'suspended': ("#FFEBEE", "#C62828"),
+        'cancelled': ("#FFEBEE", "#C62828"),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.current_date = datetime.now().date()
+
+    def display(self, row, column):
+        if column == self.ACTIONS_COLUMN:
+            return ""
+        value = row[column]
+        if column == 2 and isinstance(value, tuple) and len(value) >= 2:
+            return f"{value[0]} {value[1]}"
+        if column in (6, 7, 10) and value:
+            try:
+                return _format_date(value)
+            except (ValueError, TypeError, AttributeError):
+                return str(value)
+        if column == 9:
+            try:
+                return f"${float(value or 0):.2f}"
+            except (ValueError, TypeError):
+                return "$0.00"
+        return super().display(row, column)
+
+    def alignment(self, row, column):
+        return ALIGN_CENTER if column in (8, 9) else ALIGN_LEFT
+
+    def colors(self, row, column):
+        if column == 5:
+            return self.STATUS_COLORS.get(str(row[5]).lower() if row[5] else "unknown")
+        if column == 7 and row[7]:
+            try:
+                expiry = row[7]
+                if isinstance(expiry, str):
+                    expiry = datetime.strptime(expiry, '%Y-%m-%d').date()
+                days_until_expiry = (expiry - self.current_date).days
+            except (ValueError, TypeError):
+                return None
+            if days_until_expiry < 0:
+                return ("#FFEBEE", None)  # Expired - red
+            elif days_until_expiry <= 30:
+                return ("#FFF3E0", None)  # Expiring soon - orange
+        if column == 9:
+            try:
+                if float(row[9] or 0) > 0:
+                    return (None, "#D32F2F")  # Red for outstanding fines
+            except (ValueError, TypeError):
+                return None
+        return None
+
+
+class LoanTableModel(BaseTableModel):
+    """Loans as returned by MemberModel.get_member_loans"""
+    headers = ["Loan ID", "Book Title", "Loan Date", "Due Date", "Return Date", "Status", "Renewals"]
+
+    STATUS_COLORS = {
+        'active': ("#FFF3E0", None),
+        'returned': ("#E8F5E8", None),
+        'overdue': ("#FFEBEE", None),
+    }
+
+    def colors(self, row, column):
+        if column == 5:
+            return self.STATUS_COLORS.get(str(row[5]).lower() if row[5] else "unknown")
+        return None
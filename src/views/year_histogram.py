@@ -0,0 +1,62 @@
+from PyQt5.QtWidgets import QWidget, QToolTip
+from PyQt5.QtCore import QEvent, QRectF
+from PyQt5.QtGui import QColor, QPainter
+
+IN_RANGE = QColor("#1565C0")
+OUT_OF_RANGE = QColor("#BBDEFB")
+
+class YearHistogram(QWidget):
+    """Small bar chart of books per publication-year bucket.
+
+    Bars inside the selected year range are drawn darker; hovering a bar
+    shows its bucket and count.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.counts = {}
+        self.bucket = 10
+        self.year_min = None
+        self.year_max = None
+        self.setMinimumSize(120, 32)
+        self.setMaximumHeight(40)
+
+    def set_counts(self, counts, bucket):
+        self.counts = dict(counts)
+        self.bucket = bucket
+        self.update()
+
+    def set_range(self, year_min, year_max):
+        self.year_min = year_min
+        self.year_max = year_max
+        self.update()
+
+    def bar_rects(self):
+        buckets = sorted(self.counts)
+        if not buckets:
+            return []
+        peak = max(self.counts.values())
+        width = self.width() / len(buckets)
+        rects = []
+        for i, bucket in enumerate(buckets):
+            height = max(1.0, self.counts[bucket] / peak * (self.height() - 2))
+            rects.append((bucket, QRectF(i * width, self.height() - height, max(width - 1, 1), height)))
+        return rects
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        for bucket, rect in self.bar_rects():
+            in_range = ((self.year_min is None or bucket + self.bucket - 1 >= self.year_min)
+                        and (self.year_max is None or bucket <= self.year_max))
+            painter.fillRect(rect, IN_RANGE if in_range else OUT_OF_RANGE)
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            for bucket, rect in self.bar_rects():
+                # Match on the column so short bars are easy to hover
+                if rect.left() <= event.pos().x() <= rect.right():
+                    QToolTip.showText(event.globalPos(),
+                                      f"{bucket}–{bucket + self.bucket - 1}: {self.counts[bucket]} books", self)
+                    return True
+            QToolTip.hideText()
+            return True
+        return super().event(event)